@@ -153,6 +153,20 @@ CELERY_RESULT_BACKEND = 'django-db'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
+# OCR 태스크는 acks_late 로 실행되므로 워커가 미리 받아 두는 메시지를 1개로 제한 (재활용 시 다른 워커가 바로 이어받도록)
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# acks_late 메시지가 이 시간 안에 ack 되지 않으면 redis 가 다시 배달한다 (가장 긴 페이지 OCR 보다 길게)
+CELERY_BROKER_TRANSPORT_OPTIONS = {'visibility_timeout': 3600}
+# 워커 자식 프로세스 재활용: N 건 처리 후, 또는 태스크를 마친 시점의 RSS 가 한도(KB)를 넘으면
+# 현재 태스크를 끝낸 뒤 새 자식으로 교체한다 (paddle/cv2 할당으로 오래 산 자식의 RSS 가 계속 늘어나는 것 방지)
+CELERY_WORKER_MAX_TASKS_PER_CHILD = int(os.environ.get('CELERY_WORKER_MAX_TASKS_PER_CHILD', 200)) or None
+CELERY_WORKER_MAX_MEMORY_PER_CHILD = int(os.environ.get('CELERY_WORKER_MAX_MEMORY_PER_CHILD', 2_000_000)) or None  # KB
+# 자식 프로세스 초기화(worker_process_init 의 모델 웜업)를 기다리는 시간(초). 기본 4초면 모델 로드 중에 자식이 죽는다
+CELERY_WORKER_PROC_ALIVE_TIMEOUT = 120
 
 
 CORS_ALLOW_ALL_ORIGINS = True
+
+
+# OCR 파이프라인 설정 (키와 기본값은 transcripts/conf.py 참고, 환경변수 TRANSCRIPT_OCR_<키> 로도 지정 가능)
+TRANSCRIPT_OCR = {}
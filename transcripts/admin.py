@@ -1,3 +1,39 @@
+# transcripts/admin.py
 from django.contrib import admin
 
-# Register your models here.
+from .models import Transcript, TranscriptPage
+from .profiling import transcript_timings
+
+
+class TranscriptPageInline(admin.TabularInline):
+    model = TranscriptPage
+    fields = ('page_number', 'status', 'error_message', 'profile')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    show_change_link = True
+
+
+@admin.register(Transcript)
+class TranscriptAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'status', 'created_at', 'queue_wait_ms', 'processing_ms')
+    list_filter = ('status',)
+    search_fields = ('user__student_id',)
+    readonly_fields = ('enqueued_at', 'started_at', 'finished_at')
+    inlines = [TranscriptPageInline]
+
+    @admin.display(description='큐 대기(ms)')
+    def queue_wait_ms(self, obj):
+        return transcript_timings(obj)['queue_wait_ms']
+
+    @admin.display(description='처리(ms)')
+    def processing_ms(self, obj):
+        return transcript_timings(obj)['processing_ms']
+
+
+@admin.register(TranscriptPage)
+class TranscriptPageAdmin(admin.ModelAdmin):
+    list_display = ('id', 'transcript', 'page_number', 'status')
+    list_filter = ('status',)
+    readonly_fields = ('profile', 'triage')
+    exclude = ('ocr_tokens',)
@@ -0,0 +1,266 @@
+# transcripts/benchmark.py
+# OCR 파이프라인 오프라인 벤치마크.
+#  1) 합성 성적표 생성: 학년도/학기 줄, 한글 헤더, 6자리 학수번호, 성적, 재수강 표시가 있는 표를
+#     해상도/노이즈 조합별로 그려 PNG 와 정답(ocr_parsing.build_courses 와 같은 형식)을 manifest.json 에 저장
+#  2) 실행: ocr_benchmark 명령이 페이지별 지연/단계 시간(profiling.stage)/최대 RSS 를 잰다
+#  3) 채점: score_rows() 로 필드 단위 정확도 (학수번호, 성적, 재수강, 학기)
+#  4) 파라미터 탐색: ocr_sweep 명령이 설정 조합마다 run_pages() 를 돌리고 pareto_front() 로 속도/정확도 최적 조합을 고른다
+#  5) 부하 테스트: ocr_backends.FakeOcrBackend 가 synthetic_tokens() 로 같은 화면의 OCR 토큰을 만들어 재생한다
+# 이미지 렌더링(Pillow, 한글 글꼴)과 cv2 는 생성할 때만 불러온다.
+import json
+import os
+import random
+import resource
+
+# 합성 데이터 구성 요소 (포털 성적표 화면 기준)
+HEADERS = ("이수구분", "학수번호", "과목명", "학점", "성적", "재수강")
+CATEGORIES = ("전공필수", "전공선택", "교양필수", "교양선택", "일반선택")
+COURSE_NAMES = (
+    "자료구조", "알고리즘", "운영체제", "컴퓨터구조", "데이터베이스", "컴퓨터네트워크", "선형대수학", "미적분학1",
+    "확률및통계", "이산수학", "논리적사고와글쓰기", "영어회화1", "서양사의이해", "경제학입문", "심리학개론",
+    "인공지능", "기계학습", "소프트웨어공학", "웹프로그래밍", "창의적공학설계", "물리학및실험1", "일반화학",
+)
+GRADES = ("A+", "A0", "B+", "B0", "C+", "C0", "D+", "D0", "F", "P")
+GRADE_WEIGHTS = (18, 16, 14, 12, 9, 7, 4, 3, 3, 4)
+
+# 노이즈 프리셋: 가우시안 노이즈 σ, 블러 σ, JPEG 품질 (None = PNG 그대로)
+NOISE_LEVELS = {
+    "clean": {"sigma": 0.0, "blur": 0.0, "jpeg": None},
+    "light": {"sigma": 4.0, "blur": 0.0, "jpeg": 85},
+    "heavy": {"sigma": 10.0, "blur": 0.8, "jpeg": 55},
+}
+DEFAULT_WIDTHS = (800, 1280, 1920)
+# 그리는 기준 폭 (px). 이후 목표 폭으로 축소/확대해 해상도별 글자 크기를 만든다
+BASE_WIDTH = 1280
+FONT_CANDIDATES = (
+    "/usr/share/fonts/truetype/nanum/NanumGothic.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc",
+    "/System/Library/Fonts/AppleSDGothicNeo.ttc",
+    "C:/Windows/Fonts/malgun.ttf",
+)
+
+
+def find_font(path: str | None = None) -> str | None:
+    """한글 글꼴 경로 (지정한 경로 → 환경변수 BENCHMARK_FONT → 흔한 설치 위치)"""
+    for candidate in (path, os.environ.get("BENCHMARK_FONT"), *FONT_CANDIDATES):
+        if candidate and os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def synthetic_rows(rng: random.Random, codes: list[str], semesters: int) -> list[dict]:
+    """정답 과목 행. 학기마다 4~8과목, 같은 학기 안에서 학수번호는 겹치지 않는다"""
+    rows = []
+    for idx in range(semesters):
+        semester = f"{idx // 2 + 1}-{idx % 2 + 1}"
+        for code in rng.sample(codes, rng.randint(4, 8)):
+            rows.append({"code": code, "grade": rng.choices(GRADES, GRADE_WEIGHTS)[0],
+                         "retake": rng.random() < 0.08, "semester": semester})
+    return rows
+
+
+# 화면 배치 (BASE_WIDTH 기준 px): 열 경계, 행 높이, 글자 크기 (본문 / 학기 줄)
+COLUMN_X = (30, 170, 330, 760, 860, 1000, 1250)
+ROW_HEIGHT = 40
+FONT_SIZE, TITLE_FONT_SIZE = 20, 22
+
+
+def transcript_layout(rows: list[dict], start_year: int = 2021) -> tuple[int, list[tuple], list[tuple]]:
+    """
+    정답 행 → 화면 배치 (높이, [(사각형, 배경색, 테두리색)], [(x, y, 글자, 글자 크기, 색)]).
+    render_transcript() 가 그리고, synthetic_tokens() 가 같은 배치로 OCR 토큰을 만든다.
+    """
+    col_x = COLUMN_X
+    row_h, y = ROW_HEIGHT, 30
+    sections: list[tuple[str, list[dict]]] = []
+    for row in rows:
+        if not sections or sections[-1][0] != row["semester"]:
+            sections.append((row["semester"], []))
+        sections[-1][1].append(row)
+
+    height = 30 + sum(row_h * (len(r) + 3) + 30 for _, r in sections)
+    rects, texts = [], []
+    rng = random.Random(len(rows))
+    for semester, section in sections:
+        grade_year, term = (int(v) for v in semester.split("-"))
+        texts.append((col_x[0], y, f"{start_year + grade_year - 1}학년도 {grade_year}학년 {term}학기",
+                      TITLE_FONT_SIZE, (20, 20, 20)))
+        y += row_h
+        rects.append(((col_x[0], y, col_x[-1], y + row_h), (232, 236, 242), (180, 180, 180)))
+        for x, name in zip(col_x, HEADERS):
+            texts.append((x + 12, y + 9, name, FONT_SIZE, (30, 30, 30)))
+        y += row_h
+        credits = 0
+        for row in section:
+            credit = rng.choice((1, 2, 3))
+            credits += credit
+            rects.append(((col_x[0], y, col_x[-1], y + row_h), None, (210, 210, 210)))
+            cells = (rng.choice(CATEGORIES), row["code"], rng.choice(COURSE_NAMES), str(credit),
+                     row["grade"], "재수강" if row["retake"] else "")
+            for x, text in zip(col_x, cells):
+                if text:
+                    texts.append((x + 12, y + 9, text, FONT_SIZE, (0, 0, 0)))
+            y += row_h
+        texts.append((col_x[0], y + 8, f"신청학점 {credits}   취득학점 {credits}   평점 3.50",
+                      FONT_SIZE, (60, 60, 60)))
+        y += row_h + 30
+    return height, rects, texts
+
+
+def render_transcript(rows: list[dict], font_path: str, start_year: int = 2021):
+    """정답 행 → 포털 화면과 비슷한 성적표 이미지 (BGR ndarray, BASE_WIDTH 폭)"""
+    import numpy as np
+    from PIL import Image, ImageDraw, ImageFont
+
+    fonts = {size: ImageFont.truetype(font_path, size) for size in (FONT_SIZE, TITLE_FONT_SIZE)}
+    height, rects, texts = transcript_layout(rows, start_year)
+    image = Image.new("RGB", (BASE_WIDTH, height), "white")
+    draw = ImageDraw.Draw(image)
+    for rect, fill, outline in rects:
+        draw.rectangle(rect, fill=fill, outline=outline)
+    for x, y, text, size, color in texts:
+        draw.text((x, y), text, font=fonts[size], fill=color)
+    return np.asarray(image)[:, :, ::-1].copy()
+
+
+def synthetic_tokens(rows: list[dict], width: int = BASE_WIDTH, start_year: int = 2021,
+                     score: float = 0.97) -> list[dict]:
+    """
+    정답 행 → render_transcript() 화면을 완벽히 읽었을 때의 OCR 토큰 (폭 width 로 환산).
+    글자 폭은 글꼴 없이 어림한다 (한글 ≈ 글자 크기, 그 외 ≈ 0.55배).
+    """
+    ratio = width / BASE_WIDTH
+    tokens = []
+    for x, y, text, size, _ in transcript_layout(rows, start_year)[2]:
+        w = sum(size if "가" <= ch <= "힣" else size * 0.55 for ch in text)
+        bbox = (x * ratio, y * ratio, (x + w) * ratio, (y + size * 1.15) * ratio)
+        tokens.append({"txt": text, "bbox": bbox, "cx": (bbox[0] + bbox[2]) / 2.0, "cy": (bbox[1] + bbox[3]) / 2.0,
+                       "h": bbox[3] - bbox[1], "score": score})
+    return tokens
+
+
+def degrade(image, width: int, noise: str, rng: random.Random):
+    """목표 폭으로 크기를 바꾸고 노이즈 프리셋을 적용 (BGR ndarray)"""
+    import cv2
+    import numpy as np
+
+    preset = NOISE_LEVELS[noise]
+    height = max(int(image.shape[0] * width / image.shape[1]), 1)
+    interp = cv2.INTER_AREA if width < image.shape[1] else cv2.INTER_CUBIC
+    out = cv2.resize(image, (width, height), interpolation=interp)
+    if preset["blur"]:
+        out = cv2.GaussianBlur(out, (0, 0), preset["blur"])
+    if preset["sigma"]:
+        noise_arr = np.random.default_rng(rng.randrange(2 ** 32)).normal(0, preset["sigma"], out.shape)
+        out = np.clip(out.astype(np.float32) + noise_arr, 0, 255).astype(np.uint8)
+    if preset["jpeg"]:
+        _, buf = cv2.imencode(".jpg", out, [cv2.IMWRITE_JPEG_QUALITY, preset["jpeg"]])
+        out = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    return out
+
+
+def write_corpus(out_dir: str, count: int, font_path: str, seed: int = 0,
+                 widths=DEFAULT_WIDTHS, noise_levels=tuple(NOISE_LEVELS)) -> dict:
+    """합성 성적표 count 장(× 해상도 × 노이즈)을 out_dir 에 쓰고 manifest 를 돌려준다"""
+    import cv2
+
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    # 실제 색인처럼 학수번호 집합을 고정해 두고 페이지마다 그중에서 뽑는다 (ocr_benchmark 가 CodeIndex 로 사용)
+    codes = sorted({f"{rng.randrange(1, 10 ** 6):06d}" for _ in range(300)})
+    pages = []
+    for doc in range(count):
+        rows = synthetic_rows(rng, codes, rng.randint(1, 3))
+        image = render_transcript(rows, font_path, start_year=rng.choice((2019, 2020, 2021, 2022)))
+        for width in widths:
+            for noise in noise_levels:
+                name = f"doc{doc:03d}_w{width}_{noise}.png"
+                cv2.imwrite(os.path.join(out_dir, name), degrade(image, width, noise, rng))
+                pages.append({"file": name, "doc": doc, "width": width, "noise": noise, "rows": rows})
+    manifest = {"version": 1, "seed": seed, "codes": codes, "pages": pages}
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, ensure_ascii=False, indent=1)
+    return manifest
+
+
+def load_manifest(corpus_dir: str) -> dict:
+    with open(os.path.join(corpus_dir, "manifest.json"), encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def run_pages(corpus_dir: str, pages: list[dict], code_index=None) -> list[dict]:
+    """manifest 페이지마다 OCR 파싱 → [{file, width, noise, timings(profiling.stage), score(score_rows)}]"""
+    from .custom_paddle_ocr_script import ocr_single_table_term_code_grade_retake
+    from .profiling import profiled
+
+    results = []
+    for page in pages:
+        timings: dict = {}
+        with profiled(timings):
+            rows = ocr_single_table_term_code_grade_retake(os.path.join(corpus_dir, page["file"]), code_index)
+        results.append({"file": page["file"], "width": page.get("width"), "noise": page.get("noise"),
+                        "timings": timings, "score": score_rows(rows, page["rows"])})
+    return results
+
+
+# --- 채점 ---
+SCORE_FIELDS = ("code", "grade", "retake", "semester")
+
+
+def score_rows(predicted: list[dict], truth: list[dict]) -> dict:
+    """
+    페이지 한 장의 필드 단위 채점 (개수). 정답 행마다 같은 학수번호의 예측 행을 하나씩 짝짓고
+    (학수번호·학기가 모두 같은 쌍을 먼저 짝지은 뒤 남은 행끼리 학수번호로), 짝이 없는 정답 행은 모든 필드가 틀린 것으로 센다.
+    """
+    remaining = list(predicted)
+    counts = {"truth_rows": len(truth), "pred_rows": len(predicted), "exact_rows": 0,
+              **{f"{field}_ok": 0 for field in SCORE_FIELDS}}
+    pairs, unmatched = [], []
+    for row in truth:
+        match = next((p for p in remaining if p.get("code") == row["code"] and p.get("semester") == row["semester"]),
+                     None)
+        if match is None:
+            unmatched.append(row)
+            continue
+        remaining.remove(match)
+        pairs.append((row, match))
+    for row in unmatched:
+        match = next((p for p in remaining if p.get("code") == row["code"]), None)
+        if match is not None:
+            remaining.remove(match)
+            pairs.append((row, match))
+    for row, match in pairs:
+        ok = {field: match.get(field) == row[field] for field in SCORE_FIELDS}
+        for field, hit in ok.items():
+            counts[f"{field}_ok"] += hit
+        counts["exact_rows"] += all(ok.values())
+    return counts
+
+
+def accuracy(counts: list[dict]) -> dict:
+    """score_rows 결과 합계 → 정확도 (필드별 = 맞힌 정답 행 / 정답 행, code_precision = 맞힌 코드 / 예측 행)"""
+    total = {key: sum(c[key] for c in counts) for key in (counts[0] if counts else {})}
+    truth_rows = total.get("truth_rows", 0)
+    if not truth_rows:
+        return {}
+    out = {f"{field}_acc": round(total[f"{field}_ok"] / truth_rows, 4) for field in SCORE_FIELDS}
+    out["row_exact"] = round(total["exact_rows"] / truth_rows, 4)
+    out["code_precision"] = round(total["code_ok"] / total["pred_rows"], 4) if total["pred_rows"] else 0.0
+    return out
+
+
+def peak_rss_mb() -> float:
+    """이 프로세스의 최대 RSS (MB). Linux 는 KB, macOS 는 byte 단위로 돌려준다"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if os.uname().sysname == "Darwin" else 1024), 1)
+
+
+def pareto_front(points: list[dict], cost: str, gain: str) -> list[dict]:
+    """cost 는 작을수록, gain 은 클수록 좋은 점들 중 다른 점에 완전히 밀리지 않는 것 (cost 오름차순)"""
+    front = []
+    for p in sorted(points, key=lambda p: (p[cost], -p[gain])):
+        if not front or p[gain] > front[-1][gain]:
+            front.append(p)
+    return front
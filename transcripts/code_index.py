@@ -0,0 +1,134 @@
+# transcripts/code_index.py
+# 졸업요건(GraduationRequirement)에 등록된 모든 학수번호로 만든 BK-tree 색인.
+# OCR 로 읽은 6자리 코드를 "가장 가까운 실제 코드"로 보정하고, 확신할 수 있으면 핀포인트 재인식을 생략한다.
+#
+# 거리: 자리별 치환 비용 합 (학수번호는 항상 6자리이므로 삽입/삭제는 없다)
+#   - OCR 이 자주 헷갈리는 숫자 쌍(CONFUSION_PAIRS)  → 1
+#   - 그 외 치환                                      → 2
+# 비용이 1~2 사이이므로 삼각부등식이 성립하고 BK-tree 로 검색할 수 있다.
+import hashlib
+import re
+import threading
+import time
+
+CONFUSION_PAIRS = {
+    ("0", "8"), ("0", "6"), ("0", "9"), ("1", "7"), ("1", "4"),
+    ("3", "8"), ("5", "6"), ("5", "8"), ("6", "8"), ("8", "9"), ("2", "7"),
+}
+_CONFUSION = CONFUSION_PAIRS | {(b, a) for a, b in CONFUSION_PAIRS}
+
+# 확신 기준: 완전 일치이거나, 혼동 쌍 한 글자 차이(거리 1)로 유일하게 가장 가까운 코드
+CONFIDENT_DISTANCE = 1
+# 핀포인트 결과처럼 이미 한 번 더 읽은 코드는 임의의 한 글자 차이(거리 2)까지 보정
+LOOSE_DISTANCE = 2
+
+
+def code_distance(a: str, b: str) -> int:
+    if len(a) != len(b):
+        return 2 * max(len(a), len(b))
+    return sum(0 if x == y else (1 if (x, y) in _CONFUSION else 2) for x, y in zip(a, b))
+
+
+def code_candidates(text: str) -> list[str]:
+    """문자열 안의 6자리 숫자 후보 (OCR 치환 보정 후, 7자리 이상 붙은 숫자는 6자리 창으로 모두 본다)"""
+    s = text.strip().upper().replace('O', '0').replace('I', '1').replace('L', '1').replace('G', '6')
+    out = []
+    for run in re.findall(r'\d{6,}', s):
+        out.extend(run[i:i + 6] for i in range(len(run) - 5))
+    return out
+
+
+class CodeIndex:
+    def __init__(self, codes):
+        self._root = None   # (code, {distance: child})
+        self.size = 0
+        codes = sorted(set(codes))
+        # 색인 내용의 지문. 보정된 코드를 저장하는 파싱 결과 캐시(ocr_cache)의 키로 쓴다
+        self.version = hashlib.sha1(",".join(codes).encode()).hexdigest()[:16]
+        for code in codes:
+            self._add(code)
+
+    def __len__(self):
+        return self.size
+
+    def _add(self, code: str):
+        self.size += 1
+        if self._root is None:
+            self._root = (code, {})
+            return
+        node = self._root
+        while True:
+            d = code_distance(code, node[0])
+            if d == 0:
+                self.size -= 1
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = (code, {})
+                return
+            node = child
+
+    def search(self, query: str, max_distance: int) -> list[tuple[int, str]]:
+        """query 로부터 max_distance 이내의 (거리, 코드) 목록 (가까운 순)"""
+        if self._root is None:
+            return []
+        found, stack = [], [self._root]
+        while stack:
+            code, children = stack.pop()
+            d = code_distance(query, code)
+            if d <= max_distance:
+                found.append((d, code))
+            for k, child in children.items():
+                if d - max_distance <= k <= d + max_distance:
+                    stack.append(child)
+        return sorted(found)
+
+    def snap(self, text: str, max_distance: int = CONFIDENT_DISTANCE) -> str | None:
+        """text 안의 후보 중 max_distance 이내에서 유일하게 가장 가까운 실제 코드. 없거나 애매하면 None"""
+        best = None
+        for cand in code_candidates(text):
+            hits = self.search(cand, max_distance)
+            if not hits:
+                continue
+            if hits[0][0] == 0:
+                return hits[0][1]
+            if len(hits) > 1 and hits[1][0] == hits[0][0]:
+                continue   # 같은 거리의 후보가 둘 이상이면 판단하지 않는다
+            if best is None or hits[0][0] < best[0]:
+                best = hits[0]
+        return best[1] if best else None
+
+    @classmethod
+    def from_requirements(cls) -> "CodeIndex":
+        from analysis.models import GraduationRequirement
+        from analysis.services import _norm_code
+
+        list_fields = ("major_must_courses", "major_selective_courses", "general_must_courses",
+                       "general_selective_courses", "special_general_courses", "sw_courses", "msc_courses")
+        codes = set()
+        for req in GraduationRequirement.objects.only(*list_fields, "drbol_courses"):
+            lists = [getattr(req, f) for f in list_fields]
+            if isinstance(req.drbol_courses, dict):
+                lists.extend(req.drbol_courses.values())
+            for items in lists:
+                for item in (items or []):
+                    code = _norm_code(item.get("code")) if isinstance(item, dict) else ""
+                    if len(code) == 6:
+                        codes.add(code)
+        return cls(codes)
+
+
+# --- 프로세스별 색인 캐시 (졸업요건은 자주 바뀌지 않으므로 일정 시간마다만 다시 만든다) ---
+INDEX_TTL_SECONDS = 300
+_index = None
+_index_built_at = 0.0
+_index_lock = threading.Lock()
+
+def get_code_index() -> CodeIndex:
+    global _index, _index_built_at
+    if _index is None or time.monotonic() - _index_built_at > INDEX_TTL_SECONDS:
+        with _index_lock:
+            if _index is None or time.monotonic() - _index_built_at > INDEX_TTL_SECONDS:
+                _index = CodeIndex.from_requirements()
+                _index_built_at = time.monotonic()
+    return _index
@@ -0,0 +1,165 @@
+# transcripts/conf.py
+# OCR 파이프라인 설정.
+# 조회 우선순위: 환경변수 TRANSCRIPT_OCR_<이름>  →  settings.TRANSCRIPT_OCR[<이름>]  →  DEFAULTS
+import os
+from contextlib import contextmanager
+
+from django.conf import settings
+
+DEFAULTS = {
+    # 행별 학수번호 핀포인트 OCR 을 검출/각도분류 없이 인식기 한 번(batch)으로 처리
+    "PINPOINT_BATCH": True,
+    # 페이지당 텍스트 검출을 한 번만 수행하고, 헤더 아래 박스만 전처리 crop 으로 재인식
+    "SINGLE_DETECTION": True,
+    # 페이지 이미지 해시 기반 파싱 결과 캐시 (transcripts/ocr_cache.py)
+    "CACHE_ENABLED": True,
+    # perceptual 후보로 볼 최대 dHash 거리 (1024bit 중)
+    "CACHE_PHASH_DISTANCE": 64,
+    # 후보를 같은 페이지로 인정할 썸네일 블록 최대 밝기 차이 (0~255)
+    "CACHE_THUMB_MAX_DIFF": 24,
+    # 헤더로 열 경계를 잡아 1차(원본) 인식만으로 코드·성적이 확정되는 행은 전처리 재인식을 생략 (단일 검출 모드)
+    "TABLE_FIRST_PASS": True,
+    # 학습된 양식 템플릿(LayoutTemplate)으로 헤더 줄만 인식해 구조를 확인 (transcripts/layouts.py)
+    "LAYOUT_TEMPLATES": True,
+    # 같은 양식으로 볼 최대 레이아웃 지문 거리 (64bit 중)
+    "LAYOUT_MAX_DISTANCE": 10,
+    # 빠른(fast) 프로필로 페이지 전체를 읽고, 점수가 낮거나 코드/성적이 파싱되지 않는 행만 정밀(accurate) 프로필로 재인식
+    "CASCADE": False,
+    # 행 안의 토큰 점수가 이 값 미만이면 재인식 대상 (캐스케이드, TABLE_FIRST_PASS 공통)
+    "CASCADE_SCORE_THRESHOLD": 0.8,
+    # 엔진 프로필별 PaddleOCR 추가 인자 (settings.TRANSCRIPT_OCR 로만 변경 가능)
+    "ENGINE_PROFILES": {
+        "accurate": {},
+        "fast": {"ocr_version": "PP-OCRv3", "det_limit_side_len": 736},
+    },
+    # 1차 인식에서 잰 토큰 높이(중앙값)로 확대 배율을 정한다. False 면 기존 고정 배율(내용 2배, 핀포인트 4배)
+    "ADAPTIVE_SCALE": True,
+    # 확대 후 목표 텍스트 박스 높이(px): 내용 인식 / 학수번호 핀포인트
+    "TARGET_TEXT_HEIGHT": 40,
+    "PINPOINT_TEXT_HEIGHT": 80,
+    # 확대 배율 상한 (이미 충분히 큰 고해상도 업로드는 1 = 확대하지 않음)
+    "MAX_SCALE": 4.0,
+    # 2차(내용) 인식 crop 선명화 여부와 ADAPTIVE_SCALE 을 끈 경우의 고정 확대 배율
+    "CONTENT_SHARPEN": True,
+    "CONTENT_SCALE": 2.0,
+    # 인식 결과를 버리는 최소 점수 (MyPaddleOCR 에서 거름)
+    "MIN_SCORE": 0.15,
+    # PaddleOCR 인자: 내부 drop_score, DB 검출 박스 임계값, 박스 확장 비율 (ENGINE_PROFILES 가 우선)
+    "DROP_SCORE": 0.1,
+    "DET_DB_BOX_THRESH": 0.3,
+    "DET_DB_UNCLIP_RATIO": 1.6,
+    # 업로드 사전 점검 (transcripts/triage.py): 기준 미달 페이지는 OCR 큐에 넣지 않고 바로 거절
+    "TRIAGE_ENABLED": True,
+    "TRIAGE_MIN_WIDTH": 320,
+    "TRIAGE_MIN_HEIGHT": 160,
+    # 폭 1000px 기준 Laplacian 분산 (스크린샷 ≈ 1000 이상)
+    "TRIAGE_MIN_SHARPNESS": 100.0,
+    # 가로 투영으로 센 텍스트 줄 최소 개수 (학기 줄 + 헤더 + 과목 행 + 합계 줄)
+    "TRIAGE_MIN_TEXT_ROWS": 9,
+    # 텍스트 줄에 걸쳐 세로로 정렬된 최소 열 수 (학수번호/과목명/성적)
+    "TRIAGE_MIN_COLUMNS": 3,
+    # 페이지 방향을 한 번 추정해 돌아간 페이지만 회전 + 박스별 각도 분류 (정방향 페이지는 분류기 생략)
+    "ORIENTATION_CHECK": True,
+    # 방향 추정 시 각도 분류기에 넣을 박스 수
+    "ORIENTATION_SAMPLE_BOXES": 8,
+    # 세로로 긴 스크롤 캡처를 겹치는 가로 띠로 나눠 검출 (TILE_MIN_HEIGHT px 보다 높은 페이지)
+    "TILING": True,
+    "TILE_MIN_HEIGHT": 2400,
+    "TILE_HEIGHT": 1600,
+    # 띠끼리 겹치는 높이 (과목 행 2~3줄 이상이어야 경계에서 잘린 줄이 한쪽 띠에는 온전히 들어간다)
+    "TILE_OVERLAP": 160,
+    # PDF 스캔본 쪽을 OCR 용 이미지로 렌더링할 해상도. 텍스트 레이어 토큰 좌표도 같은 px 단위로 맞춘다
+    "PDF_RENDER_DPI": 200,
+    # 엑셀/CSV 업로드 합계가 이 크기(bytes) 이하면 큐에 넣지 않고 업로드 요청 안에서 바로 파싱한다 (0 이면 항상 워커)
+    "SPREADSHEET_SYNC_MAX_BYTES": 512 * 1024,
+    # 페이지 태스크가 예외로 끝났을 때 재시도 횟수/간격(초). 끝난 페이지는 체크포인트(TranscriptPage.status)로 건너뛴다
+    "PAGE_MAX_RETRIES": 2,
+    "PAGE_RETRY_DELAY": 10,
+    # 인식기 한 번에 넣는 crop 개수 (PaddleOCR 기본값 6)
+    "REC_BATCH_NUM": 16,
+
+    # --- OCR 엔진 구현 (transcripts/ocr_backends.py) ---
+    # OcrBackend 를 따르는 클래스의 import 경로. 부하 테스트는 "transcripts.ocr_backends.FakeOcrBackend"
+    "BACKEND": "transcripts.custom_paddle_ocr_script.MyPaddleOCR",
+    # FakeOcrBackend 가 재생할 코퍼스 (manifest.json 이 있는 디렉터리: ocr_benchmark_corpus / ocr_export_tokens)
+    "FAKE_CORPUS_DIR": "",
+    # 가짜 지연(ms): 검출 1회 / 인식 박스 1개, 지터(± 비율)
+    "FAKE_DET_MS": 300.0,
+    "FAKE_REC_MS": 8.0,
+    "FAKE_JITTER": 0.2,
+    # True 면 sleep 대신 CPU 를 점유해 실제 추론처럼 워커끼리 코어를 다투게 한다
+    "FAKE_CPU_BOUND": False,
+    # 공유 추론 서버 (transcripts/ocr_server.py, ocr_server 명령). 워커는 BACKEND 를
+    # "transcripts.ocr_server.RemoteOcrBackend" 로 두면 모델 없이 Unix 소켓 + 공유 메모리로 서버에 요청한다
+    "SERVER_SOCKET": "/tmp/transcripts-ocr.sock",
+    # 서버가 실제로 모델을 올릴 엔진 클래스
+    "SERVER_BACKEND": "transcripts.custom_paddle_ocr_script.MyPaddleOCR",
+    # 인식 요청을 모으는 최대 대기(ms)와 한 번에 넣는 최대 crop 수 (여러 워커의 요청을 합쳐 배치)
+    "SERVER_BATCH_WAIT_MS": 5.0,
+    "SERVER_MAX_BATCH": 64,
+    # 클라이언트가 응답을 기다리는 최대 시간(초)
+    "SERVER_TIMEOUT": 120.0,
+
+    # --- 워커 수명주기 (transcripts/worker.py) ---
+    # 워커 자식 프로세스가 뜰 때 엔진을 만들고 더미 추론으로 데워 둔다 (첫 성적표가 모델 로드 지연을 떠안지 않도록)
+    "WORKER_WARMUP": True,
+    # 워커 메인 프로세스가 /metrics 를 열 포트 (0 = 끔, prometheus_client 필요. transcripts/metrics.py)
+    "METRICS_PORT": 0,
+
+    # --- CPU 추론 설정 (ocr_selfcheck 명령으로 실제 적용 상태 확인) ---
+    # MKL-DNN(oneDNN) 커널 사용
+    "ENABLE_MKLDNN": True,
+    # 워커 프로세스당 추론 스레드 수. 0 이면 (사용 가능한 코어 수 / Celery 동시성) 으로 자동 결정
+    "CPU_THREADS": 0,
+    # prefork 자식 프로세스마다 서로 다른 코어 묶음에 고정 (스레드끼리 코어를 다투지 않도록)
+    "CPU_AFFINITY": False,
+    # ONNX Runtime 으로 추론 (아래 *_MODEL_DIR 에 디렉터리가 아니라 .onnx 파일 경로를 지정해야 한다)
+    "USE_ONNX": False,
+    # int8 양자화/ONNX 변환 모델 경로 (paddle 은 모델 디렉터리, USE_ONNX 면 .onnx 파일). 비워 두면 PaddleOCR 기본 모델
+    "DET_MODEL_DIR": "",
+    "REC_MODEL_DIR": "",
+    "CLS_MODEL_DIR": "",
+}
+
+
+def _coerce(raw: str, default):
+    """환경변수 문자열을 기본값의 타입에 맞게 변환"""
+    if isinstance(default, bool):
+        return raw.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(raw)
+    if isinstance(default, float):
+        return float(raw)
+    return raw
+
+
+# ocr_overrides() 로 잠시 바꾼 값 (프로세스 전체, 모든 스레드 공통)
+_overrides: dict = {}
+
+
+@contextmanager
+def ocr_overrides(**values):
+    """
+    블록 안에서만 설정을 바꾼다 (환경변수/settings 보다 우선). 파라미터 탐색(ocr_sweep) 같은 오프라인 도구용으로,
+    프로세스 전체(모든 스레드)에 적용되므로 워커 태스크 안에서는 쓰지 않는다.
+    """
+    unknown = set(values) - set(DEFAULTS)
+    if unknown:
+        raise KeyError(f"알 수 없는 OCR 설정: {', '.join(sorted(unknown))}")
+    previous = dict(_overrides)
+    _overrides.update(values)
+    try:
+        yield
+    finally:
+        _overrides.clear()
+        _overrides.update(previous)
+
+
+def ocr_setting(name: str):
+    default = DEFAULTS[name]
+    if name in _overrides:
+        return _overrides[name]
+    env = os.environ.get(f"TRANSCRIPT_OCR_{name}")
+    if env is not None:
+        return _coerce(env, default)
+    return getattr(settings, "TRANSCRIPT_OCR", {}).get(name, default)
@@ -0,0 +1,62 @@
+# transcripts/cpu.py
+# 워커 프로세스 CPU 예산 (코어 고정, 추론 스레드 수).
+# worker.py 가 paddle/cv2/numpy 를 import 하기 전에 스레드 환경변수를 맞춰야 하므로, 이 모듈은 그 라이브러리들을
+# 불러오는 모듈을 import 하지 않는다 (os 와 설정 조회용 conf → django.conf.settings 뿐).
+import os
+
+from .conf import ocr_setting
+
+_THREAD_ENV = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# 워커 메인 프로세스가 worker_init 에서 기록한 실제 동시성 (celery -c). prefork 자식은 fork 로 물려받는다
+_worker = {"concurrency": None}
+
+
+def _available_cpus() -> list[int]:
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:  # sched_getaffinity 가 없는 플랫폼
+        return list(range(os.cpu_count() or 1))
+
+
+def set_worker_concurrency(concurrency: int | None):
+    """worker_init 의 sender(WorkController).concurrency. 워커 밖(ocr_selfcheck 등)에서는 settings 값을 쓴다"""
+    _worker["concurrency"] = concurrency
+
+
+def _worker_concurrency() -> int:
+    if _worker["concurrency"]:
+        return int(_worker["concurrency"])
+    from django.conf import settings
+    return int(getattr(settings, "CELERY_WORKER_CONCURRENCY", None) or os.cpu_count() or 1)
+
+
+def cpu_threads() -> int:
+    """워커 프로세스당 추론 스레드 수 (CPU_THREADS=0 이면 자동)"""
+    n = ocr_setting("CPU_THREADS")
+    if n > 0:
+        return n
+    if ocr_setting("CPU_AFFINITY"):
+        # pin_worker_cpus() 로 이미 코어 묶음에 고정된 상태라면 그 코어 수만큼
+        return len(_available_cpus())
+    return max(1, (os.cpu_count() or 1) // _worker_concurrency())
+
+
+def pin_worker_cpus(index: int) -> list[int]:
+    """prefork 자식 index 번째 프로세스를 전체 코어 중 자기 몫의 코어 묶음에 고정"""
+    cpus = _available_cpus()
+    per = max(1, len(cpus) // _worker_concurrency())
+    start = (index * per) % len(cpus)
+    mine = cpus[start:start + per]
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, mine)
+    return mine
+
+
+def set_thread_env(threads: int):
+    """
+    OpenMP/MKL/OpenBLAS 스레드 수. 라이브러리가 처음 로드될 때 한 번만 읽으므로 paddle/cv2/numpy import 전에 불러야 한다.
+    운영자가 환경변수로 이미 지정한 값은 그대로 둔다.
+    """
+    for name in _THREAD_ENV:
+        os.environ.setdefault(name, str(threads))
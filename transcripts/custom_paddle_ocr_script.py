@@ -1,17 +1,21 @@
 # custom_paddle_ocr_script.py
 
-import re
-from collections import OrderedDict, defaultdict
-from paddleocr import PaddleOCR
+import os
+import threading
+import time
 import cv2
 import numpy as np
-import os
 
-# --- 상수 및 정규식 정의 ---
-FOOTERS = {"신청학점", "전체성적", "취득학점", "증명평점", "백점만점환산점수", "평점", "평균", "이수구분"}
-_TERM_ANY = re.compile(r'(?P<y>\d{4})\s*학년도.*?(?P<g>\d)\s*학년.*?(?P<s>\d)\s*학기')
-PLUS_CANDS = {"+", "＋", "﹢", "十", "†", "ᐩ", "t", "T"}
-ZERO_CANDS = {"0", "O", "〇", "○", "◯"}
+# 텍스트 해석 헬퍼는 paddle/cv2 없이 쓸 수 있도록 ocr_parsing 으로 분리되어 있다.
+from .conf import ocr_setting
+from .cpu import _available_cpus, cpu_threads, set_thread_env
+from .hashing import layout_fingerprint
+from .ocr_backends import OcrBackend
+from .profiling import stage
+from .ocr_parsing import (
+    _find_header, _match_header_key, table_top, find_columns, group_rows, rows_needing_pinpoint,
+    row_needs_escalation, pinpoint_rois, page_layout, layout_header_tokens, build_courses,
+)
 
 # --- Debug 스위치 & 통계 출력 헬퍼 ---
 DEBUG = True
@@ -48,23 +52,154 @@ def _preprocess_image_for_ocr(image_obj, sharpen=False, scale_factor=2):
     _, binary_image = cv2.threshold(resized, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
     return binary_image
 
+def _crop_quad(image_obj, quad):
+    """검출기가 돌려준 사각형(4점) 영역을 정면으로 펴서 잘라낸다 (PaddleOCR get_rotate_crop_image 와 동일한 방식)"""
+    pts = np.asarray(quad, dtype=np.float32)
+    width = int(max(np.linalg.norm(pts[0] - pts[1]), np.linalg.norm(pts[2] - pts[3])))
+    height = int(max(np.linalg.norm(pts[0] - pts[3]), np.linalg.norm(pts[1] - pts[2])))
+    if width <= 0 or height <= 0:
+        return None
+    dst = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+    M = cv2.getPerspectiveTransform(pts, dst)
+    crop = cv2.warpPerspective(image_obj, M, (width, height),
+                               borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC)
+    if height / width >= 1.5:
+        crop = np.rot90(crop)
+    return crop
+
+# --- CPU 추론 설정 ---
+# 코어 고정/스레드 수는 paddle import 전에 워커에서 정해야 하므로 cpu.py 에 있다.
+_MODEL_DIR_KEYS = {"det_model_dir": "DET_MODEL_DIR", "rec_model_dir": "REC_MODEL_DIR", "cls_model_dir": "CLS_MODEL_DIR"}
+# 엔진이 실제로 만든 예측기 (PaddleOCR 속성 이름)
+_PREDICTORS = {"det_model_dir": "text_detector", "rec_model_dir": "text_recognizer", "cls_model_dir": "text_classifier"}
+
+def inference_kwargs() -> dict:
+    """PaddleOCR 에 넘길 CPU 추론 인자 (conf 의 CPU 추론 설정에서 생성)"""
+    kwargs = {
+        "use_gpu": False,
+        "enable_mkldnn": ocr_setting("ENABLE_MKLDNN"),
+        "cpu_threads": cpu_threads(),
+        "use_onnx": ocr_setting("USE_ONNX"),
+    }
+    for arg, key in _MODEL_DIR_KEYS.items():
+        if ocr_setting(key):
+            kwargs[arg] = ocr_setting(key)
+    return kwargs
+
+def _quantized_model(path: str | None) -> bool | None:
+    """모델 파일의 연산자에 양자화 연산이 있는지 (.onnx 또는 paddle .pdmodel). 읽을 수 없으면 None"""
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        if path.endswith(".onnx"):
+            import onnx
+            ops = {node.op_type for node in onnx.load(path, load_external_data=False).graph.node}
+            return any("Quant" in op or op.endswith("Integer") or op.startswith("QLinear") for op in ops)
+        import paddle
+        proto = getattr(paddle, "base", None) or getattr(paddle, "fluid")
+        program = proto.proto.framework_pb2.ProgramDesc()
+        with open(path, "rb") as fh:
+            program.ParseFromString(fh.read())
+        return any("quantize" in op.type for block in program.blocks for op in block.ops)
+    except Exception:
+        return None
+
+def cpu_inference_report(engine: OcrBackend | None = None) -> dict:
+    """
+    워커 기동 시 자가 점검. requested 는 설정값이고, active 는 engine(실제로 만든 엔진)의
+    예측기에서 읽은 가속 경로다. engine 이 없거나 MyPaddleOCR 가 아니면 active 는 비어 있다.
+    """
+    kwargs = inference_kwargs()
+    report = {
+        "pid": os.getpid(),
+        "backend": ocr_setting("BACKEND"),
+        "cpus": _available_cpus(),
+        "cpu_threads": kwargs["cpu_threads"],
+        "omp_num_threads": os.environ.get("OMP_NUM_THREADS"),
+        "requested": {
+            "mkldnn": kwargs["enable_mkldnn"],
+            "onnx": kwargs["use_onnx"],
+            "models": {arg: kwargs.get(arg, "default") for arg in _MODEL_DIR_KEYS},
+        },
+        "engine": None,
+        "active": [],
+    }
+    try:
+        import paddle
+        core = getattr(paddle, "base", None) or getattr(paddle, "fluid")
+        report["paddle"] = paddle.__version__
+        report["mkldnn_compiled"] = bool(core.core.is_compiled_with_mkldnn())
+        report["avx512"] = bool(getattr(core.core, "supports_avx512_core", lambda: False)())
+    except Exception as e:
+        report["paddle"] = f"unavailable: {e}"
+        report["mkldnn_compiled"] = False
+    try:
+        import onnxruntime
+        report["onnxruntime"] = onnxruntime.__version__
+    except ImportError:
+        report["onnxruntime"] = None
+
+    info = engine.inference_info() if hasattr(engine, "inference_info") else None
+    if not info:
+        return report
+    report["engine"] = info
+    models = info["models"].values()
+    if info["onnx"]:
+        report["active"].append("onnxruntime")
+    elif any(m.get("mkldnn") for m in models):
+        report["active"].append("mkldnn")
+    for arg, model in info["models"].items():
+        if model.get("quantized"):
+            report["active"].append(f"int8:{arg.split('_')[0]}")
+    threads = {m["threads"] for m in models if m.get("threads")}
+    report["active"].append(f"threads={max(threads) if threads else kwargs['cpu_threads']}")
+    return report
+
 # --- OCR 엔진 클래스 ---
+# ocr_backends.OcrBackend 구현 (conf BACKEND 기본값)
 class MyPaddleOCR:
-    def __init__(self, lang: str="korean", min_score: float=0.15, **kwargs):
+    def __init__(self, lang: str="korean", min_score: float=0.15, profile: str="accurate", **kwargs):
         self.lang = lang
         self.min_score = float(min_score)
-        self._ocr = PaddleOCR(
-            lang=self.lang, use_angle_cls=True, table=True,
-            drop_score=0.1, det_db_box_thresh=0.3, det_db_unclip_ratio=1.6, **kwargs
-        )
+        self.profile = profile
+        # OpenMP/MKL 스레드 수는 paddle 이 처음 로드될 때 정해지므로 import 전에 맞춘다
+        if kwargs.get("cpu_threads"):
+            set_thread_env(kwargs["cpu_threads"])
+        # paddle 은 import 만으로도 수백 MB 를 차지하므로 엔진을 실제로 만들 때만 불러온다.
+        from paddleocr import PaddleOCR
+        # 각도 분류기는 모델만 올려 두고, 실제 분류는 회전된 것으로 판정된 페이지에서만 수행한다 (cls 인자)
+        params = {"drop_score": ocr_setting("DROP_SCORE"), "det_db_box_thresh": ocr_setting("DET_DB_BOX_THRESH"),
+                  "det_db_unclip_ratio": ocr_setting("DET_DB_UNCLIP_RATIO"),
+                  "rec_batch_num": ocr_setting("REC_BATCH_NUM"), **kwargs}
+        self._ocr = PaddleOCR(lang=self.lang, use_angle_cls=True, table=True, **params)
+
+    def inference_info(self) -> dict:
+        """만들어진 예측기 기준 추론 경로: ONNX 여부, 모델별 실제 로드한 파일·MKL-DNN·스레드 수·양자화 여부"""
+        args = getattr(self._ocr, "args", None)
+        info = {"onnx": bool(getattr(args, "use_onnx", False)), "models": {}}
+        for arg, attr in _PREDICTORS.items():
+            predictor = getattr(self._ocr, attr, None)
+            if predictor is None:
+                continue
+            # use_onnx 면 *_model_dir 가 .onnx 파일 경로이고, 아니면 예측기 config 가 읽은 .pdmodel 이다
+            config = getattr(predictor, "config", None)
+            model = {"file": config.prog_file() if config is not None else getattr(args, arg, None)}
+            if config is not None:
+                model["mkldnn"] = bool(config.mkldnn_enabled())
+                model["threads"] = int(config.cpu_math_library_num_threads())
+            model["quantized"] = _quantized_model(model["file"])
+            info["models"][arg] = model
+        return info
 
-    def run_ocr(self, image_input, preprocess_info=None) -> list[dict]:
+    def run_ocr(self, image_input, preprocess_info=None, cls: bool = False) -> list[dict]:
         if preprocess_info:
-            image_to_process = _preprocess_image_for_ocr(image_input, **preprocess_info)
+            with stage("preprocess"):
+                image_to_process = _preprocess_image_for_ocr(image_input, **preprocess_info)
         else:
             image_to_process = image_input
 
-        result = self._ocr.ocr(image_to_process, cls=True)
+        with stage("det_rec"):
+            result = self._ocr.ocr(image_to_process, cls=cls)
         ocr_result = result[0] if result and isinstance(result, list) else []
         
         items = []
@@ -95,135 +230,483 @@ class MyPaddleOCR:
                       f"bbox=({bbox[0]:.1f},{bbox[1]:.1f},{bbox[2]:.1f},{bbox[3]:.1f})")
         return items
 
-ocr = MyPaddleOCR(min_score=0.15)
-
-# --- 헬퍼 함수 ---
-def _find_code_in_tok(tok: str) -> str | None:
-    s = tok.strip().upper().replace('O','0').replace('I','1').replace('L','1').replace('G','6')
-    match = re.search(r'(\d{6})', s)
-    return match.group(1) if match else None
-
-def _extract_grade_from_tokens(tokens: list[str]) -> str | None:
-    if not tokens: return None
-    text = "".join(tokens).upper().replace(" ", "")
-    for char in PLUS_CANDS: text = text.replace(char, "+")
-    for char in ZERO_CANDS: text = text.replace(char, "0")
-    perfect_match = re.search(r"([ABCDF])([+0])", text)
-    if perfect_match: return perfect_match.group(0)
-    if "P" in text: return "P"
-    single_char_match = re.search(r"([ABCDF])", text)
-    if single_char_match: return single_char_match.group(1) + "+"
-    return None
-
-def _extract_retake_from_tokens(tokens: list[str]) -> bool:
-    s = "".join(tokens).replace(' ', '')
-    return '재수강' in s or 'Y' in s
-
-def _parse_semester(term_str: str) -> str:
-    if not term_str: return "기타"
-    m = re.search(r'(\d)\s*학년(?!도).*?(\d)\s*학기', term_str)
-    if m: return f"{m.group(1)}-{m.group(2)}"
-    return "기타"
-
-def _match_header_key(txt: str) -> str | None:
-    s = re.sub(r'\s+', '', txt)
-    if '학수' in s and ('번' in s or '번호' in s): return '학수번호'
-    return None
+    def detect(self, image_input) -> list[np.ndarray]:
+        """텍스트 검출만 수행하여 4점 박스 리스트를 반환"""
+        with stage("det"):
+            dt_boxes, _ = self._ocr.text_detector(image_input)
+        return [] if dt_boxes is None else list(dt_boxes)
+
+    def upside_down_ratio(self, image_input, boxes, sample: int = 8) -> float:
+        """가장 넓은 박스 sample 개를 각도 분류기에 넣어 180° 로 판정된 비율 (0~1)"""
+        widest = sorted(boxes, key=lambda b: -(np.ptp(np.asarray(b)[:, 0]) * np.ptp(np.asarray(b)[:, 1])))[:sample]
+        crops = [c for c in (_crop_quad(image_input, b) for b in widest) if c is not None]
+        if not crops:
+            return 0.0
+        with stage("cls"):
+            _, cls_res, _ = self._ocr.text_classifier(crops)
+        return sum(1 for label, score in cls_res if label == '180' and score >= 0.9) / len(crops)
+
+    def recognize(self, image_input, boxes, preprocess_info=None, cls: bool = False) -> list[dict | None]:
+        """
+        검출 없이 boxes 영역만 잘라 인식기에 한 번에(batch) 넣는다. cls=True 면 crop 마다 각도 분류 후 뒤집는다.
+        박스는 (x0, y0, x1, y1) 사각형 또는 detect() 가 돌려준 4점 박스 모두 가능하다.
+        반환 리스트는 boxes 와 같은 순서이며, 빈 영역이거나 min_score 미만이면 None.
+        """
+        with stage("preprocess"):
+            crops, valid = self.prepare_crops(image_input, boxes, preprocess_info)
+        if not crops:
+            return [None] * len(boxes)
+
+        with stage("rec"):
+            rec_res = self.recognize_crops(crops, cls)
+        return self.rec_items(len(boxes), valid, rec_res)
+
+    def recognize_crops(self, crops: list, cls: bool = False) -> list[tuple[str, float]]:
+        """준비된 crop 들을 인식기에 한 번에 넣는다 (추론 서버는 여러 요청의 crop 을 모아서 호출)"""
+        if cls:
+            crops, _, _ = self._ocr.text_classifier(crops)
+        rec_res, _ = self._ocr.text_recognizer(crops)
+        return rec_res
+
+    def rec_items(self, count: int, valid: list, rec_res: list) -> list[dict | None]:
+        """prepare_crops() 의 (박스 index, bbox) 와 인식 결과 → recognize() 반환 형식"""
+        items: list[dict | None] = [None] * count
+        for (idx, bbox), (txt, score) in zip(valid, rec_res):
+            if score is not None and score < self.min_score:
+                continue
+            items[idx] = {"txt": txt.strip(), "bbox": bbox,
+                          "cx": (bbox[0] + bbox[2]) / 2.0, "cy": (bbox[1] + bbox[3]) / 2.0,
+                          "h": bbox[3] - bbox[1], "score": float(score) if score is not None else 0.0}
+            if DEBUG:
+                print(f"[REC] '{items[idx]['txt']}' score={items[idx]['score']:.3f} bbox={bbox}")
+        return items
+
+    @staticmethod
+    def prepare_crops(image_input, boxes, preprocess_info=None) -> tuple[list, list]:
+        """recognize() 입력 crop 준비 (잘라내기 + 전처리). (crops, [(박스 index, bbox)])"""
+        h_img, w_img = image_input.shape[:2]
+        crops, valid = [], []
+        for idx, box in enumerate(boxes):
+            if np.ndim(box) == 1:
+                x0, y0, x1, y1 = box
+                x0, y0 = max(int(x0), 0), max(int(y0), 0)
+                x1, y1 = min(int(x1), w_img), min(int(y1), h_img)
+                if x1 <= x0 or y1 <= y0:
+                    continue
+                crop = image_input[y0:y1, x0:x1]
+                bbox = (x0, y0, x1, y1)
+            else:
+                crop = _crop_quad(image_input, box)
+                if crop is None:
+                    continue
+                xs = [float(p[0]) for p in box]; ys = [float(p[1]) for p in box]
+                bbox = (min(xs), min(ys), max(xs), max(ys))
+            if preprocess_info:
+                crop = _preprocess_image_for_ocr(crop, **preprocess_info)
+            if len(crop.shape) == 2:
+                crop = cv2.cvtColor(crop, cv2.COLOR_GRAY2BGR)
+            crops.append(crop)
+            valid.append((idx, bbox))
+        return crops, valid
+
+# --- 프로세스별 OCR 엔진 (지연 생성) ---
+# 모듈 import 시점에는 모델을 올리지 않는다. Celery 워커가 실제로 OCR 을 처음 호출할 때
+# 프로필마다 프로세스당 한 번만 생성하며, fork 된 자식 프로세스는 pid 가 달라지므로 자기 엔진을 새로 만든다.
+# 엔진은 (프로필, 엔진 파라미터) 별로 캐시한다. 파라미터 탐색(conf.ocr_overrides)으로 값이 바뀌면
+# 그 프로필의 이전 엔진은 버리고 새로 만든다 (운영 워커에서는 값이 바뀌지 않으므로 프로필당 하나).
+# 엔진 클래스는 conf BACKEND (기본 MyPaddleOCR, 부하 테스트용 ocr_backends.FakeOcrBackend 등)
+ENGINE_PARAMS = ("BACKEND", "MIN_SCORE", "DROP_SCORE", "DET_DB_BOX_THRESH", "DET_DB_UNCLIP_RATIO", "REC_BATCH_NUM")
+_engines: dict[tuple, OcrBackend] = {}
+_engine_pid = None
+_engine_lock = threading.Lock()
+
+def _engine_key(profile: str) -> tuple:
+    return (profile, *(ocr_setting(name) for name in ENGINE_PARAMS))
+
+def get_ocr(profile: str = "accurate") -> OcrBackend:
+    """profile: conf ENGINE_PROFILES 의 키 ("accurate" = 기본 설정, "fast" = 캐스케이드 1단계)"""
+    global _engine_pid
+    pid = os.getpid()
+    key = _engine_key(profile)
+    if _engine_pid != pid or key not in _engines:
+        with _engine_lock:
+            if _engine_pid != pid:
+                _engines.clear()
+                _engine_pid = pid
+            if key not in _engines:
+                for stale in [k for k in _engines if k[0] == profile]:
+                    del _engines[stale]
+                _engines[key] = _build_engine(profile)
+    return _engines[key]
+
+def _build_engine(profile: str, backend: str | None = None) -> OcrBackend:
+    """backend: 엔진 클래스 import 경로 (기본 conf BACKEND, 추론 서버는 SERVER_BACKEND)"""
+    from django.utils.module_loading import import_string
+
+    kwargs = {**inference_kwargs(), **ocr_setting("ENGINE_PROFILES")[profile]}
+    return import_string(backend or ocr_setting("BACKEND"))(min_score=ocr_setting("MIN_SCORE"), profile=profile,
+                                                            **kwargs)
+
+def warm_up() -> dict:
+    """
+    이 프로세스가 쓸 엔진을 만들고 더미 이미지로 검출/인식을 한 번씩 실행한다 (워커 시작 시, ocr_selfcheck).
+    paddle 은 첫 추론 때 메모리 할당/커널 선택을 하므로 엔진 생성만으로는 첫 페이지 지연이 남는다.
+    """
+    profiles = ["fast", "accurate"] if ocr_setting("CASCADE") and ocr_setting("SINGLE_DETECTION") else ["accurate"]
+    started = time.perf_counter()
+    engines = [get_ocr(profile) for profile in profiles]
+    loaded = time.perf_counter()
+    image = np.full((64, 256, 3), 255, dtype=np.uint8)
+    for engine in engines:
+        engine.detect(image)
+        engine.recognize(image, [(0, 0, 256, 64)])
+    return {"profiles": profiles, "engine_load_s": round(loaded - started, 3),
+            "dummy_inference_s": round(time.perf_counter() - loaded, 3)}
+
+def _escalate(items: list[dict], image, preprocess_info=None, cls: bool = False) -> int:
+    """items 를 정밀 프로필로 다시 인식해 점수가 더 높으면 제자리에서 교체. 교체된 토큰 수를 반환"""
+    redo = get_ocr("accurate").recognize(image, [it['bbox'] for it in items], preprocess_info=preprocess_info,
+                                         cls=cls)
+    replaced = 0
+    for old, new in zip(items, redo):
+        if new and new['score'] >= old['score']:
+            old.update(txt=new['txt'], score=new['score'])
+            replaced += 1
+    return replaced
+
+# --- 세로로 긴 페이지(스크롤 캡처) 타일링 ---
+# 검출기는 긴 변을 det_limit_side_len 으로 줄여서 보므로, 수천 px 높이의 캡처는 글자가 뭉개지고 메모리도 크게 쓴다.
+# TILE_MIN_HEIGHT 보다 높은 페이지는 겹치는 가로 띠로 나눠 프로세스 엔진 하나로 차례대로 처리하고,
+# 띠 경계에서 두 번 잡힌 박스/토큰은 bbox 겹침으로 하나만 남긴다 (잘린 쪽보다 큰 쪽).
+
+def _tile_bands(height: int) -> list[tuple[int, int]]:
+    """
+    TILE_OVERLAP 만큼 겹치는 [y0, y1) 띠 목록 (타일링을 끄거나 낮은 페이지는 페이지 전체 하나).
+    띠는 병렬이 아니라 차례대로 처리한다: 띠마다 엔진을 두면 모델 사본만큼 RSS 가 늘고, 한 띠의 추론이 이미
+    cpu_threads 개 코어를 쓰므로 띠 스레드를 더하면 워커의 cpu_threads 예산을 넘긴다.
+    """
+    if not ocr_setting("TILING") or height <= ocr_setting("TILE_MIN_HEIGHT"):
+        return [(0, height)]
+    tile_h, overlap = ocr_setting("TILE_HEIGHT"), ocr_setting("TILE_OVERLAP")
+    bands, y0 = [], 0
+    while True:
+        y1 = min(y0 + tile_h, height)
+        bands.append((y0, y1))
+        if y1 >= height:
+            return bands
+        y0 = y1 - overlap
+
+def _rect_overlap(a, b) -> float:
+    """두 사각형의 교집합 넓이 / 작은 쪽 넓이"""
+    w = min(a[2], b[2]) - max(a[0], b[0]); h = min(a[3], b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    smaller = min((a[2] - a[0]) * (a[3] - a[1]), (b[2] - b[0]) * (b[3] - b[1]))
+    return w * h / smaller if smaller > 0 else 0.0
+
+def _dedupe_by_bbox(entries: list[tuple[tuple, object]]) -> list:
+    """(rect, payload) 목록에서 절반 이상 겹치는 쌍은 넓은 쪽만 남긴다 (띠 경계에서 잘린 중복 제거)"""
+    kept: list[tuple[tuple, object]] = []
+    for rect, payload in sorted(entries, key=lambda e: e[0][1]):
+        area = (rect[2] - rect[0]) * (rect[3] - rect[1])
+        dup = None
+        for k in range(len(kept) - 1, -1, -1):
+            other = kept[k][0]
+            if other[3] < rect[1] - (rect[3] - rect[1]) * 4:
+                break   # y 순으로 쌓이므로 충분히 위쪽 박스부터는 겹칠 수 없다
+            if _rect_overlap(rect, other) > 0.5:
+                dup = k
+                break
+        if dup is None:
+            kept.append((rect, payload))
+        elif area > (kept[dup][0][2] - kept[dup][0][0]) * (kept[dup][0][3] - kept[dup][0][1]):
+            kept[dup] = (rect, payload)
+    return [payload for _, payload in kept]
+
+def _detect_page(ocr, image, stats: dict | None = None) -> list:
+    """
+    페이지 검출. 긴 페이지는 _tile_bands() 의 띠를 프로세스 엔진 하나로 순차 검출해 페이지 좌표로 합친다
+    (병렬로 나누지 않는 이유는 _tile_bands 참고: 모델 사본 RSS, cpu_threads 예산).
+    """
+    bands = _tile_bands(image.shape[0])
+    if len(bands) == 1:
+        return ocr.detect(image)
+    if stats is not None:
+        stats["tiles"] = len(bands)
+    with stage("det"):   # 띠 전체 검출을 한 구간으로 잰다
+        per_band = [ocr.detect(image[y0:y1]) for y0, y1 in bands]
+    entries = []
+    for (y0, _), boxes in zip(bands, per_band):
+        for box in boxes:
+            box = np.asarray(box, dtype=np.float32) + np.float32([0, y0])
+            entries.append((_box_rect(box), box))
+    return _dedupe_by_bbox(entries)
+
+def _run_ocr_page(ocr, image, preprocess_info=None, cls: bool = False) -> list[dict]:
+    """run_ocr 의 타일 버전 (단일 검출을 끈 기존 파이프라인용)"""
+    bands = _tile_bands(image.shape[0])
+    if len(bands) == 1:
+        return ocr.run_ocr(image, preprocess_info=preprocess_info, cls=cls)
+    with stage("det_rec"):
+        per_band = [ocr.run_ocr(image[y0:y1], preprocess_info=preprocess_info, cls=cls) for y0, y1 in bands]
+    entries = []
+    for (y0, _), items in zip(bands, per_band):
+        for it in items:
+            x0, y_0, x1, y_1 = it['bbox']
+            bbox = (x0, y_0 + y0, x1, y_1 + y0)
+            entries.append((bbox, {**it, "bbox": bbox, "cy": it['cy'] + y0}))
+    return _dedupe_by_bbox(entries)
 
 # --- 메인 파싱 로직 ---
-def ocr_single_table_term_code_grade_retake(image_path: str) -> list[dict]:
-    original_image = cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
+PINPOINT_PREPROCESS = {'sharpen': True, 'scale_factor': 4}
+
+def _median_text_height(items: list[dict]) -> float:
+    heights = [it['h'] for it in items if it.get('h', 0) > 0]
+    return float(np.median(heights)) if heights else 0.0
+
+def _adaptive_preprocess(median_h: float, target_h: float, fixed: dict) -> dict:
+    """1차 인식의 텍스트 높이 중앙값이 target_h 가 되도록 확대 배율을 정한다 (1 ~ MAX_SCALE)"""
+    if not ocr_setting("ADAPTIVE_SCALE") or median_h <= 0:
+        return fixed
+    scale = min(max(target_h / median_h, 1.0), ocr_setting("MAX_SCALE"))
+    return {**fixed, 'scale_factor': round(scale, 2)}
+
+def _box_rect(box) -> tuple[float, float, float, float]:
+    pts = np.asarray(box)
+    return float(pts[:, 0].min()), float(pts[:, 1].min()), float(pts[:, 0].max()), float(pts[:, 1].max())
+
+def _code_head(layout: dict) -> dict | None:
+    return next((h for h in layout["heads"] if _match_header_key(h["txt"]) == '학수번호'), None)
+
+def _template_header_band(boxes, layout: dict, width: int) -> list[int]:
+    """
+    템플릿의 학수번호 헤더와 위치·크기가 비슷한 박스 중 가장 위의 것을 헤더 후보로 보고,
+    그 줄과 그 위쪽(학기 문자열) 박스의 인덱스를 반환한다. 후보가 없으면 빈 리스트.
+    """
+    head = _code_head(layout)
+    if not head: return []
+    hx0, hx1, hh = head["x0"] * width, head["x1"] * width, layout["header_h"] * width
+    hw = hx1 - hx0
+    cands = []
+    for i, box in enumerate(boxes):
+        x0, y0, x1, y1 = _box_rect(box)
+        if (abs((x0 + x1) / 2 - (hx0 + hx1) / 2) <= hw / 2 and abs((x1 - x0) - hw) <= hw / 2
+                and abs((y1 - y0) - hh) <= hh / 2):
+            cands.append((y0, y1))
+    if not cands: return []
+    bottom = min(cands)[1]
+    return [i for i, box in enumerate(boxes) if _box_rect(box)[1] <= bottom]
+
+def _recognize_into(ocr, image, boxes, raw_by_box: dict, indices: list[int], cls: bool = False):
+    """boxes[indices] 를 원본 crop 으로 인식해 raw_by_box[index] 에 채운다 (인식 실패는 None)"""
+    if not indices: return
+    for i, it in zip(indices, ocr.recognize(image, [boxes[i] for i in indices], cls=cls)):
+        raw_by_box[i] = it
+
+def _rect_quad(rect) -> np.ndarray:
+    """(x0, y0, x1, y1) → detect() 와 같은 4점 박스"""
+    x0, y0, x1, y1 = rect
+    return np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float32)
+
+def _orient_page(ocr, image, boxes, stats: dict | None = None,
+                 redetect: bool = True) -> tuple[np.ndarray, list | None, str | None]:
+    """
+    페이지 방향을 한 번만 추정해 정방향으로 돌린다 → (image, boxes, 회전 이름 | None).
+    EXIF 회전은 cv2.imdecode 가 이미 적용하므로, 여기서는 스크린샷/스캔 자체가 돌아간 경우를 본다.
+      - 글줄 박스가 대부분 세로로 길면 90° 회전된 페이지
+      - 넓은 박스 몇 개를 각도 분류기에 넣어 과반이 180° 면 뒤집힌 페이지
+    boxes 는 이미 수행한 검출(또는 1차 스캔)의 박스를 넘긴다. 회전한 경우 redetect=False 면 boxes 는 None.
+    """
+    if not boxes:
+        return image, boxes, None
+    rects = [_box_rect(b) for b in boxes]
+    tall = sum(1 for x0, y0, x1, y1 in rects if y1 - y0 > 1.5 * (x1 - x0))
+    wide = sum(1 for x0, y0, x1, y1 in rects if x1 - x0 > 1.5 * (y1 - y0))
+    upside = ocr.upside_down_ratio(image, boxes, ocr_setting("ORIENTATION_SAMPLE_BOXES")) > 0.5
+    if tall > wide:
+        # 세로 글줄 crop 은 반시계로 눕혀 분류되므로, 뒤집힘이면 원래 반시계 90° 회전된 페이지
+        code, name = (cv2.ROTATE_90_CLOCKWISE, "90cw") if upside else (cv2.ROTATE_90_COUNTERCLOCKWISE, "90ccw")
+    elif upside:
+        code, name = cv2.ROTATE_180, "180"
+    else:
+        return image, boxes, None
+    image = cv2.rotate(image, code)
+    return image, _detect_page(ocr, image, stats) if redetect else None, name
+
+def ocr_page_tokens(image_path: str, code_index=None, stats: dict | None = None,
+                    layouts=None) -> dict[str, list[dict]]:
+    """
+    페이지 이미지를 OCR 하여 토큰 스트림 {"raw", "content", "pinpoint"} 을 반환한다.
+    과목 행 해석은 ocr_parsing.build_courses() 가 담당하므로, 토큰만 저장해 두면 OCR 없이 다시 파싱할 수 있다.
+    code_index(학수번호 색인)가 주어지면 행 텍스트만으로 코드가 확정되는 행은 핀포인트 OCR 을 생략한다.
+    layouts(layouts.LayoutStore)가 주어지면 양식이 맞는 페이지는 헤더 줄까지만 원본 인식하고,
+    헤더를 새로 찾은 페이지의 양식은 학습한다.
+    stats 를 넘기면 페이지 처리 통계(캐스케이드 재인식 행 수 등)를 채워 준다.
+    """
+    with stage("decode"):
+        original_image = cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
     if original_image is None:
         raise FileNotFoundError(f"이미지를 열 수 없습니다: {image_path}")
-    
-    # 1. 1차 스캔 (원본): 구조(학기, 헤더 위치) 파악
-    original_items = ocr.run_ocr(original_image, preprocess_info=None)
+    stats = {} if stats is None else stats
+    # 캐스케이드는 검출 박스를 재사용해야 하므로 단일 검출 모드에서만 동작한다
+    cascade = ocr_setting("CASCADE") and ocr_setting("SINGLE_DETECTION")
+    ocr = get_ocr("fast" if cascade else "accurate")
+    tokens = {"raw": [], "content": [], "pinpoint": []}
+    fingerprint = template = rotation = first_scan = None
+    verified = False
+
+    if ocr_setting("SINGLE_DETECTION"):
+        # 텍스트 검출은 원본에서 한 번만 수행하고, 박스를 두 번의 인식에 재사용한다.
+        # (세로로 긴 페이지는 띠로 나눠 엔진 하나로 차례대로 검출)
+        boxes = _detect_page(ocr, original_image, stats)
+        if ocr_setting("ORIENTATION_CHECK"):
+            # 0. 페이지 방향: 돌아간 페이지만 한 번 회전하고 다시 검출
+            original_image, boxes, rotation = _orient_page(ocr, original_image, boxes, stats)
+    elif ocr_setting("ORIENTATION_CHECK"):
+        # 기존 파이프라인: 1차 스캔의 박스로 방향을 추정하고 (방향만 보려고 검출을 한 번 더 하지 않는다),
+        # 돌아간 페이지만 회전 후 1차 스캔을 다시 한다
+        first_scan = _run_ocr_page(ocr, original_image)
+        original_image, _, rotation = _orient_page(ocr, original_image, [_rect_quad(it['bbox']) for it in first_scan],
+                                                   stats, redetect=False)
+        if rotation:
+            first_scan = None
+    # 박스별 각도 분류는 회전된 것으로 판정된 페이지에서만 수행
+    page_cls = rotation is not None
+    if rotation:
+        stats["rotation"] = rotation
+    width = original_image.shape[1]
+
+    if ocr_setting("SINGLE_DETECTION"):
+        raw_by_box: dict[int, dict | None] = {}   # 원본 crop 으로 인식한 박스 index → 토큰
+
+        if layouts is not None and ocr_setting("LAYOUT_TEMPLATES"):
+            fingerprint = layout_fingerprint(original_image)
+            template = layouts.match(fingerprint)
+        if template:
+            # 1. (양식 일치) 헤더 줄과 그 위만 인식해, 템플릿 위치에 학수번호 헤더가 있는지 확인
+            _recognize_into(ocr, original_image, boxes, raw_by_box,
+                            _template_header_band(boxes, template[1], width), page_cls)
+            header = _find_header([it for it in raw_by_box.values() if it])
+            head = _code_head(template[1])
+            verified = bool(header and head and abs(header['cx'] / width - (head["x0"] + head["x1"]) / 2)
+                            <= (head["x1"] - head["x0"]) / 2)
+        if not verified:
+            # 1. 1차 인식 (원본 crop): 구조(학기, 헤더 위치) 파악
+            _recognize_into(ocr, original_image, boxes, raw_by_box,
+                            [i for i in range(len(boxes)) if i not in raw_by_box], page_cls)
+        original_items = [raw_by_box[i] for i in sorted(raw_by_box) if raw_by_box[i]]
+    else:
+        # 1. 1차 스캔 (원본): 구조(학기, 헤더 위치) 파악
+        original_items = first_scan if first_scan is not None else _run_ocr_page(ocr, original_image,
+                                                                                 preprocess_info=None, cls=page_cls)
+    header = _find_header(original_items)
+    if cascade and original_items and not header:
+        # 빠른 프로필로 헤더를 찾지 못하면 구조 파악용 원본 인식 전체를 정밀 프로필로 다시 수행
+        raw_by_box = dict(enumerate(get_ocr("accurate").recognize(original_image, boxes, cls=page_cls)))
+        original_items = [it for it in raw_by_box.values() if it]
+        header = _find_header(original_items)
+    learn = bool(header and fingerprint and not verified)
+    if verified:
+        layouts.hit(template[0])
+        stats["layout"] = "template"
+    elif template and not header and original_items:
+        # 헤더 줄이 없는 페이지(표가 이어지는 다음 장): 템플릿의 열 배치를 그대로 쓴다
+        original_items = layout_header_tokens(template[1], width) + original_items
+        header = _find_header(original_items)
+        stats["layout"] = "template_headerless"
     if DEBUG:
         _print_score_stats(original_items, "original/raw")
-    if not original_items: return []
+    tokens["raw"] = original_items
+    if not original_items: return tokens
 
-    full_text = " ".join(it['txt'] for it in original_items)
-    term_match = _TERM_ANY.search(full_text)
-    current_semester = _parse_semester(term_match.group(0)) if term_match else "기타"
+    top = table_top(header)
+    columns = find_columns(original_items, header)
+    threshold = ocr_setting("CASCADE_SCORE_THRESHOLD")
 
-    header = next((it for it in original_items if _match_header_key(it["txt"])), None)
-    header_y = header['cy'] if header else 0
+    # 1-1. 확대 배율: 이미 글자가 충분히 큰 고해상도 페이지는 확대하지 않는다
+    median_h = _median_text_height([it for it in original_items if it['cy'] >= 0])
+    content_fixed = {'sharpen': ocr_setting("CONTENT_SHARPEN"), 'scale_factor': ocr_setting("CONTENT_SCALE")}
+    content_preprocess = _adaptive_preprocess(median_h, ocr_setting("TARGET_TEXT_HEIGHT"), content_fixed)
+    pinpoint_preprocess = _adaptive_preprocess(median_h, ocr_setting("PINPOINT_TEXT_HEIGHT"), PINPOINT_PREPROCESS)
+    stats["median_text_h"] = round(median_h, 1)
+    stats["content_scale"] = content_preprocess['scale_factor']
+    stats["pinpoint_scale"] = pinpoint_preprocess['scale_factor']
 
-    # 2. 2차 스캔 (전처리): 내용(과목 전체) 파악
-    processed_items = ocr.run_ocr(original_image, preprocess_info={'sharpen': True, 'scale_factor': 2})
+    if ocr_setting("SINGLE_DETECTION"):
+        content_idx = [i for i, b in enumerate(boxes) if float(np.mean(np.asarray(b)[:, 1])) > top]
+        settled: set[int] = set()
+        if ocr_setting("TABLE_FIRST_PASS"):
+            # 2-0. 열 단위로 읽어 1차 인식만으로 코드·성적이 확정되는 행은 재인식하지 않는다
+            _recognize_into(ocr, original_image, boxes, raw_by_box, [i for i in content_idx if i not in raw_by_box],
+                            page_cls)
+            first_rows = group_rows([raw_by_box[i] for i in content_idx if raw_by_box[i]], header)
+            done_rows = [r for r in first_rows if not row_needs_escalation(r, threshold, code_index, columns)]
+            settled = {id(it) for r in done_rows for it in r}
+            stats["rows_first_pass"] = len(done_rows)
+        # 2. 2차 인식 (전처리 crop): 확정되지 않은 헤더 아래 박스만 선명화/확대 후 다시 인식
+        redo_idx = [i for i in content_idx if id(raw_by_box.get(i)) not in settled]
+        processed_items = [dict(raw_by_box[i]) for i in content_idx if id(raw_by_box.get(i)) in settled]
+        if redo_idx:
+            processed_items += [it for it in ocr.recognize(original_image, [boxes[i] for i in redo_idx],
+                                                           preprocess_info=content_preprocess, cls=page_cls) if it]
+    else:
+        # 2. 2차 스캔 (전처리): 내용(과목 전체) 파악
+        processed_items = _run_ocr_page(ocr, original_image, preprocess_info=content_preprocess, cls=page_cls)
     if DEBUG:
-        _print_score_stats(processed_items, "processed/sharpen+scale2")
+        _print_score_stats(processed_items, f"processed/sharpen+scale{content_preprocess['scale_factor']}")
+    tokens["content"] = processed_items
 
     # 3. 행(Row)으로 그룹화
-    data_items = [it for it in processed_items if it['cy'] > header_y]
-    rows = defaultdict(list)
-    for item in data_items:
-        rows[round(item['cy'] / 10)].append(item)
-    
-    courses = []
-    # 4. 각 행을 분석하여 최종 데이터 추출
-    for row_items in rows.values():
-        row_items.sort(key=lambda x: x['cx'])
-        
-        code = None
-        if header:
-            col_x_code = header['cx']
-            avg_y = sum(it['cy'] for it in row_items) / len(row_items)
-            
-            y_start, y_end = int(avg_y - 12), int(avg_y + 12)
-            x_start, x_end = int(col_x_code - 40), int(col_x_code + 40)
-            code_roi = original_image[y_start:y_end, x_start:x_end]
-            
-            if code_roi.size > 0:
-                # 핀포인트 OCR
-                pinpoint_items = ocr.run_ocr(code_roi, preprocess_info={'sharpen': True, 'scale_factor': 4})
-                if DEBUG:
-                    _print_score_stats(pinpoint_items, f"pinpoint/code y≈{avg_y:.1f}")
-                if pinpoint_items:
-                    code = _find_code_in_tok("".join(it['txt'] for it in pinpoint_items))
-
-        # 핀포인트 실패 시, 기존 방식으로 다시 탐색
-        if not code:
-            code = _find_code_in_tok(" ".join(it['txt'] for it in row_items))
-
-        if not code: 
-            continue
-
-        grade = _extract_grade_from_tokens([it['txt'] for it in row_items])
-        retake = _extract_retake_from_tokens([it['txt'] for it in row_items])
-        
-        courses.append({
-            "code": code,
-            "grade": grade or "",
-            "retake": retake,
-            "semester": current_semester,
-        })
-        
-    return courses
-
-# --- 최종 출력 포맷터 ---
-def rows_to_text(courses: list[dict], group_by_term: bool = True) -> str:
-    if not courses: return "파싱된 데이터가 없습니다."
-    if not group_by_term:
-        lines = []
-        for c in courses:
-            parts = [c.get('semester',''), c.get('code',''), c.get('grade',''), '재수강' if c.get('retake') else '']
-            lines.append(" ".join(filter(None, parts)).strip())
-        return "\n".join(lines)
-    grouped = defaultdict(list)
-    for c in courses:
-        grouped[c.get('semester', '기타')].append(c)
-    def semester_sort_key(sem):
-        try:
-            year, term = map(int, str(sem).split('-'))
-            return (year, term)
-        except (ValueError, IndexError): return (99, 9)
-    sorted_semesters = sorted(grouped.keys(), key=semester_sort_key)
-    blocks = []
-    for semester in sorted_semesters:
-        lines = [f"--- {semester} 학기 ---"]
-        for c in grouped[semester]:
-            parts = [c.get('code',''), c.get('grade',''), '재수강' if c.get('retake') else '']
-            lines.append(" ".join(filter(None, parts)).strip())
-        blocks.append("\n".join(lines))
-    return "\n\n".join(blocks)
+    row_list = group_rows(processed_items, header)
+    stats["rows_total"] = len(row_list)
+    if learn and row_list:
+        # 헤더를 새로 찾은 페이지의 양식을 학습 → 이후 같은 양식 페이지는 헤더 줄만 인식
+        layouts.learn(fingerprint, page_layout(original_items, header, row_list, width))
+        stats["layout"] = "learned"
+    if cascade:
+        # 3-1. 캐스케이드: 점수가 낮거나 코드/성적이 파싱되지 않는 행만 정밀 프로필로 재인식
+        weak_rows = [r for r in row_list if row_needs_escalation(r, threshold, code_index, columns)]
+        if weak_rows:
+            with stage("escalate"):
+                _escalate([it for r in weak_rows for it in r], original_image, content_preprocess, page_cls)
+        stats["rows_escalated"] = len(weak_rows)
+        if DEBUG:
+            print(f"[cascade] rows={len(row_list)} escalated={len(weak_rows)}")
+        ocr = get_ocr("accurate")
+
+    # 4. 학수번호 열 핀포인트 OCR (색인으로 확정되지 않은 행만, 캐스케이드 시 정밀 프로필)
+    rois = pinpoint_rois(rows_needing_pinpoint(row_list, code_index, columns), header)
+    if DEBUG and code_index:
+        print(f"[pinpoint] rows={len(row_list)} snapped={len(row_list) - len(rois)} pinpoint={len(rois)}")
+    if not rois: return tokens
+    stats["pinpoint_rois"] = len(rois)
+
+    if ocr_setting("PINPOINT_BATCH"):
+        # 모든 행의 ROI 를 모아 인식기에 한 번에 전달 (검출/각도분류 생략)
+        with stage("pinpoint", calls=len(rois)):
+            pinpoint_items = [it for it in ocr.recognize(original_image, rois, preprocess_info=pinpoint_preprocess,
+                                                          cls=page_cls) if it]
+        if DEBUG:
+            _print_score_stats(pinpoint_items, f"pinpoint/batch rows={len(rois)}")
+    else:
+        pinpoint_items = []
+        for (x0, y0, x1, y1) in rois:
+            x0, y0 = max(int(x0), 0), max(int(y0), 0)
+            code_roi = original_image[y0:int(y1), x0:int(x1)]
+            if code_roi.size == 0:
+                continue
+            with stage("pinpoint"):
+                items = ocr.run_ocr(code_roi, preprocess_info=pinpoint_preprocess, cls=page_cls)
+            if DEBUG:
+                _print_score_stats(items, f"pinpoint/code y≈{(y0 + y1) / 2:.1f}")
+            if items:
+                # ROI 안의 토큰을 하나로 합쳐 원본 좌표계의 ROI 토큰으로 기록
+                x1 = x0 + code_roi.shape[1]; y1 = y0 + code_roi.shape[0]
+                pinpoint_items.append({"txt": "".join(it['txt'] for it in items), "bbox": (x0, y0, x1, y1),
+                                       "cx": (x0 + x1) / 2.0, "cy": (y0 + y1) / 2.0, "h": y1 - y0,
+                                       "score": min(it['score'] for it in items)})
+    tokens["pinpoint"] = pinpoint_items
+    return tokens
+
+def ocr_single_table_term_code_grade_retake(image_path: str, code_index=None) -> list[dict]:
+    return build_courses(ocr_page_tokens(image_path, code_index), code_index)
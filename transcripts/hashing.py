@@ -0,0 +1,74 @@
+# transcripts/hashing.py
+# 페이지 이미지 해시
+#  - content_hash: 업로드 시점의 내용 해시(sha256). 완전히 같은 파일 판별용
+#  - perceptual_signature: 재압축된 동일 스크린샷 판별용 (dHash + 블록 평균 썸네일)
+import hashlib
+import zlib
+
+# dHash 격자 크기 (32x32 → 1024bit)
+PHASH_SIZE = 32
+# 썸네일 블록 크기(px). 성적 한 글자만 달라도 블록 평균이 크게 바뀌도록 글자보다 작게 잡는다.
+THUMB_BLOCK = 4
+
+
+def content_hash(file_obj) -> str:
+    """업로드 파일/FieldFile 의 sha256 hex"""
+    h = hashlib.sha256()
+    for chunk in file_obj.chunks():
+        h.update(chunk)
+    file_obj.seek(0)
+    return h.hexdigest()
+
+
+def perceptual_signature(image_path: str) -> tuple[str, bytes, int, int] | None:
+    """
+    (dHash hex, zlib 압축된 블록 평균 썸네일, width, height). 디코딩할 수 없으면 None.
+    dHash 는 후보를 빠르게 추리는 용도이고, 성적표는 레이아웃이 같아 글자 몇 개만 다른 페이지도
+    dHash 가 거의 같으므로 최종 판정은 썸네일 비교(thumbnail_diff)로 한다. (cv2 는 워커에서만 불러온다)
+    """
+    import cv2
+    import numpy as np
+
+    gray = cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return None
+    height, width = gray.shape
+    small = cv2.resize(gray, (PHASH_SIZE + 1, PHASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    thumb = cv2.resize(gray, (max(width // THUMB_BLOCK, 1), max(height // THUMB_BLOCK, 1)),
+                       interpolation=cv2.INTER_AREA)
+    return np.packbits(bits).tobytes().hex(), zlib.compress(thumb.tobytes()), width, height
+
+
+def hamming_distance(a_hex: str, b_hex: str) -> int:
+    return bin(int(a_hex, 16) ^ int(b_hex, 16)).count("1")
+
+
+def thumbnail_diff(a: bytes, b: bytes) -> int:
+    """같은 해상도 썸네일 두 개의 블록별 최대 밝기 차이 (JPEG 재압축 ≈ 10 이하, 글자 변경 ≈ 40 이상)"""
+    import numpy as np
+
+    x = np.frombuffer(zlib.decompress(bytes(a)), dtype=np.uint8).astype(np.int16)
+    y = np.frombuffer(zlib.decompress(bytes(b)), dtype=np.uint8).astype(np.int16)
+    if x.shape != y.shape:
+        return 255
+    return int(np.abs(x - y).max()) if x.size else 0
+
+
+# 레이아웃 지문의 열(칸) 수 → 64bit
+LAYOUT_BINS = 64
+
+
+def layout_fingerprint(image) -> str:
+    """
+    양식(열 배치) 지문: 페이지 폭을 LAYOUT_BINS 칸으로 나눠 칸별 잉크 양이 중앙값보다 많으면 1 (hex).
+    과목/성적 내용이 달라도 같은 양식이면 거의 같은 값이 나온다. image 는 cv2 로 디코딩한 배열.
+    """
+    import cv2
+    import numpy as np
+
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    _, ink = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    profile = cv2.resize(ink.sum(axis=0, keepdims=True).astype(np.float32), (LAYOUT_BINS, 1),
+                         interpolation=cv2.INTER_AREA)[0]
+    return np.packbits(profile > np.median(profile)).tobytes().hex()
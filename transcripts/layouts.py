@@ -0,0 +1,61 @@
+# transcripts/layouts.py
+# 성적표 양식(레이아웃) 템플릿 저장소.
+# 학교 성적표 양식은 몇 종류뿐이므로, 헤더를 찾은 페이지에서 열 위치/헤더 높이/행 간격을 학습해 두고
+# 이후 페이지·업로드에서는 지문(hashing.layout_fingerprint)이 맞으면 헤더 줄만 인식해 구조를 확인한다.
+# OCR 모듈(custom_paddle_ocr_script)은 DB 를 모르므로 이 저장소 객체를 인자로 받아 사용한다.
+# layout dict 생성/복원은 ocr_parsing.page_layout / layout_header_tokens 참고.
+import threading
+import time
+
+from django.db.models import F
+
+from .conf import ocr_setting
+from .hashing import hamming_distance
+from .models import LayoutTemplate
+
+
+class LayoutStore:
+    def __init__(self, templates):
+        self._templates = [(t.id, t.fingerprint, t.layout) for t in templates]
+        self.size = len(self._templates)
+
+    def match(self, fingerprint: str) -> tuple[int, dict] | None:
+        """지문이 LAYOUT_MAX_DISTANCE 이내인 가장 가까운 템플릿 (id, layout)"""
+        max_distance = ocr_setting("LAYOUT_MAX_DISTANCE")
+        best = None
+        for template_id, fp, layout in self._templates:
+            d = hamming_distance(fp, fingerprint)
+            if d <= max_distance and (best is None or d < best[0]):
+                best = (d, template_id, layout)
+        return (best[1], best[2]) if best else None
+
+    def hit(self, template_id: int):
+        LayoutTemplate.objects.filter(pk=template_id).update(hit_count=F("hit_count") + 1)
+
+    def learn(self, fingerprint: str, layout: dict):
+        """새 양식 등록. 같은 지문의 템플릿이 이미 있으면 최신 페이지 기준으로 갱신"""
+        updated = LayoutTemplate.objects.filter(fingerprint=fingerprint).update(
+            layout=layout, sample_count=F("sample_count") + 1)
+        if not updated:
+            LayoutTemplate.objects.create(fingerprint=fingerprint, layout=layout)
+        invalidate_layout_store()
+
+
+# --- 프로세스별 템플릿 캐시 (양식은 몇 개뿐이므로 전부 메모리에 올려 둔다) ---
+STORE_TTL_SECONDS = 300
+_store = None
+_store_built_at = 0.0
+_store_lock = threading.Lock()
+
+def get_layout_store() -> LayoutStore:
+    global _store, _store_built_at
+    if _store is None or time.monotonic() - _store_built_at > STORE_TTL_SECONDS:
+        with _store_lock:
+            if _store is None or time.monotonic() - _store_built_at > STORE_TTL_SECONDS:
+                _store = LayoutStore(LayoutTemplate.objects.only("id", "fingerprint", "layout"))
+                _store_built_at = time.monotonic()
+    return _store
+
+def invalidate_layout_store():
+    global _store
+    _store = None
@@ -0,0 +1,109 @@
+# transcripts/management/commands/ocr_benchmark.py
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transcripts.benchmark import accuracy, load_manifest, peak_rss_mb, run_pages
+from transcripts.code_index import CodeIndex
+from transcripts.profiling import percentile
+
+
+def _latency(values: list[float]) -> dict:
+    return {"p50": percentile(values, 50), "p95": percentile(values, 95)}
+
+
+class Command(BaseCommand):
+    help = ("합성 성적표 코퍼스(ocr_benchmark_corpus)로 OCR 파이프라인의 처리량/단계별 지연/최대 RSS/정확도를 잰다. "
+            "--baseline 을 주면 이전 결과 대비 속도·정확도 저하를 검사한다")
+
+    def add_arguments(self, parser):
+        parser.add_argument("corpus_dir", help="manifest.json 이 있는 디렉터리")
+        parser.add_argument("--limit", type=int, help="앞에서부터 N 페이지만")
+        parser.add_argument("--repeat", type=int, default=1, help="코퍼스 반복 횟수")
+        parser.add_argument("--no-warmup", action="store_true", help="엔진 로드용 첫 페이지 실행을 생략")
+        parser.add_argument("--no-code-index", action="store_true",
+                            help="학수번호 색인 없이 실행 (기본: manifest 의 코드 집합으로 색인 구성)")
+        parser.add_argument("--verbose", action="store_true", help="OCR 모듈의 DEBUG 출력 유지")
+        parser.add_argument("--json", dest="json_out", help="전체 결과를 JSON 으로 저장할 경로")
+        parser.add_argument("--baseline", help="비교할 이전 --json 결과")
+        parser.add_argument("--max-slowdown", type=float, default=0.10,
+                            help="허용하는 처리량 감소 비율 (기본 0.10 = 10%%)")
+        parser.add_argument("--max-accuracy-drop", type=float, default=0.01,
+                            help="허용하는 필드 정확도 감소폭 (기본 0.01)")
+
+    def handle(self, *args, **options):
+        from transcripts import custom_paddle_ocr_script as ocr_script
+
+        manifest = load_manifest(options["corpus_dir"])
+        pages = manifest["pages"][:options["limit"]] if options["limit"] else manifest["pages"]
+        if not pages:
+            raise CommandError("코퍼스에 페이지가 없습니다.")
+        code_index = None if options["no_code_index"] else CodeIndex(manifest["codes"])
+        ocr_script.DEBUG = options["verbose"]
+
+        rss_before = peak_rss_mb()
+        if not options["no_warmup"]:
+            run_pages(options["corpus_dir"], pages[:1], code_index)   # 엔진(모델) 로드는 측정에서 제외
+        rss_loaded = peak_rss_mb()
+
+        results = []
+        started = time.perf_counter()
+        for _ in range(options["repeat"]):
+            results.extend(run_pages(options["corpus_dir"], pages, code_index))
+        wall = time.perf_counter() - started
+
+        stages = sorted({k for r in results for k in r["timings"] if k.endswith("_ms") and k != "total_ms"})
+        groups: dict[str, list[dict]] = {}
+        for r in results:
+            groups.setdefault(f"w{r['width']}/{r['noise']}", []).append(r)
+        report = {
+            "pages": len(results),
+            "wall_s": round(wall, 3),
+            "pages_per_sec": round(len(results) / wall, 3) if wall else None,
+            "latency_ms": _latency([r["timings"]["total_ms"] for r in results]),
+            "stages_ms": {s: _latency([r["timings"].get(s, 0.0) for r in results]) for s in stages},
+            "rss_mb": {"start": rss_before, "after_warmup": rss_loaded, "peak": peak_rss_mb()},
+            "accuracy": accuracy([r["score"] for r in results]),
+            "groups": {
+                name: {"pages": len(items),
+                       "latency_ms": _latency([r["timings"]["total_ms"] for r in items]),
+                       "accuracy": accuracy([r["score"] for r in items])}
+                for name, items in sorted(groups.items())
+            },
+        }
+
+        self.stdout.write(json.dumps({k: v for k, v in report.items() if k != "groups"}, ensure_ascii=False, indent=2))
+        for name, group in report["groups"].items():
+            acc = group["accuracy"]
+            self.stdout.write(f"  {name:<16} p50={group['latency_ms']['p50']}ms "
+                              f"code={acc.get('code_acc')} grade={acc.get('grade_acc')} "
+                              f"retake={acc.get('retake_acc')} semester={acc.get('semester_acc')}")
+        if options["json_out"]:
+            with open(options["json_out"], "w", encoding="utf-8") as fh:
+                json.dump({**report, "results": results}, fh, ensure_ascii=False, indent=1)
+
+        if options["baseline"]:
+            self._compare(report, options)
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['pages']} pages, {report['pages_per_sec']} pages/s, row_exact={report['accuracy'].get('row_exact')}"
+        ))
+
+    def _compare(self, report: dict, options):
+        with open(options["baseline"], encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        problems = []
+        if baseline.get("pages_per_sec") and report["pages_per_sec"] is not None:
+            change = report["pages_per_sec"] / baseline["pages_per_sec"] - 1
+            self.stdout.write(f"throughput: {baseline['pages_per_sec']} → {report['pages_per_sec']} pages/s ({change:+.1%})")
+            if change < -options["max_slowdown"]:
+                problems.append(f"처리량 {change:+.1%}")
+        for key, before in baseline.get("accuracy", {}).items():
+            after = report["accuracy"].get(key)
+            if after is None:
+                continue
+            if before - after > options["max_accuracy_drop"]:
+                problems.append(f"{key} {before} → {after}")
+        if problems:
+            raise CommandError("기준 대비 성능 저하: " + ", ".join(problems))
+        self.stdout.write(self.style.SUCCESS("기준 대비 속도/정확도 저하 없음"))
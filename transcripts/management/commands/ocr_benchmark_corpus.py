@@ -0,0 +1,29 @@
+# transcripts/management/commands/ocr_benchmark_corpus.py
+from django.core.management.base import BaseCommand, CommandError
+
+from transcripts.benchmark import DEFAULT_WIDTHS, NOISE_LEVELS, find_font, write_corpus
+
+
+class Command(BaseCommand):
+    help = "OCR 벤치마크용 합성 성적표 이미지와 정답(manifest.json)을 만든다"
+
+    def add_arguments(self, parser):
+        parser.add_argument("out_dir", help="이미지와 manifest.json 을 쓸 디렉터리")
+        parser.add_argument("--count", type=int, default=10, help="성적표 수 (해상도×노이즈 조합마다 한 장씩)")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--widths", type=int, nargs="+", default=list(DEFAULT_WIDTHS),
+                            help="이미지 폭(px) 목록")
+        parser.add_argument("--noise", nargs="+", default=list(NOISE_LEVELS), choices=list(NOISE_LEVELS),
+                            help="노이즈 프리셋 목록")
+        parser.add_argument("--font", help="한글 TrueType 글꼴 경로 (없으면 BENCHMARK_FONT 환경변수/흔한 설치 위치)")
+
+    def handle(self, *args, **options):
+        font = find_font(options["font"])
+        if font is None:
+            raise CommandError("한글 글꼴을 찾을 수 없습니다. --font 또는 BENCHMARK_FONT 로 지정해 주세요.")
+        manifest = write_corpus(options["out_dir"], options["count"], font, seed=options["seed"],
+                                widths=options["widths"], noise_levels=options["noise"])
+        rows = sum(len(p["rows"]) for p in manifest["pages"])
+        self.stdout.write(self.style.SUCCESS(
+            f"wrote {len(manifest['pages'])} pages ({rows} rows) to {options['out_dir']} (font={font})"
+        ))
@@ -0,0 +1,41 @@
+# transcripts/management/commands/ocr_export_tokens.py
+import os
+import shutil
+
+from django.core.management.base import BaseCommand
+
+from transcripts.models import TranscriptPage
+from transcripts.ocr_backends import write_token_manifest
+from transcripts.tokens import unpack_tokens
+
+
+class Command(BaseCommand):
+    help = ("OCR 이 끝난 페이지의 이미지와 저장된 토큰 스트림을 코퍼스(manifest.json)로 내보낸다. "
+            "FakeOcrBackend(FAKE_CORPUS_DIR)가 이 토큰을 재생하고, rows 는 기록 당시 파싱 결과(재생 시 기대값)이다")
+
+    def add_arguments(self, parser):
+        parser.add_argument("out_dir", help="이미지와 manifest.json 을 쓸 디렉터리")
+        parser.add_argument("--limit", type=int, default=200, help="최근 페이지부터 최대 N 장")
+
+    def handle(self, *args, **options):
+        out_dir = options["out_dir"]
+        os.makedirs(out_dir, exist_ok=True)
+        qs = (TranscriptPage.objects.filter(status=TranscriptPage.STATUS.done, ocr_tokens__isnull=False)
+                                    .order_by("-id")[:options["limit"]])
+
+        pages, seen = [], set()
+        for page in qs.iterator(chunk_size=100):
+            # 같은 이미지(내용 해시)가 여러 번 올라온 경우 한 번만
+            if page.content_hash and page.content_hash in seen:
+                continue
+            seen.add(page.content_hash)
+            name = f"page{page.id}{os.path.splitext(page.file.name)[1] or '.png'}"
+            with page.file.open("rb") as src, open(os.path.join(out_dir, name), "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            tokens = unpack_tokens(page.ocr_tokens)
+            pages.append({"file": name, "rows": page.parsed_rows or [],
+                          "tokens": {k: [{"txt": it["txt"], "score": it["score"], "bbox": list(it["bbox"])}
+                                         for it in items] for k, items in tokens.items()}})
+
+        write_token_manifest(out_dir, pages)
+        self.stdout.write(self.style.SUCCESS(f"exported {len(pages)} pages → {os.path.join(out_dir, 'manifest.json')}"))
@@ -0,0 +1,30 @@
+# transcripts/management/commands/ocr_selfcheck.py
+import json
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "OCR 워커의 CPU 추론 설정(MKL-DNN, 스레드, ONNX/int8 모델)이 실제로 적용되는지 점검한다"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--warmup", action="store_true",
+                            help="엔진을 실제로 만들어 활성 가속 경로를 읽고, 더미 이미지로 검출/인식 시간을 측정")
+
+    def handle(self, *args, **options):
+        from transcripts import custom_paddle_ocr_script as ocr_script
+
+        warm = ocr_script.warm_up() if options["warmup"] else {}
+        # 활성 경로는 실제로 만든 엔진에서만 알 수 있다 (--warmup 없이는 요청 설정만)
+        report = ocr_script.cpu_inference_report(ocr_script.get_ocr() if warm else None)
+        report.update(warm)
+
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+        if not report["engine"] and not warm:
+            self.stdout.write(self.style.WARNING("엔진을 만들지 않아 요청 설정만 표시합니다 (--warmup 으로 실제 경로 확인)."))
+        elif not report["engine"]:
+            self.stdout.write(self.style.WARNING(f"{report['backend']} 엔진은 추론 경로 정보를 제공하지 않습니다."))
+        elif not [a for a in report["active"] if not a.startswith("threads=")]:
+            self.stdout.write(self.style.WARNING("가속 경로(MKL-DNN/ONNX/int8)가 하나도 활성화되지 않았습니다."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"active: {', '.join(report['active'])}"))
@@ -0,0 +1,46 @@
+# transcripts/management/commands/ocr_server.py
+import json
+import os
+
+from django.core.management.base import BaseCommand
+
+from transcripts.conf import ocr_overrides, ocr_setting
+
+
+class Command(BaseCommand):
+    help = ("노드 공유 OCR 추론 서버를 띄운다. 모델은 이 프로세스에만 올리고, 워커는 BACKEND 를 "
+            "transcripts.ocr_server.RemoteOcrBackend 로 두어 Unix 소켓 + 공유 메모리로 요청한다")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--socket", help="Unix 소켓 경로 (기본: SERVER_SOCKET 설정)")
+        parser.add_argument("--profiles", default="accurate",
+                            help="미리 올릴 엔진 프로필 (쉼표 구분, 예: accurate,fast). 나머지는 첫 요청 때 생성")
+        parser.add_argument("--threads", type=int, default=0,
+                            help="엔진 추론 스레드 수 (0 이면 노드의 전체 코어 수)")
+        parser.add_argument("--verbose", action="store_true", help="OCR 모듈의 DEBUG 출력 유지")
+        parser.add_argument("--stats", action="store_true", help="실행 중인 서버의 통계만 출력하고 끝낸다")
+
+    def handle(self, *args, **options):
+        from transcripts import custom_paddle_ocr_script as ocr_script
+        from transcripts.ocr_server import OcrServer, server_request
+
+        socket_path = options["socket"] or ocr_setting("SERVER_SOCKET")
+        if options["stats"]:
+            self.stdout.write(json.dumps(server_request({"op": "stats"}, socket_path), ensure_ascii=False, indent=2))
+            return
+
+        ocr_script.DEBUG = options["verbose"]
+        profiles = [p.strip() for p in options["profiles"].split(",") if p.strip()]
+        # 서버는 노드에 하나뿐이므로 워커 동시성으로 나누지 않고 코어 전체를 쓴다
+        with ocr_overrides(CPU_THREADS=options["threads"] or os.cpu_count() or 1):
+            server = OcrServer(socket_path, profiles)
+            self.stdout.write(self.style.SUCCESS(
+                f"OCR server pid={os.getpid()} listening on {socket_path} "
+                f"(backend={ocr_setting('SERVER_BACKEND')}, profiles={','.join(profiles)})"
+            ))
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                server.server_close()
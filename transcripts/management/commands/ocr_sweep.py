@@ -0,0 +1,154 @@
+# transcripts/management/commands/ocr_sweep.py
+import itertools
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transcripts.benchmark import SCORE_FIELDS, accuracy, load_manifest, pareto_front, run_pages
+from transcripts.code_index import CodeIndex
+from transcripts.conf import ocr_overrides, ocr_setting
+from transcripts.profiling import percentile
+
+# 탐색 파라미터 → 기본 후보값. "auto" 배율은 ADAPTIVE_SCALE(텍스트 높이 기준 자동 배율)
+SEARCH_SPACE = {
+    "sharpen": [True, False],
+    "scale_factor": ["auto", 1.5, 2.0, 3.0],
+    "min_score": [0.1, 0.15, 0.3],
+    "drop_score": [0.1, 0.3, 0.5],
+    "det_db_box_thresh": [0.3, 0.5, 0.6],
+    "det_db_unclip_ratio": [1.4, 1.6, 2.0],
+}
+# 엔진을 새로 만들어야 하는 파라미터 (같은 값끼리 이어서 실행해 엔진 로드를 줄인다)
+ENGINE_SEARCH_PARAMS = ("min_score", "drop_score", "det_db_box_thresh", "det_db_unclip_ratio")
+
+
+def _overrides(config: dict) -> dict:
+    """탐색 파라미터 → conf 설정 이름"""
+    values = {
+        "CONTENT_SHARPEN": config["sharpen"],
+        "MIN_SCORE": config["min_score"],
+        "DROP_SCORE": config["drop_score"],
+        "DET_DB_BOX_THRESH": config["det_db_box_thresh"],
+        "DET_DB_UNCLIP_RATIO": config["det_db_unclip_ratio"],
+    }
+    if config["scale_factor"] == "auto":
+        values["ADAPTIVE_SCALE"] = True
+    else:
+        values.update(ADAPTIVE_SCALE=False, CONTENT_SCALE=float(config["scale_factor"]))
+    return values
+
+
+def _current_config() -> dict:
+    """지금 설정값 (비교 기준으로 항상 함께 실행)"""
+    return {
+        "sharpen": ocr_setting("CONTENT_SHARPEN"),
+        "scale_factor": "auto" if ocr_setting("ADAPTIVE_SCALE") else ocr_setting("CONTENT_SCALE"),
+        "min_score": ocr_setting("MIN_SCORE"),
+        "drop_score": ocr_setting("DROP_SCORE"),
+        "det_db_box_thresh": ocr_setting("DET_DB_BOX_THRESH"),
+        "det_db_unclip_ratio": ocr_setting("DET_DB_UNCLIP_RATIO"),
+    }
+
+
+def _parse_value(raw: str):
+    raw = raw.strip()
+    if raw.lower() in ("true", "false"):
+        return raw.lower() == "true"
+    if raw.lower() == "auto":
+        return "auto"
+    return float(raw)
+
+
+class Command(BaseCommand):
+    help = ("라벨이 있는 페이지 코퍼스(manifest.json, ocr_benchmark_corpus 형식)로 전처리/인식 파라미터를 격자 또는 "
+            "무작위 탐색해, 조합별 지연과 필드 정확도를 기록하고 속도/정확도 파레토 최적 조합을 출력한다")
+
+    def add_arguments(self, parser):
+        parser.add_argument("corpus_dir", help="manifest.json 이 있는 디렉터리")
+        parser.add_argument("--param", action="append", default=[], metavar="NAME=V1,V2",
+                            help=f"후보값 지정 (반복 가능). 이름: {', '.join(SEARCH_SPACE)}")
+        parser.add_argument("--grid", action="store_true", help="모든 조합 (기본: 무작위 --samples 개)")
+        parser.add_argument("--samples", type=int, default=40, help="무작위 탐색 조합 수")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--limit", type=int, help="앞에서부터 N 페이지만")
+        parser.add_argument("--no-code-index", action="store_true",
+                            help="학수번호 색인 없이 실행 (기본: manifest 의 코드 집합으로 색인 구성)")
+        parser.add_argument("--min-accuracy", type=float, default=0.98,
+                            help="추천 조합이 넘어야 하는 필드 평균 정확도")
+        parser.add_argument("--json", dest="json_out", help="조합별 결과를 JSON 으로 저장할 경로")
+
+    def handle(self, *args, **options):
+        from transcripts import custom_paddle_ocr_script as ocr_script
+
+        space = {name: list(values) for name, values in SEARCH_SPACE.items()}
+        for spec in options["param"]:
+            name, _, raw = spec.partition("=")
+            if name not in space or not raw:
+                raise CommandError(f"잘못된 --param: {spec}")
+            space[name] = [_parse_value(v) for v in raw.split(",")]
+
+        names = list(space)
+        grid = [dict(zip(names, values)) for values in itertools.product(*space.values())]
+        if not options["grid"] and len(grid) > options["samples"]:
+            grid = random.Random(options["seed"]).sample(grid, options["samples"])
+        baseline = _current_config()
+        configs = [baseline] + [c for c in grid if c != baseline]
+        configs.sort(key=lambda c: tuple(str(c[p]) for p in ENGINE_SEARCH_PARAMS))
+
+        manifest = load_manifest(options["corpus_dir"])
+        pages = manifest["pages"][:options["limit"]] if options["limit"] else manifest["pages"]
+        if not pages:
+            raise CommandError("코퍼스에 페이지가 없습니다.")
+        code_index = None if options["no_code_index"] else CodeIndex(manifest["codes"])
+        ocr_script.DEBUG = False
+        self.stdout.write(f"{len(configs)} configs × {len(pages)} pages")
+
+        points, engine_params = [], None
+        for idx, config in enumerate(configs, start=1):
+            with ocr_overrides(**_overrides(config)):
+                params = tuple(config[p] for p in ENGINE_SEARCH_PARAMS)
+                if params != engine_params:
+                    run_pages(options["corpus_dir"], pages[:1], code_index)   # 새 엔진 로드는 측정에서 제외
+                    engine_params = params
+                started = time.perf_counter()
+                results = run_pages(options["corpus_dir"], pages, code_index)
+                wall = time.perf_counter() - started
+            acc = accuracy([r["score"] for r in results])
+            latencies = [r["timings"]["total_ms"] for r in results]
+            point = {
+                "config": config,
+                "baseline": config == baseline,
+                "latency_p50_ms": percentile(latencies, 50),
+                "latency_p95_ms": percentile(latencies, 95),
+                "mean_ms": round(wall * 1000 / len(results), 1),
+                "accuracy": acc,
+                "field_accuracy": round(sum(acc.get(f"{f}_acc", 0.0) for f in SCORE_FIELDS) / len(SCORE_FIELDS), 4),
+            }
+            points.append(point)
+            self.stdout.write(f"[{idx}/{len(configs)}] {point['mean_ms']}ms/page "
+                              f"acc={point['field_accuracy']} {json.dumps(config)}")
+
+        front = pareto_front(points, "mean_ms", "field_accuracy")
+        self.stdout.write("\n파레토 최적 조합 (빠른 순):")
+        for p in front:
+            mark = " (현재 설정)" if p["baseline"] else ""
+            self.stdout.write(f"  {p['mean_ms']:>8}ms  acc={p['field_accuracy']:.4f}  "
+                              f"{' '.join(f'{k}={v}' for k, v in p['config'].items())}{mark}")
+
+        if options["json_out"]:
+            with open(options["json_out"], "w", encoding="utf-8") as fh:
+                json.dump({"points": points, "pareto": [p["config"] for p in front]}, fh, ensure_ascii=False, indent=1)
+
+        eligible = [p for p in front if p["field_accuracy"] >= options["min_accuracy"]]
+        if not eligible:
+            self.stdout.write(self.style.WARNING(f"정확도 {options['min_accuracy']} 이상인 조합이 없습니다."))
+            return
+        best = eligible[0]
+        base = next(p for p in points if p["baseline"])
+        self.stdout.write(self.style.SUCCESS(
+            f"추천: {best['mean_ms']}ms/page acc={best['field_accuracy']} "
+            f"(현재 {base['mean_ms']}ms/page acc={base['field_accuracy']}) → "
+            f"TRANSCRIPT_OCR 설정: {json.dumps(_overrides(best['config']))}"
+        ))
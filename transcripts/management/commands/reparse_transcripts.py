@@ -0,0 +1,90 @@
+# transcripts/management/commands/reparse_transcripts.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from transcripts.code_index import get_code_index
+from transcripts.models import Transcript, TranscriptPage
+from transcripts.ocr_cache import store_reparsed
+from transcripts.ocr_parsing import build_courses, merge_pages
+from transcripts.tokens import unpack_tokens
+
+# 끝난 성적표만 다시 파싱한다 (views._EDITABLE 과 같다). 처리/대기 중인 성적표는 워커·수정 요청이 쓰는 중이므로 건너뛴다
+REPARSEABLE = (Transcript.STATUS.done, Transcript.STATUS.error)
+
+
+class Command(BaseCommand):
+    help = "페이지에 저장된 OCR 토큰으로 페이지별 과목 행과 성적표 parsed_data 를 다시 만든다 (OCR 재실행 없음)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("transcript_ids", nargs="*", type=int,
+                            help="대상 성적표 id (생략하면 전체)")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="결과만 비교하고 저장하지 않음")
+
+    def handle(self, *args, **options):
+        qs = Transcript.objects.order_by("id")
+        if options["transcript_ids"]:
+            qs = qs.filter(id__in=options["transcript_ids"])
+        dry_run = options["dry_run"]
+        code_index = get_code_index()
+
+        started = time.perf_counter()
+        total = changed = skipped = busy = 0
+        for t in qs.iterator(chunk_size=200):
+            # views._claim 과 같은 조건부 UPDATE 로 성적표를 잡아, 그 사이 시작된 처리/수정과 겹치지 않게 한다
+            if t.status not in REPARSEABLE or not (dry_run or self._claim(t)):
+                busy += 1
+                continue
+            done = None
+            try:
+                done = self._reparse(t, code_index, dry_run)
+            finally:
+                if not dry_run and not done:
+                    # 바뀐 것이 없거나 재구성할 수 없으면 원래 상태로 되돌린다
+                    Transcript.objects.filter(pk=t.pk).update(status=t.status)
+            if done is None:
+                skipped += 1
+                continue
+            total += 1
+            changed += done
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"re-parsed {total} transcripts in {elapsed:.2f}s "
+            f"(changed={changed}, skipped_without_tokens={skipped}, skipped_busy={busy}{', dry-run' if dry_run else ''})"
+        ))
+
+    @staticmethod
+    def _claim(t: Transcript) -> bool:
+        return bool(Transcript.objects.filter(pk=t.pk, status__in=REPARSEABLE)
+                                      .update(status=Transcript.STATUS.processing))
+
+    def _reparse(self, t: Transcript, code_index, dry_run: bool) -> bool | None:
+        """성적표 하나를 다시 파싱 → 바뀌어 저장했으면 True, 같으면 False, 토큰이 없어 못 하면 None"""
+        # 페이지는 성적표를 잡은 뒤에 읽는다 (그 전에 끝난 페이지 수정이 반영되도록)
+        pages = list(t.pages.order_by("page_number"))
+        # 토큰이 없는 페이지(이 기능 이전 업로드)가 하나라도 있으면 OCR 없이는 재구성할 수 없다
+        if not pages or any(p.ocr_tokens is None for p in pages):
+            return None
+
+        for page in pages:
+            page.parsed_rows = build_courses(unpack_tokens(page.ocr_tokens), code_index)
+            if not dry_run:
+                # 페이지 체크포인트도 갱신해야 이후 페이지 추가/삭제 때 병합이 이전 파싱 결과로 되돌아가지 않는다
+                page.status        = TranscriptPage.STATUS.done
+                page.error_message = None
+                page.save(update_fields=["parsed_rows", "status", "error_message"])
+                store_reparsed(page, page.parsed_rows, code_index)
+        # 병합은 finalize_transcript 와 같은 규칙으로
+        all_rows = merge_pages([p.parsed_rows for p in pages])
+
+        if all_rows == t.parsed_data and t.status == Transcript.STATUS.done:
+            return False
+        self.stdout.write(f"transcript {t.id}: {len(t.parsed_data or [])} → {len(all_rows)} rows")
+        if not dry_run:
+            t.parsed_data   = all_rows
+            t.status        = Transcript.STATUS.done
+            t.error_message = None
+            t.save(update_fields=["parsed_data", "status", "error_message"])
+        return True
@@ -0,0 +1,52 @@
+# transcripts/management/commands/resume_transcripts.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from transcripts.models import Transcript, TranscriptPage
+from transcripts.tasks import process_transcript
+
+
+class Command(BaseCommand):
+    help = "실패했거나 멈춘 성적표를 다시 큐에 넣는다. 이미 끝난 페이지는 저장된 결과를 쓰고 나머지 페이지만 OCR 한다"
+
+    def add_arguments(self, parser):
+        parser.add_argument("transcript_ids", nargs="*", type=int,
+                            help="대상 성적표 id (생략하면 error 상태와 오래된 pending 전체)")
+        parser.add_argument("--processing", action="store_true",
+                            help="processing 상태로 멈춘 성적표도 포함 (실행 중인 워커가 없을 때만 사용)")
+        parser.add_argument("--stale-minutes", type=int, default=30,
+                            help="큐에 넣은 지(enqueued_at) 이 시간(분)이 지나도 시작되지 않은 pending 성적표도 포함 "
+                                 "(브로커 장애로 유실된 요청). 0 이면 pending 은 제외")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="대상만 출력하고 큐에 넣지 않음")
+
+    def handle(self, *args, **options):
+        statuses = [Transcript.STATUS.error]
+        if options["processing"]:
+            statuses.append(Transcript.STATUS.processing)
+        query = Q(status__in=statuses)
+        if options["stale_minutes"] > 0:
+            cutoff = timezone.now() - timedelta(minutes=options["stale_minutes"])
+            # 큐에 넣기 전에 멈춘 업로드는 enqueued_at 이 없으므로 생성 시각으로 본다
+            query |= Q(status=Transcript.STATUS.pending) & (
+                Q(enqueued_at__lt=cutoff) | Q(enqueued_at__isnull=True, created_at__lt=cutoff))
+        qs = Transcript.objects.filter(query).order_by("id")
+        if options["transcript_ids"]:
+            qs = qs.filter(id__in=options["transcript_ids"])
+
+        queued = 0
+        for t in qs.iterator(chunk_size=200):
+            remaining = t.pages.exclude(status=TranscriptPage.STATUS.done).count()
+            self.stdout.write(f"transcript {t.id} ({t.status}): {remaining}/{t.pages.count()} pages remaining")
+            if not options["dry_run"]:
+                t.enqueued_at = timezone.now()
+                t.save(update_fields=["enqueued_at"])
+                process_transcript.delay(t.id)
+            queued += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"queued {queued} transcripts{' (dry-run)' if options['dry_run'] else ''}"
+        ))
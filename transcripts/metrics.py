@@ -0,0 +1,78 @@
+# transcripts/metrics.py
+# OCR 워커 수명주기 지표 (prometheus_client 가 설치된 경우에만 기록. 없으면 worker.py 의 로그만 남는다)
+#  - 엔진 웜업 시간, OCR 태스크 전후 RSS, 자식 프로세스 재활용 이벤트
+# prefork 자식마다 프로세스가 다르므로 환경변수 PROMETHEUS_MULTIPROC_DIR 을 지정해 멀티프로세스 모드로 모으고,
+# 워커 메인 프로세스가 conf METRICS_PORT 로 /metrics 를 연다 (worker.py 의 worker_init).
+import os
+
+try:
+    import prometheus_client
+except ImportError:  # 지표 없이도 워커는 동작한다
+    prometheus_client = None
+
+if prometheus_client is not None:
+    WARMUP_SECONDS = prometheus_client.Histogram(
+        "transcripts_worker_warmup_seconds", "워커 자식 프로세스 시작 시 OCR 엔진 웜업 시간",
+        ["backend"], buckets=(0.1, 0.5, 1, 2, 5, 10, 20, 40, 80),
+    )
+    TASK_RSS_MB = prometheus_client.Histogram(
+        "transcripts_task_rss_mb", "OCR 태스크 종료 시 워커 자식 RSS (MB)",
+        ["task"], buckets=(128, 256, 512, 768, 1024, 1536, 2048, 3072, 4096),
+    )
+    TASK_RSS_GROWTH_MB = prometheus_client.Histogram(
+        "transcripts_task_rss_growth_mb", "OCR 태스크 한 건 동안 늘어난 워커 자식 RSS (MB)",
+        ["task"], buckets=(0, 1, 5, 10, 25, 50, 100, 250, 500),
+    )
+    WORKER_RSS_MB = prometheus_client.Gauge(
+        "transcripts_worker_rss_mb", "워커 자식의 마지막 태스크 종료 시 RSS (MB)", multiprocess_mode="liveall",
+    )
+    RECYCLES = prometheus_client.Counter(
+        "transcripts_worker_recycles_total", "재활용(교체)되는 워커 자식 수", ["reason"],
+    )
+
+
+def _multiprocess() -> bool:
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ or "prometheus_multiproc_dir" in os.environ
+
+
+def observe_warmup(backend: str, seconds: float):
+    if prometheus_client is not None:
+        WARMUP_SECONDS.labels(backend=backend.rsplit(".", 1)[-1]).observe(seconds)
+
+
+def observe_task_rss(task: str, before_mb: float | None, after_mb: float):
+    if prometheus_client is None:
+        return
+    task = task.rsplit(".", 1)[-1]
+    TASK_RSS_MB.labels(task=task).observe(after_mb)
+    WORKER_RSS_MB.set(after_mb)
+    if before_mb is not None:
+        TASK_RSS_GROWTH_MB.labels(task=task).observe(max(after_mb - before_mb, 0.0))
+
+
+def count_recycle(reason: str):
+    if prometheus_client is not None:
+        RECYCLES.labels(reason=reason).inc()
+
+
+def start_metrics_server(port: int) -> bool:
+    """/metrics HTTP 서버 시작. prometheus_client 가 없거나 port 가 0 이면 False"""
+    if prometheus_client is None or not port:
+        return False
+    if _multiprocess():
+        from prometheus_client import multiprocess
+
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        prometheus_client.start_http_server(port, registry=registry)
+    else:
+        prometheus_client.start_http_server(port)
+    return True
+
+
+def mark_process_dead(pid: int):
+    """끝난 자식의 live 게이지 파일 정리 (멀티프로세스 모드)"""
+    if prometheus_client is not None and _multiprocess():
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.23 on 2026-10-17 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcripts', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcriptpage',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='transcriptpage',
+            name='phash',
+            field=models.CharField(blank=True, max_length=256),
+        ),
+        migrations.CreateModel(
+            name='OcrResultCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('parser_version', models.CharField(max_length=20)),
+                ('phash', models.CharField(blank=True, max_length=256)),
+                ('thumbnail', models.BinaryField(blank=True, null=True)),
+                ('image_width', models.PositiveIntegerField(blank=True, null=True)),
+                ('image_height', models.PositiveIntegerField(blank=True, null=True)),
+                ('rows', models.JSONField(default=list)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['parser_version', 'image_width', 'image_height'], name='transcripts_parser__92dc0a_idx')],
+                'unique_together': {('content_hash', 'parser_version')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.23 on 2026-10-17 06:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcripts', '0003_ocr_result_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ocrresultcache',
+            name='tokens',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transcriptpage',
+            name='ocr_tokens',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
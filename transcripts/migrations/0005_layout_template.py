@@ -0,0 +1,25 @@
+# Generated by Django 4.2.23 on 2026-10-17 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcripts', '0004_ocr_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LayoutTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(db_index=True, max_length=16)),
+                ('layout', models.JSONField()),
+                ('sample_count', models.PositiveIntegerField(default=1)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-17 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcripts', '0005_layout_template'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcriptpage',
+            name='triage',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
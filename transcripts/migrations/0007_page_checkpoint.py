@@ -0,0 +1,28 @@
+# Generated by Django 4.2.23 on 2026-10-17 06:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcripts', '0006_page_triage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcriptpage',
+            name='error_message',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transcriptpage',
+            name='parsed_rows',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transcriptpage',
+            name='status',
+            field=models.CharField(choices=[('pending', '대기'), ('processing', '처리 중'), ('done', '완료'), ('error', '오류')], default='pending', max_length=20),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.23 on 2026-10-17 06:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcripts', '0007_page_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcript',
+            name='enqueued_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transcript',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transcript',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transcriptpage',
+            name='profile',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
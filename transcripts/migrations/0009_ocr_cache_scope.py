@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('transcripts', '0008_pipeline_profile'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='ocrresultcache',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='ocrresultcache',
+            name='catalog_version',
+            field=models.CharField(blank=True, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='ocrresultcache',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='ocrresultcache',
+            unique_together={('content_hash', 'parser_version', 'catalog_version')},
+        ),
+    ]
@@ -27,12 +27,22 @@ class Transcript(models.Model):
     error_message = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # 파이프라인 프로파일 (profiling.transcript_timings): 큐 투입 → 워커 시작 → 병합 완료
+    enqueued_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"Transcript(user={self.user}, status={self.status})"
 
 
 class TranscriptPage(models.Model):
+    class STATUS(models.TextChoices) :
+        pending = 'pending', '대기'
+        processing = 'processing','처리 중'
+        done = 'done', '완료'
+        error = 'error', '오류'
+
     transcript   = models.ForeignKey(
         Transcript,
         on_delete=models.CASCADE,
@@ -40,7 +50,62 @@ class TranscriptPage(models.Model):
     )
     file         = models.FileField(upload_to='transcripts/pages/')
     page_number  = models.PositiveIntegerField()
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)  # 업로드 시 sha256
+    phash        = models.CharField(max_length=256, blank=True)                # 워커에서 계산한 dHash
+    ocr_tokens   = models.BinaryField(null=True, blank=True)                   # 원본 OCR 토큰 (tokens.pack_tokens)
+    triage       = models.JSONField(null=True, blank=True)                     # 업로드 사전 점검 결과 (triage.triage_image)
+    # 페이지 단위 체크포인트: 끝난 페이지는 재시도/워커 재시작 때 다시 OCR 하지 않는다
+    status        = models.CharField(max_length=20, choices=STATUS.choices, default=STATUS.pending)
+    parsed_rows   = models.JSONField(null=True, blank=True)                    # 이 페이지의 과목 행 (status=done 일 때)
+    error_message = models.TextField(null=True, blank=True)
+    profile       = models.JSONField(null=True, blank=True)                    # 단계별 시간/호출 수, 토큰 수 (profiling.stage)
 
     def __str__(self):
         return f"Page {self.page_number} of Transcript({self.transcript_id})"
-    
\ No newline at end of file
+
+
+class OcrResultCache(models.Model):
+    """
+    페이지 이미지 해시 → 파싱된 과목 행 캐시.
+    parser_version 이 바뀌면 이전 항목은 조회되지 않으므로 파서를 고치면 PARSER_VERSION 만 올리면 된다.
+    행의 학수번호는 졸업요건 색인으로 보정된 값이므로 색인 지문(catalog_version)도 키에 들어간다.
+    """
+    content_hash    = models.CharField(max_length=64)
+    parser_version  = models.CharField(max_length=20)
+    catalog_version = models.CharField(max_length=16, blank=True)   # code_index.CodeIndex.version
+    # 항목을 만든 페이지의 사용자. perceptual(유사 이미지) 적중은 같은 사용자 항목에서만 찾는다
+    user            = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                        null=True, blank=True, related_name='+')
+    phash          = models.CharField(max_length=256, blank=True)
+    thumbnail      = models.BinaryField(null=True, blank=True)   # hashing.perceptual_signature 참고
+    image_width    = models.PositiveIntegerField(null=True, blank=True)
+    image_height   = models.PositiveIntegerField(null=True, blank=True)
+    rows           = models.JSONField(default=list)
+    tokens         = models.BinaryField(null=True, blank=True)   # 캐시 적중 시 페이지에 복사할 OCR 토큰
+    hit_count      = models.PositiveIntegerField(default=0)
+    created_at     = models.DateTimeField(auto_now_add=True)
+    updated_at     = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('content_hash', 'parser_version', 'catalog_version')
+        indexes = [models.Index(fields=['parser_version', 'image_width', 'image_height'])]
+
+    def __str__(self):
+        return f"OcrResultCache({self.content_hash[:12]}, v{self.parser_version}, hits={self.hit_count})"
+
+
+class LayoutTemplate(models.Model):
+    """
+    학습된 성적표 양식. hashing.layout_fingerprint 로 찾아, 헤더 탐색용 전체 원본 인식을 건너뛴다.
+    layout (모든 값은 페이지 폭 대비 비율):
+      {"heads": [{"txt", "x0", "x1"}, ...], "header_h": float, "row_pitch": float | None}
+    """
+    fingerprint  = models.CharField(max_length=16, db_index=True)
+    layout       = models.JSONField()
+    sample_count = models.PositiveIntegerField(default=1)   # 이 양식으로 학습/갱신된 페이지 수
+    hit_count    = models.PositiveIntegerField(default=0)   # 템플릿으로 헤더가 확인된 페이지 수
+    created_at   = models.DateTimeField(auto_now_add=True)
+    updated_at   = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"LayoutTemplate({self.fingerprint}, samples={self.sample_count}, hits={self.hit_count})"
@@ -0,0 +1,206 @@
+# transcripts/ocr_backends.py
+# OCR 엔진 인터페이스와 부하 테스트용 가짜 엔진.
+#  - OcrBackend: ocr_page_tokens() 가 쓰는 엔진 메서드 (custom_paddle_ocr_script.MyPaddleOCR 가 구현)
+#    conf BACKEND 에 클래스 import 경로를 지정하면 get_ocr() 가 그 클래스로 엔진을 만든다.
+#  - ocr_server.RemoteOcrBackend: 모델을 가진 노드 공유 추론 서버(ocr_server 명령)에 요청하는 클라이언트
+#  - FakeOcrBackend: 모델 없이 코퍼스(manifest.json)의 토큰을 재생한다. 페이지마다
+#      tokens (ocr_export_tokens 로 내보낸 운영 토큰 스트림) 또는 rows (정답 행 → benchmark.synthetic_tokens)
+#    를 쓰고, 검출/인식 호출마다 FAKE_DET_MS / FAKE_REC_MS 만큼 지연을 넣는다.
+#    업로드 → Celery → 파싱 → DB 저장 흐름의 큐/DB/API 처리량을 노트북에서 잴 때 사용 (CACHE_ENABLED=False 권장).
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Protocol, runtime_checkable
+
+import numpy as np
+
+from .conf import ocr_setting
+from .profiling import stage
+
+
+@runtime_checkable
+class OcrBackend(Protocol):
+    """생성자는 (lang, min_score, profile, **엔진 인자) 를 받는다. 토큰은 {"txt", "bbox", "cx", "cy", "h", "score"}"""
+    profile: str
+    min_score: float
+
+    def detect(self, image_input) -> list[np.ndarray]:
+        """텍스트 검출만 수행한 4점 박스 리스트"""
+        ...
+
+    def recognize(self, image_input, boxes, preprocess_info=None, cls: bool = False) -> list[dict | None]:
+        """boxes 영역만 인식. boxes 와 같은 순서, 빈 영역이거나 min_score 미만이면 None"""
+        ...
+
+    def run_ocr(self, image_input, preprocess_info=None, cls: bool = False) -> list[dict]:
+        """검출 + 인식 (좌표는 전처리 전 이미지 기준)"""
+        ...
+
+    def upside_down_ratio(self, image_input, boxes, sample: int = 8) -> float:
+        """180° 로 돌아간 것으로 판정된 박스 비율 (0~1)"""
+        ...
+
+
+# --- 가짜 엔진 ---
+# 디코딩된 페이지 배열의 지문 → 토큰. 지문은 축소 샘플 해시라 페이지 한 장에 1ms 미만이다.
+_corpora: dict[str, "_FakeCorpus"] = {}
+_corpora_lock = threading.Lock()
+
+
+def image_digest(image) -> str:
+    sample = np.ascontiguousarray(image[::8, ::8])
+    return hashlib.blake2b(f"{image.shape}".encode() + sample.tobytes(), digest_size=16).hexdigest()
+
+
+def _token(txt: str, bbox, score: float) -> dict:
+    bbox = tuple(float(v) for v in bbox)
+    return {"txt": txt, "bbox": bbox, "cx": (bbox[0] + bbox[2]) / 2.0, "cy": (bbox[1] + bbox[3]) / 2.0,
+            "h": bbox[3] - bbox[1], "score": float(score)}
+
+
+def _merge_streams(streams: dict[str, list[dict]]) -> list[dict]:
+    """기록된 토큰 스트림 → 페이지 토큰 하나의 목록. 같은 박스는 전처리 재인식(content) 결과를 우선한다"""
+    by_box: dict[tuple, dict] = {}
+    for name in ("raw", "content"):
+        for it in streams.get(name, []):
+            by_box[tuple(round(v) for v in it["bbox"])] = _token(it["txt"], it["bbox"], it["score"])
+    return sorted(by_box.values(), key=lambda it: (it["cy"], it["cx"]))
+
+
+class _FakeCorpus:
+    """코퍼스 디렉터리의 페이지 이미지 지문 → (토큰, 이미지 폭)"""
+
+    def __init__(self, corpus_dir: str):
+        import cv2
+        from .benchmark import load_manifest, synthetic_tokens
+        from .pdf import is_pdf_path, render_page
+
+        self.pages: dict[str, tuple[list[dict], int]] = {}
+        for page in load_manifest(corpus_dir)["pages"]:
+            path = os.path.join(corpus_dir, page["file"])
+            rendered = render_page(path) if is_pdf_path(path) else None
+            image = cv2.imdecode(np.fromfile(rendered or path, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if rendered:
+                os.unlink(rendered)
+            if image is None:
+                continue
+            width = image.shape[1]
+            if page.get("tokens"):
+                tokens = _merge_streams(page["tokens"])
+            else:
+                tokens = synthetic_tokens(page["rows"], width)
+            self.pages[image_digest(image)] = (tokens, width)
+        self._order = sorted(self.pages)
+        print(f"[FakeOcr] 코퍼스 {corpus_dir}: {len(self.pages)}페이지")
+
+    def tokens_for(self, image) -> list[dict] | None:
+        """
+        페이지 배열의 토큰. 코퍼스에 없는 페이지는 지문으로 코퍼스 페이지 하나를 골라 폭에 맞게 늘리거나 줄인다
+        (부하 테스트용 임의 업로드). 페이지보다 작은 배열(핀포인트 ROI crop 등)은 None.
+        긴 페이지 타일링의 띠(image[y0:y1] view)는 원본 페이지 토큰 중 띠 안의 것을 띠 좌표로 옮겨 준다.
+        """
+        base = image.base
+        if isinstance(base, np.ndarray) and base.shape[1:] == image.shape[1:] and base.shape[0] > image.shape[0]:
+            y0 = (image.__array_interface__["data"][0] - base.__array_interface__["data"][0]) // base.strides[0]
+            y1 = y0 + image.shape[0]
+            band = []
+            for it in self.tokens_for(base) or []:
+                if y0 <= it["cy"] < y1:
+                    x0, top, x1, bottom = it["bbox"]
+                    band.append(_token(it["txt"], (x0, top - y0, x1, bottom - y0), it["score"]))
+            return band
+        digest = image_digest(image)
+        if digest in self.pages:
+            return self.pages[digest][0]
+        height, width = image.shape[:2]
+        if not self._order or width < ocr_setting("TRIAGE_MIN_WIDTH") or height < ocr_setting("TRIAGE_MIN_HEIGHT"):
+            return None
+        tokens, page_width = self.pages[self._order[int(digest, 16) % len(self._order)]]
+        ratio = width / page_width
+        scaled = [_token(it["txt"], [v * ratio for v in it["bbox"]], it["score"]) for it in tokens]
+        self.pages[digest] = (scaled, width)
+        return scaled
+
+
+def fake_corpus(corpus_dir: str) -> _FakeCorpus:
+    """프로세스당 한 번만 읽는다"""
+    if corpus_dir not in _corpora:
+        with _corpora_lock:
+            if corpus_dir not in _corpora:
+                _corpora[corpus_dir] = _FakeCorpus(corpus_dir)
+    return _corpora[corpus_dir]
+
+
+class FakeOcrBackend:
+    """모델 없이 코퍼스 토큰을 돌려주는 OcrBackend (conf FAKE_* 설정)"""
+
+    def __init__(self, lang: str = "korean", min_score: float = 0.15, profile: str = "accurate", **kwargs):
+        corpus_dir = ocr_setting("FAKE_CORPUS_DIR")
+        if not corpus_dir:
+            raise ValueError("FakeOcrBackend 는 FAKE_CORPUS_DIR 설정이 필요합니다.")
+        self.lang = lang
+        self.min_score = float(min_score)
+        self.profile = profile
+        self._corpus = fake_corpus(corpus_dir)
+        self._rng = random.Random(f"{os.getpid()}:{profile}")
+
+    def _delay(self, ms: float):
+        """지터를 섞은 지연. FAKE_CPU_BOUND 면 실제 추론처럼 코어를 점유한다"""
+        jitter = ocr_setting("FAKE_JITTER")
+        seconds = max(ms * self._rng.uniform(1 - jitter, 1 + jitter), 0.0) / 1000
+        if not ocr_setting("FAKE_CPU_BOUND"):
+            time.sleep(seconds)
+            return
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            pass
+
+    def _kept(self, tokens) -> list[dict]:
+        return [it for it in tokens or [] if it["score"] >= self.min_score]
+
+    def run_ocr(self, image_input, preprocess_info=None, cls: bool = False) -> list[dict]:
+        tokens = self._kept(self._corpus.tokens_for(image_input))
+        with stage("det_rec"):
+            self._delay(ocr_setting("FAKE_DET_MS") + ocr_setting("FAKE_REC_MS") * len(tokens))
+        return [dict(it) for it in tokens]
+
+    def detect(self, image_input) -> list[np.ndarray]:
+        tokens = self._corpus.tokens_for(image_input) or []
+        with stage("det"):
+            self._delay(ocr_setting("FAKE_DET_MS"))
+        return [np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float32)
+                for x0, y0, x1, y1 in (it["bbox"] for it in tokens)]
+
+    def upside_down_ratio(self, image_input, boxes, sample: int = 8) -> float:
+        return 0.0
+
+    def recognize(self, image_input, boxes, preprocess_info=None, cls: bool = False) -> list[dict | None]:
+        """박스 안에 중심이 있는 토큰을 x 순서로 이어 붙인다 (핀포인트 ROI 처럼 여러 토큰이 들어가는 박스 포함)"""
+        tokens = self._kept(self._corpus.tokens_for(image_input))
+        with stage("rec"):
+            self._delay(ocr_setting("FAKE_REC_MS") * len(boxes))
+        items: list[dict | None] = []
+        for box in boxes:
+            if np.ndim(box) == 1:
+                rect = tuple(float(v) for v in box)
+            else:
+                pts = np.asarray(box, dtype=np.float32)
+                rect = (float(pts[:, 0].min()), float(pts[:, 1].min()), float(pts[:, 0].max()), float(pts[:, 1].max()))
+            inside = sorted((it for it in tokens
+                             if rect[0] <= it["cx"] <= rect[2] and rect[1] <= it["cy"] <= rect[3]),
+                            key=lambda it: it["cx"])
+            items.append(_token("".join(it["txt"] for it in inside), rect, min(it["score"] for it in inside))
+                         if inside else None)
+        return items
+
+
+def write_token_manifest(out_dir: str, pages: list[dict]) -> dict:
+    """[{file, rows, tokens}] → FakeOcrBackend / ocr_benchmark 가 읽는 manifest.json (codes 는 rows 에서 모은다)"""
+    codes = sorted({row["code"] for page in pages for row in page.get("rows") or [] if row.get("code")})
+    manifest = {"version": 1, "codes": codes, "pages": pages}
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, ensure_ascii=False, indent=1)
+    return manifest
@@ -0,0 +1,111 @@
+# transcripts/ocr_cache.py
+# 페이지 이미지 해시 기반 OCR 결과 캐시.
+#  1) content_hash(sha256) 완전 일치  →  "exact"
+#  2) 같은 사용자의 항목 중 같은 해상도 + dHash 거리 ≤ CACHE_PHASH_DISTANCE 인 후보에서
+#     썸네일 블록 차이 ≤ CACHE_THUMB_MAX_DIFF (재압축된 동일 스크린샷)  →  "perceptual"
+#     같은 양식·같은 화면 크기의 다른 학생 성적표는 썸네일까지 비슷할 수 있으므로 사용자를 넘어 찾지 않는다.
+#  3) 그 외  →  OCR 수행 후 저장, "miss"
+# 캐시된 행은 학수번호 색인으로 보정된 값이므로 키는 (content_hash, PARSER_VERSION, 색인 지문) 이다.
+from django.db.models import F
+
+from .code_index import get_code_index
+from .conf import ocr_setting
+from .hashing import content_hash, perceptual_signature, hamming_distance, thumbnail_diff
+from .models import OcrResultCache, TranscriptPage
+from .ocr_parsing import PARSER_VERSION, build_courses
+from .profiling import stage, token_summary
+from .tokens import pack_tokens
+
+# perceptual 후보로 비교할 최근 캐시 항목 수 (같은 해상도의 기기가 많을 때 상한)
+_PHASH_CANDIDATE_LIMIT = 500
+# dHash 가 가까운 순으로 썸네일까지 비교해 볼 후보 수
+_THUMB_CANDIDATE_LIMIT = 5
+
+
+def _hit(entry: OcrResultCache, page: TranscriptPage) -> list[dict]:
+    OcrResultCache.objects.filter(pk=entry.pk).update(hit_count=F("hit_count") + 1)
+    if entry.tokens and page.ocr_tokens is None:
+        page.ocr_tokens = entry.tokens
+        page.save(update_fields=["ocr_tokens"])
+    return entry.rows
+
+
+def _ocr_and_store_tokens(page: TranscriptPage, ocr_fn, stats: dict | None, code_index) -> list[dict]:
+    tokens = ocr_fn(page.file, stats)
+    if stats is not None:
+        stats.update(token_summary(tokens))
+    with stage("db_write"):
+        page.ocr_tokens = pack_tokens(tokens)
+        page.save(update_fields=["ocr_tokens"])
+    with stage("parse"):
+        return build_courses(tokens, code_index)
+
+
+def cached_parse(page: TranscriptPage, ocr_fn, stats: dict | None = None) -> tuple[list[dict], str]:
+    """
+    캐시를 먼저 조회하고, 없으면 ocr_fn(page.file, stats) 로 토큰을 얻어 파싱한 뒤 저장한다.
+    OCR 토큰은 페이지(ocr_tokens)에도 남겨 파서 수정 후 OCR 없이 다시 파싱할 수 있게 한다.
+    반환: (rows, "exact"|"perceptual"|"miss")
+    """
+    code_index = get_code_index()
+    if not ocr_setting("CACHE_ENABLED"):
+        return _ocr_and_store_tokens(page, ocr_fn, stats, code_index), "miss"
+
+    # 이 기능 이전에 올라온 페이지는 여기서 해시를 채운다
+    if not page.content_hash:
+        page.content_hash = content_hash(page.file)
+        page.save(update_fields=["content_hash"])
+
+    # 조회 시간(해시/썸네일 계산 포함)은 cache_lookup 단계로 집계
+    width = height = thumbnail = None
+    user_id = page.transcript.user_id
+    with stage("cache_lookup"):
+        entries = OcrResultCache.objects.filter(parser_version=PARSER_VERSION, catalog_version=code_index.version)
+        exact = entries.filter(content_hash=page.content_hash).first()
+        if exact:
+            return _hit(exact, page), "exact"
+
+        sig = perceptual_signature(page.file.path)
+        if sig:
+            page.phash, thumbnail, width, height = sig
+            page.save(update_fields=["phash"])
+            candidates = (entries.filter(user_id=user_id, image_width=width, image_height=height)
+                                 .exclude(phash="")
+                                 .order_by("-updated_at")
+                                 .values_list("pk", "phash")[:_PHASH_CANDIDATE_LIMIT])
+            max_distance = ocr_setting("CACHE_PHASH_DISTANCE")
+            near = sorted((d, pk) for pk, h in candidates
+                          if (d := hamming_distance(page.phash, h)) <= max_distance)
+            for _, pk in near[:_THUMB_CANDIDATE_LIMIT]:
+                entry = OcrResultCache.objects.get(pk=pk)
+                if entry.thumbnail and thumbnail_diff(entry.thumbnail, thumbnail) <= ocr_setting("CACHE_THUMB_MAX_DIFF"):
+                    return _hit(entry, page), "perceptual"
+
+    rows = _ocr_and_store_tokens(page, ocr_fn, stats, code_index)
+    with stage("db_write"):
+        OcrResultCache.objects.update_or_create(
+            content_hash=page.content_hash, parser_version=PARSER_VERSION, catalog_version=code_index.version,
+            defaults={"phash": page.phash, "thumbnail": thumbnail, "tokens": page.ocr_tokens, "user_id": user_id,
+                      "image_width": width, "image_height": height, "rows": rows},
+        )
+    return rows, "miss"
+
+
+def store_reparsed(page: TranscriptPage, rows: list[dict], code_index):
+    """
+    저장된 토큰을 code_index 로 다시 파싱한 결과를 현재 (PARSER_VERSION, 색인 지문) 캐시로 등록
+    (이전 버전 항목의 썸네일은 재사용)
+    """
+    if not page.content_hash:
+        return
+    previous = (OcrResultCache.objects.filter(content_hash=page.content_hash)
+                                      .exclude(parser_version=PARSER_VERSION, catalog_version=code_index.version)
+                                      .order_by("-updated_at").first())
+    defaults = {"phash": page.phash, "tokens": page.ocr_tokens, "rows": rows, "user_id": page.transcript.user_id}
+    if previous:
+        defaults.update(thumbnail=previous.thumbnail,
+                        image_width=previous.image_width, image_height=previous.image_height)
+    OcrResultCache.objects.update_or_create(
+        content_hash=page.content_hash, parser_version=PARSER_VERSION, catalog_version=code_index.version,
+        defaults=defaults,
+    )
@@ -0,0 +1,302 @@
+# ocr_parsing.py
+# OCR 결과(텍스트 토큰)를 해석하는 순수 파이썬 헬퍼 모음.
+# paddle / cv2 를 import 하지 않으므로 웹 프로세스(views 등)에서도 가볍게 사용할 수 있다.
+
+import re
+import statistics
+from collections import defaultdict
+
+from .code_index import LOOSE_DISTANCE
+
+# 파싱 결과 캐시(OcrResultCache)의 버전 키.
+# 행 그룹화/코드·성적 추출 등 결과가 달라지는 변경을 하면 반드시 올릴 것 → 이전 캐시는 자동으로 무시된다.
+PARSER_VERSION = "4"
+
+# --- 상수 및 정규식 정의 ---
+FOOTERS = {"신청학점", "전체성적", "취득학점", "증명평점", "백점만점환산점수", "평점", "평균", "이수구분"}
+_TERM_ANY = re.compile(r'(?P<y>\d{4})\s*학년도.*?(?P<g>\d)\s*학년.*?(?P<s>\d)\s*학기')
+PLUS_CANDS = {"+", "＋", "﹢", "十", "†", "ᐩ", "t", "T"}
+ZERO_CANDS = {"0", "O", "〇", "○", "◯"}
+
+
+# --- 헬퍼 함수 ---
+def _find_code_in_tok(tok: str) -> str | None:
+    s = tok.strip().upper().replace('O','0').replace('I','1').replace('L','1').replace('G','6')
+    match = re.search(r'(\d{6})', s)
+    return match.group(1) if match else None
+
+def _extract_grade_from_tokens(tokens: list[str]) -> str | None:
+    if not tokens: return None
+    text = "".join(tokens).upper().replace(" ", "")
+    for char in PLUS_CANDS: text = text.replace(char, "+")
+    for char in ZERO_CANDS: text = text.replace(char, "0")
+    perfect_match = re.search(r"([ABCDF])([+0])", text)
+    if perfect_match: return perfect_match.group(0)
+    if "P" in text: return "P"
+    single_char_match = re.search(r"([ABCDF])", text)
+    if single_char_match: return single_char_match.group(1) + "+"
+    return None
+
+def _extract_retake_from_tokens(tokens: list[str]) -> bool:
+    s = "".join(tokens).replace(' ', '')
+    return '재수강' in s or 'Y' in s
+
+def _parse_semester(term_str: str) -> str:
+    if not term_str: return "기타"
+    m = re.search(r'(\d)\s*학년(?!도).*?(\d)\s*학기', term_str)
+    if m: return f"{m.group(1)}-{m.group(2)}"
+    return "기타"
+
+def _match_header_key(txt: str) -> str | None:
+    s = re.sub(r'\s+', '', txt)
+    if '학수' in s and ('번' in s or '번호' in s): return '학수번호'
+    if '재수강' in s: return '재수강'
+    if s.startswith('성적') or s == '등급': return '성적'
+    if '과목' in s: return '과목명'
+    if s == '학점': return '학점'
+    return None
+
+
+# --- 페이지 구조 해석: OCR 토큰 스트림 → 과목 행 ---
+# 토큰 스트림(dict)은 custom_paddle_ocr_script.ocr_page_tokens() 가 만든다.
+#   raw      : 원본 이미지 인식 결과 (학기 문자열, 헤더/열 위치 파악용)
+#   content  : 헤더 아래 과목 행 토큰 (1차 인식만으로 확정된 행은 원본 인식 결과, 나머지는 전처리 재인식 결과)
+#   pinpoint : 행별 학수번호 열 ROI 인식 결과 (bbox = ROI)
+# OCR 없이 저장된 토큰만으로 다시 파싱할 수 있도록 이 단계는 순수 파이썬으로 유지한다.
+PINPOINT_HALF_W, PINPOINT_HALF_H = 40, 12
+# 행 묶기: 토큰 중심 y 가 현재 행 중심에서 (텍스트 높이 × 이 비율) 이내면 같은 행
+ROW_JOIN_RATIO = 0.5
+
+def _find_header(raw_items: list[dict]) -> dict | None:
+    return next((it for it in raw_items if _match_header_key(it["txt"]) == '학수번호'), None)
+
+def table_top(header: dict | None) -> float:
+    """과목 행이 시작되는 y (헤더 줄의 아래쪽 끝)"""
+    return header['cy'] + header['h'] * ROW_JOIN_RATIO if header else 0
+
+def _page_semester(raw_items: list[dict]) -> str:
+    full_text = " ".join(it['txt'] for it in raw_items)
+    term_match = _TERM_ANY.search(full_text)
+    return _parse_semester(term_match.group(0)) if term_match else "기타"
+
+def _term_lines(items: list[dict]) -> list[tuple[float, str]]:
+    """학기 문자열이 있는 줄의 (y, 'g-s') 목록, 위에서부터 (스크롤 캡처처럼 한 페이지에 학기가 여러 개인 경우)"""
+    lines = []
+    for row in group_rows(items, None):
+        term_match = _TERM_ANY.search(_row_text(row))
+        if term_match:
+            lines.append((_row_y(row), _parse_semester(term_match.group(0))))
+    return lines
+
+def _semester_for_row(y: float, term_lines: list[tuple[float, str]], default: str) -> str:
+    """행 바로 위의 가장 가까운 학기 줄 (없으면 페이지 학기)"""
+    above = [semester for term_y, semester in term_lines if term_y < y]
+    return above[-1] if above else default
+
+def _row_text(row_items: list[dict]) -> str:
+    return " ".join(it['txt'] for it in row_items)
+
+def _row_y(row_items: list[dict]) -> float:
+    return sum(it['cy'] for it in row_items) / len(row_items)
+
+def group_rows(content_items: list[dict], header: dict | None) -> list[list[dict]]:
+    """cy 순으로 훑으며, 현재 행 중심과의 거리가 텍스트 높이의 절반 이내인 토큰을 같은 행으로 묶는다"""
+    top = table_top(header)
+    data_items = sorted((it for it in content_items if it['cy'] > top), key=lambda it: it['cy'])
+    rows: list[list[dict]] = []
+    for item in data_items:
+        if rows:
+            row = rows[-1]
+            row_h = max(max(it['h'] for it in row), item['h'], 1)
+            if item['cy'] - _row_y(row) <= row_h * ROW_JOIN_RATIO:
+                row.append(item)
+                continue
+        rows.append([item])
+    return [sorted(row_items, key=lambda x: x['cx']) for row_items in rows]
+
+def _header_line(raw_items: list[dict], header: dict) -> list[dict]:
+    """헤더(학수번호)와 같은 줄에 있는 토큰들 (왼쪽부터)"""
+    return sorted((it for it in raw_items
+                   if abs(it['cy'] - header['cy']) <= max(it['h'], header['h']) * ROW_JOIN_RATIO),
+                  key=lambda it: it['cx'])
+
+def find_columns(raw_items: list[dict], header: dict | None) -> list[dict]:
+    """
+    헤더 줄의 토큰들로 열 경계를 만든다. 이웃한 헤더 토큰 사이의 중간이 경계이며,
+    첫 열/마지막 열은 페이지 끝까지 연장한다. 반환: [{key, cx, x0, x1}, ...] (왼쪽부터)
+    """
+    if not header: return []
+    heads = _header_line(raw_items, header)
+    columns = []
+    for i, it in enumerate(heads):
+        x0 = (heads[i - 1]['bbox'][2] + it['bbox'][0]) / 2 if i > 0 else float('-inf')
+        x1 = (it['bbox'][2] + heads[i + 1]['bbox'][0]) / 2 if i + 1 < len(heads) else float('inf')
+        columns.append({"key": _match_header_key(it['txt']) or it['txt'], "cx": it['cx'], "x0": x0, "x1": x1})
+    return columns
+
+def assign_cells(row_items: list[dict], columns: list[dict]) -> dict[str, list[dict]]:
+    """행의 토큰을 x 겹침이 가장 큰 열에 배정 (겹침이 같으면 헤더 중심에 가까운 열)"""
+    cells = defaultdict(list)
+    if not columns: return cells
+    for it in row_items:
+        x0, x1 = it['bbox'][0], it['bbox'][2]
+        col = max(columns, key=lambda c: (min(x1, c['x1']) - max(x0, c['x0']), -abs(it['cx'] - c['cx'])))
+        cells[col['key']].append(it)
+    return cells
+
+def row_fields(row_items: list[dict], columns: list[dict], code_index=None) -> dict:
+    """
+    행에서 학수번호/성적/재수강 필드를 읽는다. 해당 열 셀이 있으면 셀만, 없으면 행 전체 텍스트를 본다.
+      code     : 색인으로 확정된 코드 (색인이 없거나 확정 못 하면 None)
+      raw_code : 텍스트에서 찾은 6자리 숫자 (보정 전)
+    """
+    cells = assign_cells(row_items, columns)
+    code_cell = cells.get('학수번호') or row_items
+    code = None
+    if code_index:
+        code = code_index.snap(_row_text(code_cell)) or code_index.snap(_row_text(row_items))
+    raw_code = _find_code_in_tok(_row_text(code_cell)) or _find_code_in_tok(_row_text(row_items))
+    grade_cell = cells.get('성적') or row_items
+    if any(c['key'] == '재수강' for c in columns):
+        retake = _extract_retake_from_tokens([it['txt'] for it in cells.get('재수강', [])])
+    else:
+        retake = _extract_retake_from_tokens([it['txt'] for it in row_items])
+    return {
+        "code": code,
+        "raw_code": raw_code,
+        "grade": _extract_grade_from_tokens([it['txt'] for it in grade_cell]),
+        "retake": retake,
+    }
+
+def page_layout(raw_items: list[dict], header: dict, row_list: list[list[dict]], width: int) -> dict:
+    """헤더를 찾은 페이지의 양식 (LayoutTemplate.layout 형식, 모든 값은 페이지 폭 대비 비율)"""
+    pitches = [_row_y(b) - _row_y(a) for a, b in zip(row_list, row_list[1:])]
+    return {
+        "heads": [{"txt": it['txt'], "x0": it['bbox'][0] / width, "x1": it['bbox'][2] / width}
+                  for it in _header_line(raw_items, header)],
+        "header_h": header['h'] / width,
+        "row_pitch": statistics.median(pitches) / width if pitches else None,
+    }
+
+def layout_header_tokens(layout: dict, width: int) -> list[dict]:
+    """
+    헤더 줄이 없는 페이지(표가 이어지는 다음 장)용: 템플릿의 헤더 토큰을 페이지 위쪽 바깥(y < 0)에 복원한다.
+    raw 스트림에 넣어 두면 build_courses 가 같은 열 경계로 해석하고, 저장된 토큰만으로 다시 파싱할 수 있다.
+    """
+    h = layout["header_h"] * width
+    return [{"txt": head["txt"], "bbox": (head["x0"] * width, -h, head["x1"] * width, 0.0),
+             "cx": (head["x0"] + head["x1"]) * width / 2, "cy": -h / 2, "h": h, "score": 0.0}
+            for head in layout["heads"]]
+
+def pinpoint_rois(row_list: list[list[dict]], header: dict | None) -> list[tuple]:
+    """행마다 학수번호 열 주변 (x0, y0, x1, y1) ROI"""
+    if not header: return []
+    col_x_code = header['cx']
+    return [(col_x_code - PINPOINT_HALF_W, _row_y(r) - PINPOINT_HALF_H,
+             col_x_code + PINPOINT_HALF_W, _row_y(r) + PINPOINT_HALF_H) for r in row_list]
+
+def rows_needing_pinpoint(row_list: list[list[dict]], code_index=None, columns=None) -> list[list[dict]]:
+    """학수번호 색인(code_index.CodeIndex)으로 행 텍스트만으로 코드를 확정할 수 없는 행만 남긴다"""
+    if not code_index: return row_list
+    return [r for r in row_list if not row_fields(r, columns or [], code_index)["code"]]
+
+def row_needs_escalation(row_items: list[dict], score_threshold: float, code_index=None, columns=None) -> bool:
+    """점수가 낮은 토큰이 있거나 코드/성적을 읽어낼 수 없는 행은 다시(전처리 또는 정밀 프로필로) 인식해야 한다"""
+    if min(it['score'] for it in row_items) < score_threshold:
+        return True
+    fields = row_fields(row_items, columns or [], code_index)
+    return not (fields["code"] or fields["raw_code"]) or not fields["grade"]
+
+def _pinpoint_code_for_row(row_items: list[dict], pinpoint_items: list[dict]) -> str | None:
+    y = _row_y(row_items)
+    near = [it for it in pinpoint_items if abs(it['cy'] - y) <= PINPOINT_HALF_H]
+    best = min(near, key=lambda it: abs(it['cy'] - y), default=None)
+    return _find_code_in_tok(best['txt']) if best else None
+
+def build_courses(tokens: dict[str, list[dict]], code_index=None) -> list[dict]:
+    """
+    토큰 스트림 → 과목 행. 헤더 줄로 열 경계를 잡고, 행의 토큰을 열에 배정해 필드를 읽는다.
+    code_index 가 주어지면 학수번호를 실제 코드로 보정한다.
+      1) 학수번호 셀(없으면 행 텍스트)의 코드가 색인과 일치(또는 혼동 쌍 한 글자 차이로 유일)하면 그대로 확정
+      2) 아니면 핀포인트 결과(더 느슨하게 보정) → 3) 셀/행 텍스트의 6자리 숫자 순으로 사용
+    """
+    raw_items = tokens.get("raw") or []
+    if not raw_items: return []
+
+    current_semester = _page_semester(raw_items)
+    header = _find_header(raw_items)
+    columns = find_columns(raw_items, header)
+    content_items = tokens.get("content") or []
+    pinpoint_items = tokens.get("pinpoint") or []
+    term_lines = _term_lines(raw_items + content_items)
+
+    courses = []
+    for row_items in group_rows(content_items, header):
+        fields = row_fields(row_items, columns, code_index)
+        code = fields["code"]
+
+        if not code and header:
+            code = _pinpoint_code_for_row(row_items, pinpoint_items)
+            if code and code_index:
+                code = code_index.snap(code, LOOSE_DISTANCE) or code
+
+        # 핀포인트 실패 시, 기존 방식으로 다시 탐색
+        if not code:
+            code = fields["raw_code"]
+
+        if not code:
+            continue
+
+        courses.append({
+            "code": code,
+            "grade": fields["grade"] or "",
+            "retake": fields["retake"],
+            "semester": _semester_for_row(_row_y(row_items), term_lines, current_semester),
+        })
+
+    return dedupe_courses(courses)
+
+def dedupe_courses(courses: list[dict]) -> list[dict]:
+    """같은 과목 행이 두 번 읽힌 경우(타일 겹침 등) (학수번호, 학기) 기준으로 하나만 남긴다. 성적이 읽힌 쪽 우선"""
+    seen: dict[tuple, dict] = {}
+    for c in courses:
+        key = (c["code"], c["semester"])
+        if key not in seen or (not seen[key]["grade"] and c["grade"]):
+            seen[key] = c
+    return list(seen.values())
+
+def merge_pages(page_rows: list[list[dict] | None]) -> list[dict]:
+    """
+    페이지별 과목 행(TranscriptPage.parsed_rows)을 페이지 순서대로 이어 붙여 성적표 parsed_data 를 만든다.
+    페이지를 추가/교체하면 같은 학기 화면이 겹칠 수 있으므로 (학수번호, 학기) 기준으로 한 번 더 중복 제거.
+    finalize_transcript 와 reparse_transcripts 가 같은 결과를 내도록 둘 다 이 함수를 쓴다.
+    """
+    return dedupe_courses([row for rows in page_rows for row in rows or []])
+
+
+# --- 최종 출력 포맷터 ---
+def rows_to_text(courses: list[dict], group_by_term: bool = True) -> str:
+    if not courses: return "파싱된 데이터가 없습니다."
+    if not group_by_term:
+        lines = []
+        for c in courses:
+            parts = [c.get('semester',''), c.get('code',''), c.get('grade',''), '재수강' if c.get('retake') else '']
+            lines.append(" ".join(filter(None, parts)).strip())
+        return "\n".join(lines)
+    grouped = defaultdict(list)
+    for c in courses:
+        grouped[c.get('semester', '기타')].append(c)
+    def semester_sort_key(sem):
+        try:
+            year, term = map(int, str(sem).split('-'))
+            return (year, term)
+        except (ValueError, IndexError): return (99, 9)
+    sorted_semesters = sorted(grouped.keys(), key=semester_sort_key)
+    blocks = []
+    for semester in sorted_semesters:
+        lines = [f"--- {semester} 학기 ---"]
+        for c in grouped[semester]:
+            parts = [c.get('code',''), c.get('grade',''), '재수강' if c.get('retake') else '']
+            lines.append(" ".join(filter(None, parts)).strip())
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
@@ -0,0 +1,331 @@
+# transcripts/ocr_server.py
+# 노드당 하나의 OCR 추론 서버 (ocr_server 명령).
+# prefork 워커마다 det/rec/cls 모델을 따로 올리면 메모리가 동시성에 비례해 늘어나므로, 모델은 이 서버만 갖고
+# 워커는 RemoteOcrBackend(conf BACKEND)로 요청만 보낸다 → 같은 메모리로 워커 동시성을 훨씬 높일 수 있다.
+#  - 전송: Unix 소켓(SERVER_SOCKET)에 길이(4byte) + JSON. 이미지는 직렬화하지 않고 multiprocessing.shared_memory
+#    블록 이름만 보낸다. 클라이언트는 페이지 이미지를 한 번 복사해 두고 같은 페이지의 이후 요청에 블록을 재사용한다.
+#  - 실행: 프로필마다 엔진 하나와 그 엔진만 쓰는 추론 스레드 하나 (paddle 예측기는 스레드 간에 공유하지 않는다).
+#    crop 자르기/전처리는 요청 스레드에서 병렬로 하고, 인식은 SERVER_BATCH_WAIT_MS 동안 모인 여러 요청의 crop 을
+#    recognize_crops() 한 번으로 처리한다 (엔진이 recognize_crops 를 제공할 때. 없으면 요청마다 recognize()).
+import collections
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from .conf import ocr_setting
+from .profiling import stage
+
+_HEADER = struct.Struct("!I")
+
+
+# --- 메시지 ---
+def _json_default(obj):
+    return obj.tolist() if hasattr(obj, "tolist") else str(obj)
+
+
+def _send(sock, payload: dict):
+    data = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock, size: int) -> bytes | None:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return bytes(buf)
+
+
+def _recv(sock) -> dict | None:
+    """메시지 하나. 상대가 연결을 닫았으면 None"""
+    head = _recv_exact(sock, _HEADER.size)
+    if head is None:
+        return None
+    body = _recv_exact(sock, _HEADER.unpack(head)[0])
+    return None if body is None else json.loads(body.decode("utf-8"))
+
+
+# --- 서버 ---
+class _EngineRunner:
+    """프로필 하나의 엔진과 전용 추론 스레드. 엔진 호출은 모두 이 스레드에서만 일어난다"""
+
+    def __init__(self, profile: str):
+        from . import custom_paddle_ocr_script as ocr_script
+
+        self.profile = profile
+        self.engine = ocr_script._build_engine(profile, ocr_setting("SERVER_BACKEND"))
+        self.batched = callable(getattr(self.engine, "recognize_crops", None))
+        self.stats = {"calls": 0, "rec_requests": 0, "rec_batches": 0, "rec_crops": 0}
+        self._jobs: queue.Queue = queue.Queue()
+        self._held: collections.deque = collections.deque()
+        threading.Thread(target=self._loop, name=f"ocr-{profile}", daemon=True).start()
+
+    def call(self, fn):
+        """fn(engine) 을 추론 스레드에서 실행하고 결과를 기다린다"""
+        future = Future()
+        self._jobs.put(("call", fn, future))
+        return future.result()
+
+    def recognize(self, image, boxes, preprocess_info=None, cls: bool = False) -> list[dict | None]:
+        if not self.batched:
+            return self.call(lambda engine: engine.recognize(image, boxes, preprocess_info=preprocess_info, cls=cls))
+        crops, valid = self.engine.prepare_crops(image, boxes, preprocess_info)
+        if not crops:
+            return [None] * len(boxes)
+        future = Future()
+        self._jobs.put(("rec", (crops, cls), future))
+        return self.engine.rec_items(len(boxes), valid, future.result())
+
+    def _loop(self):
+        while True:
+            kind, arg, future = self._held.popleft() if self._held else self._jobs.get()
+            if kind == "call":
+                self.stats["calls"] += 1
+                self._resolve([future], lambda: [arg(self.engine)])
+                continue
+            # 같은 cls 인 인식 요청을 SERVER_MAX_BATCH crop 까지, 최대 SERVER_BATCH_WAIT_MS 동안 모은다
+            cls = arg[1]
+            batch = [(arg[0], future)]
+            size = len(arg[0])
+            deadline = time.perf_counter() + ocr_setting("SERVER_BATCH_WAIT_MS") / 1000
+            while size < ocr_setting("SERVER_MAX_BATCH"):
+                remaining = deadline - time.perf_counter()
+                try:
+                    job = self._jobs.get(timeout=remaining) if remaining > 0 else self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job[0] != "rec" or job[1][1] != cls:
+                    self._held.append(job)
+                    break
+                batch.append((job[1][0], job[2]))
+                size += len(job[1][0])
+            self.stats["rec_requests"] += len(batch)
+            self.stats["rec_batches"] += 1
+            self.stats["rec_crops"] += size
+            self._resolve([f for _, f in batch], lambda: self._split(batch, cls))
+
+    def _split(self, batch, cls: bool) -> list[list]:
+        results = self.engine.recognize_crops([crop for crops, _ in batch for crop in crops], cls)
+        out, start = [], 0
+        for crops, _ in batch:
+            out.append(results[start:start + len(crops)])
+            start += len(crops)
+        return out
+
+    @staticmethod
+    def _resolve(futures: list[Future], fn):
+        try:
+            results = fn()
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """클라이언트가 만든 블록 열기. 블록 삭제는 만든 쪽 책임이므로 이 프로세스의 resource_tracker 에서는 뺀다"""
+    shm = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _close(shm: shared_memory.SharedMemory | None):
+    if shm is None:
+        return
+    try:
+        shm.close()
+    except BufferError:   # 아직 남은 배열 view 가 있으면 GC 가 정리한다
+        pass
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """연결 하나 = 워커(스레드) 하나. 마지막으로 연 공유 메모리 블록을 같은 페이지 요청 동안 유지한다"""
+
+    def handle(self):
+        shm = None
+        try:
+            while True:
+                request = _recv(self.request)
+                if request is None:
+                    return
+                try:
+                    image = None
+                    if request.get("image"):
+                        ref = request["image"]
+                        if shm is None or shm.name != ref["shm"]:
+                            _close(shm)
+                            shm = _attach(ref["shm"])
+                        image = np.ndarray(tuple(ref["shape"]), dtype=ref["dtype"], buffer=shm.buf)
+                    result = self.server.dispatch(request, image)
+                    del image
+                    _send(self.request, {"result": result})
+                except Exception as e:
+                    _send(self.request, {"error": f"{type(e).__name__}: {e}"})
+        finally:
+            _close(shm)
+
+
+class OcrServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, profiles=("accurate",)):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _Handler)
+        self.started = time.time()
+        self._runners: dict[str, _EngineRunner] = {}
+        self._runners_lock = threading.Lock()
+        for profile in profiles:
+            self.runner(profile)
+
+    def runner(self, profile: str) -> _EngineRunner:
+        if profile not in self._runners:
+            with self._runners_lock:
+                if profile not in self._runners:
+                    self._runners[profile] = _EngineRunner(profile)
+        return self._runners[profile]
+
+    def dispatch(self, request: dict, image):
+        op = request["op"]
+        if op == "stats":
+            return {"pid": os.getpid(), "uptime_s": round(time.time() - self.started, 1),
+                    "profiles": {name: dict(r.stats, batched=r.batched) for name, r in self._runners.items()}}
+        runner = self.runner(request["profile"])
+        preprocess_info, cls = request.get("preprocess_info"), bool(request.get("cls"))
+        if op == "detect":
+            return runner.call(lambda engine: engine.detect(image))
+        if op == "recognize":
+            boxes = [np.asarray(b, dtype=np.float32) for b in request["boxes"]]
+            return runner.recognize(image, boxes, preprocess_info, cls)
+        if op == "run_ocr":
+            return runner.call(lambda engine: engine.run_ocr(image, preprocess_info=preprocess_info, cls=cls))
+        if op == "upside_down_ratio":
+            boxes = [np.asarray(b, dtype=np.float32) for b in request["boxes"]]
+            return runner.call(lambda engine: engine.upside_down_ratio(image, boxes, request.get("sample", 8)))
+        raise ValueError(f"알 수 없는 요청: {op}")
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+# --- 클라이언트 ---
+def _free_block(shm: shared_memory.SharedMemory, pid: int):
+    # fork 된 자식이 부모의 블록을 지우지 않도록 만든 프로세스에서만 삭제
+    if os.getpid() != pid:
+        return
+    _close(shm)
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def server_request(payload: dict, socket_path: str | None = None) -> dict:
+    """이미지 없는 단발 요청 (예: {"op": "stats"})"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(ocr_setting("SERVER_TIMEOUT"))
+        sock.connect(socket_path or ocr_setting("SERVER_SOCKET"))
+        _send(sock, payload)
+        response = _recv(sock)
+    if response is None or "error" in response:
+        raise RuntimeError(f"OCR 서버 오류: {response and response['error']}")
+    return response["result"]
+
+
+class RemoteOcrBackend:
+    """모델 없이 추론 서버에 요청하는 OcrBackend. 결과 필터(MIN_SCORE 등)는 서버 설정을 따른다"""
+
+    def __init__(self, lang: str = "korean", min_score: float = 0.15, profile: str = "accurate", **kwargs):
+        self.lang = lang
+        self.min_score = float(min_score)
+        self.profile = profile
+        self._sock = None
+        self._lock = threading.Lock()
+        # 공유 메모리에 올린 마지막 이미지 (같은 배열로 오는 이후 요청은 복사 없이 블록 재사용)
+        self._image = None
+        self._shm = None
+        self._free = None
+
+    def _image_ref(self, image) -> dict:
+        if image is not self._image:
+            self._release_image()
+            data = np.ascontiguousarray(image)
+            shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+            np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)[...] = data
+            self._image, self._shm = image, shm
+            self._free = weakref.finalize(self, _free_block, shm, os.getpid())
+        return {"shm": self._shm.name, "shape": list(image.shape), "dtype": str(image.dtype)}
+
+    def _release_image(self):
+        if self._free is not None:
+            self._free()
+        self._image = self._shm = self._free = None
+
+    def _close_socket(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _call(self, op: str, image, **fields):
+        with self._lock:
+            request = {"op": op, "profile": self.profile, "image": self._image_ref(image), **fields}
+            # 서버가 재시작된 경우를 위해 한 번만 다시 연결해 본다
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                        self._sock.settimeout(ocr_setting("SERVER_TIMEOUT"))
+                        self._sock.connect(ocr_setting("SERVER_SOCKET"))
+                    _send(self._sock, request)
+                    response = _recv(self._sock)
+                    if response is None:
+                        raise ConnectionError("OCR 서버가 연결을 닫았습니다.")
+                    break
+                except OSError:
+                    self._close_socket()
+                    if attempt:
+                        raise
+        if "error" in response:
+            raise RuntimeError(f"OCR 서버 오류: {response['error']}")
+        return response["result"]
+
+    @staticmethod
+    def _items(result: list) -> list:
+        for it in result:
+            if it:
+                it["bbox"] = tuple(it["bbox"])
+        return result
+
+    def detect(self, image_input) -> list[np.ndarray]:
+        with stage("det"):
+            boxes = self._call("detect", image_input)
+        return [np.asarray(b, dtype=np.float32) for b in boxes]
+
+    def recognize(self, image_input, boxes, preprocess_info=None, cls: bool = False) -> list[dict | None]:
+        with stage("rec"):
+            return self._items(self._call("recognize", image_input, boxes=list(boxes),
+                                          preprocess_info=preprocess_info, cls=cls))
+
+    def run_ocr(self, image_input, preprocess_info=None, cls: bool = False) -> list[dict]:
+        with stage("det_rec"):
+            return self._items(self._call("run_ocr", image_input, preprocess_info=preprocess_info, cls=cls))
+
+    def upside_down_ratio(self, image_input, boxes, sample: int = 8) -> float:
+        with stage("cls"):
+            return self._call("upside_down_ratio", image_input, boxes=list(boxes), sample=sample)
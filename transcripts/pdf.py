@@ -0,0 +1,122 @@
+# transcripts/pdf.py
+# PDF 성적표 처리 (PyMuPDF).
+# 포털에서 내려받은 PDF 는 텍스트 레이어가 있으므로, OCR 없이 단어 좌표를 그대로 OCR 토큰 형식으로 만들어
+# 같은 행/열 파서(ocr_parsing.build_courses)에 넣는다. 텍스트가 없는(스캔본) 페이지만 이미지로 렌더링해 OCR 한다.
+#  - 업로드 시: 여러 쪽 PDF 는 한 쪽짜리 PDF 로 나눠 TranscriptPage 하나씩 만든다 (split_pdf)
+#  - 워커에서: text_layer_tokens() 가 None 이면 render_page() 결과 이미지를 OCR
+import os
+import tempfile
+
+from django.core.files.base import ContentFile
+
+from .conf import ocr_setting
+
+PDF_MAGIC = b"%PDF-"
+# 같은 줄의 단어 사이 간격이 글자 높이(전각 공백 ≈ 1)의 이 비율 이하면 한 토큰으로 합친다 (OCR 검출 박스와 비슷한 단위)
+WORD_JOIN_GAP = 1.0
+
+
+def is_pdf(file_obj) -> bool:
+    """업로드 파일/FieldFile 이 PDF 인지 (확장자 또는 파일 시그니처)"""
+    if (getattr(file_obj, "name", "") or "").lower().endswith(".pdf"):
+        return True
+    file_obj.seek(0)
+    head = file_obj.read(len(PDF_MAGIC))
+    file_obj.seek(0)
+    return head == PDF_MAGIC
+
+
+def is_pdf_path(path: str) -> bool:
+    with open(path, "rb") as fh:
+        return fh.read(len(PDF_MAGIC)) == PDF_MAGIC
+
+
+def _open(data: bytes):
+    import fitz
+    return fitz.open(stream=data, filetype="pdf")
+
+
+def split_pdf(file_obj) -> list[ContentFile]:
+    """여러 쪽 PDF → 한 쪽짜리 PDF 파일 목록 (TranscriptPage.file 로 저장)"""
+    import fitz
+
+    file_obj.seek(0)
+    doc = _open(file_obj.read())
+    file_obj.seek(0)
+    stem = os.path.splitext(os.path.basename(file_obj.name or "transcript.pdf"))[0]
+    parts = []
+    for i in range(doc.page_count):
+        one = fitz.open()
+        one.insert_pdf(doc, from_page=i, to_page=i)
+        parts.append(ContentFile(one.tobytes(), name=f"{stem}_p{i + 1}.pdf"))
+    return parts
+
+
+def _merge_line_words(words: list[tuple]) -> list[tuple[float, float, float, float, str]]:
+    """get_text("words") 결과를 (block, line) 별로 묶고, 가까운 단어끼리 합친다"""
+    lines: dict[tuple, list] = {}
+    for x0, y0, x1, y1, text, block, line, _ in words:
+        lines.setdefault((block, line), []).append([x0, y0, x1, y1, text])
+    merged = []
+    for line_words in lines.values():
+        line_words.sort(key=lambda w: w[0])
+        cur = line_words[0]
+        for w in line_words[1:]:
+            if w[0] - cur[2] <= max(cur[3] - cur[1], w[3] - w[1]) * WORD_JOIN_GAP:
+                cur = [cur[0], min(cur[1], w[1]), w[2], max(cur[3], w[3]), f"{cur[4]} {w[4]}"]
+            else:
+                merged.append(tuple(cur))
+                cur = w
+        merged.append(tuple(cur))
+    return merged
+
+
+def text_layer_tokens(path: str) -> dict[str, list[dict]] | None:
+    """
+    한 쪽짜리 PDF 의 텍스트 레이어 → 토큰 스트림 {"raw", "content", "pinpoint"}.
+    좌표는 렌더링 이미지(PDF_RENDER_DPI)와 같은 px 단위. 텍스트가 없으면 None (스캔본 → OCR 필요).
+    """
+    with open(path, "rb") as fh:
+        doc = _open(fh.read())
+    if not doc.page_count:
+        return None
+    words = doc[0].get_text("words")
+    if not any(w[4].strip() for w in words):
+        return None
+
+    scale = ocr_setting("PDF_RENDER_DPI") / 72.0
+    items = []
+    for x0, y0, x1, y1, text in _merge_line_words(words):
+        bbox = (x0 * scale, y0 * scale, x1 * scale, y1 * scale)
+        items.append({"txt": text.strip(), "bbox": bbox,
+                      "cx": (bbox[0] + bbox[2]) / 2.0, "cy": (bbox[1] + bbox[3]) / 2.0,
+                      "h": bbox[3] - bbox[1], "score": 1.0})
+    # 텍스트 레이어는 인식 오류가 없으므로 구조 파악(raw)과 과목 행(content)에 같은 토큰을 쓴다
+    return {"raw": items, "content": [dict(it) for it in items], "pinpoint": []}
+
+
+def render_page(path: str) -> str:
+    """스캔본 PDF 쪽을 PNG 로 렌더링해 임시 파일 경로를 돌려준다 (호출한 쪽에서 삭제)"""
+    with open(path, "rb") as fh:
+        doc = _open(fh.read())
+    pix = doc[0].get_pixmap(dpi=ocr_setting("PDF_RENDER_DPI"))
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
+        tmp.write(pix.tobytes("png"))
+        return tmp.name
+
+
+def pdf_triage(file_obj) -> dict:
+    """업로드 사전 점검 (triage.triage_image 와 같은 형식). 열 수 있고 쪽이 있는지만 본다"""
+    file_obj.seek(0)
+    data = file_obj.read()
+    file_obj.seek(0)
+    try:
+        doc = _open(data)
+    except Exception:
+        return {"ok": False, "error": "PDF 파일을 열 수 없습니다.", "flags": [], "metrics": {}}
+    if not doc.page_count:
+        return {"ok": False, "error": "PDF 에 페이지가 없습니다.", "flags": [], "metrics": {}}
+    text_pages = sum(1 for page in doc if page.get_text("text").strip())
+    flags = [] if text_pages == doc.page_count else ["pdf_scanned"]   # 스캔본 쪽은 OCR 로 처리
+    return {"ok": True, "error": None, "flags": flags,
+            "metrics": {"pdf_pages": doc.page_count, "pdf_text_pages": text_pages}}
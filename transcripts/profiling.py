@@ -0,0 +1,115 @@
+# transcripts/profiling.py
+# 성적표 처리 파이프라인 프로파일.
+#  - 페이지: process_transcript_page 가 profiled(stats) 로 감싼 구간 안의 stage("det") 등 시간을 {name}_ms / {name}_calls 로 누적
+#    → TranscriptPage.profile 에 저장 (decode, preprocess, det, rec, det_rec, cls, pinpoint, parse, db_write, ...)
+#  - 성적표: Transcript.enqueued_at / started_at / finished_at 으로 큐 대기·전체 처리 시간
+#  - 집계: profile_report() 가 p50/p95 를 계산 (staff API, 워커 대수 산정용)
+# 단계가 겹치면 바깥 단계에만 시간이 쌓인다 (예: 핀포인트 안의 인식 시간은 pinpoint 로만 집계).
+# {name}_calls 는 stage 진입 횟수가 아니라 처리 단위 수: 여러 단위를 한 번에 처리하는 구간은 calls 로 넘긴다
+# (예: 배치 핀포인트는 ROI 수 → 배치 여부와 관계없이 pinpoint_calls 는 인식한 ROI 수).
+# 다른 스레드에서 실행되는 구간은 stage 가 잡히지 않으므로 호출한 쪽 stage 로 감싸 측정한다.
+import threading
+import time
+from contextlib import contextmanager
+
+_active = threading.local()
+
+
+@contextmanager
+def profiled(timings: dict):
+    """이 블록 안(같은 스레드)의 stage() 시간을 timings 에 누적한다"""
+    prev = getattr(_active, "timings", None), getattr(_active, "depth", 0)
+    _active.timings, _active.depth = timings, 0
+    start = time.perf_counter()
+    try:
+        yield timings
+    finally:
+        timings["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        _active.timings, _active.depth = prev
+
+
+@contextmanager
+def stage(name: str, calls: int = 1):
+    timings = getattr(_active, "timings", None)
+    if timings is None or _active.depth:
+        yield
+        return
+    _active.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _active.depth -= 1
+        timings[f"{name}_ms"] = round(timings.get(f"{name}_ms", 0.0) + (time.perf_counter() - start) * 1000, 1)
+        timings[f"{name}_calls"] = timings.get(f"{name}_calls", 0) + calls
+
+
+def token_summary(tokens: dict[str, list[dict]]) -> dict:
+    """토큰 스트림의 개수와 평균 인식 점수"""
+    items = [it for stream in tokens.values() for it in stream]
+    scores = [float(it.get("score", 0.0)) for it in items]
+    return {"tokens": len(items), "mean_score": round(sum(scores) / len(scores), 4) if scores else None}
+
+
+# --- 집계 ---
+def percentile(values: list[float], q: float) -> float | None:
+    """선형 보간 백분위 (q: 0~100)"""
+    if not values:
+        return None
+    values = sorted(values)
+    pos = (len(values) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return round(values[lo] + (values[hi] - values[lo]) * (pos - lo), 1)
+
+
+def _summary(values: list[float]) -> dict:
+    return {"n": len(values), "p50": percentile(values, 50), "p95": percentile(values, 95),
+            "max": round(max(values), 1) if values else None}
+
+
+def transcript_timings(t) -> dict:
+    """큐 대기 / 워커 처리 / 전체 시간 (ms). 아직 기록되지 않은 값은 None"""
+    def ms(a, b):
+        return round((b - a).total_seconds() * 1000, 1) if a and b else None
+    return {"queue_wait_ms": ms(t.enqueued_at, t.started_at),
+            "processing_ms": ms(t.started_at, t.finished_at),
+            "end_to_end_ms": ms(t.enqueued_at, t.finished_at)}
+
+
+def report_pages():
+    """
+    profile_report() 용 pages Prefetch: 집계에 필요한 칸만 읽는다.
+    페이지 행에는 OCR 토큰(ocr_tokens)·파싱 결과가 함께 있어 그대로 prefetch 하면 기간 전체의 토큰을 메모리에 올린다.
+    """
+    from django.db.models import Prefetch
+    from .models import TranscriptPage
+
+    return Prefetch("pages", queryset=TranscriptPage.objects.only("id", "transcript_id", "page_number", "profile"))
+
+
+def profile_report(transcripts) -> dict:
+    """성적표(prefetch_related(report_pages()) 권장) 목록 → 성적표 단위/페이지 단계별 p50·p95"""
+    per_transcript: dict[str, list[float]] = {}
+    per_page: dict[str, list[float]] = {}
+    sources: dict[str, int] = {}
+    count = 0
+    for t in transcripts:
+        count += 1
+        for key, value in transcript_timings(t).items():
+            if value is not None:
+                per_transcript.setdefault(key, []).append(value)
+        for page in t.pages.all():
+            if not page.profile:
+                continue
+            source = page.profile.get("source") or "unknown"
+            sources[source] = sources.get(source, 0) + 1
+            for key, value in page.profile.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    per_page.setdefault(key, []).append(float(value))
+    return {
+        "transcripts": count,
+        "transcript": {key: _summary(values) for key, values in sorted(per_transcript.items())},
+        "page": {key: _summary(values) for key, values in sorted(per_page.items())},
+        "page_sources": sources,
+    }
@@ -1,6 +1,47 @@
 # transcripts/serializers.py
 from rest_framework import serializers
 from .models import Transcript, TranscriptPage
+from .conf import ocr_setting
+from .hashing import content_hash
+from .layouts import get_layout_store
+from .pdf import is_pdf, split_pdf
+from .triage import triage_upload
+
+
+def triage_files(files) -> list[dict | None]:
+    """사전 점검: 읽을 수 없는 페이지가 하나라도 있으면 OCR 큐에 넣지 않고 페이지별 사유를 돌려준다"""
+    if not ocr_setting("TRIAGE_ENABLED"):
+        return [None] * len(files)
+    layouts = get_layout_store()
+    triage = [triage_upload(f, layouts) for f in files]
+    errors = [f"{idx}페이지({f.name}): {r['error']}"
+              for idx, (f, r) in enumerate(zip(files, triage), start=1) if not r["ok"]]
+    if errors:
+        raise serializers.ValidationError(errors)
+    return triage
+
+
+def split_pages(files, triage=None) -> list[tuple]:
+    """업로드 파일 → (페이지 파일, 사전 점검 결과) 목록. PDF 는 한 쪽씩 나눈다"""
+    triage = triage or [None] * len(files)
+    return [(part, page_triage)
+            for f, page_triage in zip(files, triage)
+            for part in (split_pdf(f) if is_pdf(f) else [f])]
+
+
+def create_pages(transcript, pages: list[tuple], start_number: int = 0):
+    """
+    페이지별 파일 저장 (내용 해시는 OCR 결과 캐시 키로 사용)
+    PDF 는 split_pages 에서 한 쪽씩 나눠 각각 페이지로 저장한다 (텍스트 레이어가 있으면 워커에서 OCR 없이 파싱)
+    """
+    for page_number, (part, page_triage) in enumerate(pages, start=start_number + 1):
+        TranscriptPage.objects.create(
+            transcript=transcript,
+            file=part,
+            page_number=page_number,
+            content_hash=content_hash(part),
+            triage=page_triage
+        )
 
 
 class TranscriptUploadSerializer(serializers.ModelSerializer): 
@@ -10,6 +51,10 @@ class TranscriptUploadSerializer(serializers.ModelSerializer):
         write_only=True
     )
 
+    def validate_files(self, files):
+        self._triage = triage_files(files)
+        return files
+
     def create(self, validated_data):
         user = self.context['request'].user
         # validated_data에서 'files'를 분리
@@ -17,14 +62,7 @@ class TranscriptUploadSerializer(serializers.ModelSerializer):
         
         # Transcript 레코드 생성 (user만으로)
         transcript = Transcript.objects.create(user=user, **validated_data)
-
-        # 페이지별 파일 저장
-        for idx, f in enumerate(files, start=1):
-            TranscriptPage.objects.create(
-                transcript=transcript,
-                file=f,
-                page_number=idx
-            )
+        create_pages(transcript, split_pages(files, getattr(self, "_triage", None)))
         return transcript
     
     class Meta:
@@ -33,6 +71,42 @@ class TranscriptUploadSerializer(serializers.ModelSerializer):
         fields = ['id', 'files', 'status', 'created_at']
         read_only_fields = ['id', 'status', 'created_at']
 
+class TranscriptPageFilesSerializer(serializers.Serializer):
+    """
+    기존 성적표에 페이지 추가/교체 (사전 점검은 새 업로드와 같다)
+    context["single_page"] 가 True 면(교체) 나눈 결과가 정확히 한 쪽이어야 한다
+    """
+    files = serializers.ListField(
+        child=serializers.FileField(),
+        allow_empty=False,
+        write_only=True
+    )
+
+    def validate_files(self, files):
+        self._pages = split_pages(files, triage_files(files))
+        if self.context.get("single_page") and len(self._pages) != 1:
+            raise serializers.ValidationError("교체할 페이지는 한 장만 올려 주세요.")
+        return files
+
+    def append(self, transcript):
+        last = transcript.pages.order_by('-page_number').values_list('page_number', flat=True).first() or 0
+        create_pages(transcript, self._pages, start_number=last)
+
+    def replace(self, page):
+        """페이지 한 장 교체. 체크포인트/OCR 토큰을 비워 이 페이지만 다시 처리되게 한다"""
+        part, page_triage = self._pages[0]
+        page.file.delete(save=False)
+        page.file          = part
+        page.content_hash  = content_hash(part)
+        page.phash         = ""
+        page.ocr_tokens    = None
+        page.triage        = page_triage
+        page.status        = TranscriptPage.STATUS.pending
+        page.parsed_rows   = None
+        page.error_message = None
+        page.save()
+
+
 class TranscriptStatusSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transcript
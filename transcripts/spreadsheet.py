@@ -0,0 +1,177 @@
+# transcripts/spreadsheet.py
+# 포털에서 내려받은 성적 엑셀(.xlsx)/CSV 를 OCR 없이 과목 행으로 변환한다.
+# 출력은 OCR 파이프라인(ocr_parsing.build_courses)과 같은 {code, grade, retake, semester} 형식.
+#  - 헤더 행: 학수번호 열이 있는 첫 행 (열 이름은 ocr_parsing._match_header_key 와 같은 규칙 + 학년도/학년/학기)
+#  - 학기: 학년·학기 열 → 학년도·학기 열(첫 학년도를 1학년으로) → 행 사이의 "2021학년도 1학년 1학기" 구분 줄 순으로 사용
+import csv
+import io
+import os
+import re
+
+from .ocr_parsing import (
+    _TERM_ANY, _extract_grade_from_tokens, _extract_retake_from_tokens, _find_code_in_tok,
+    _match_header_key, _parse_semester, dedupe_courses,
+)
+
+SPREADSHEET_EXTENSIONS = (".csv", ".xlsx")
+# 헤더 행을 찾을 최대 행 수 (제목/학생 정보 줄 이후)
+HEADER_SEARCH_ROWS = 50
+_GRADE_EXACT = re.compile(r'^(?:[A-D][+0]|F|P|NP)$')
+# 앞자리 0 이 빠진 학수번호 (숫자만 4~5자리)
+_SHORT_CODE = re.compile(r'^\d{4,5}$')
+# 재수강 열에 표시로 쓰이는 값 (OCR 경로의 '재수강'/'Y' 외에 엑셀에서 흔한 표기)
+RETAKE_MARKS = {"R", "O", "○", "V", "예", "TRUE"}
+
+
+def is_spreadsheet(file_obj) -> bool:
+    return os.path.splitext(getattr(file_obj, "name", "") or "")[1].lower() in SPREADSHEET_EXTENSIONS
+
+
+def _csv_encoding(sample: bytes) -> str:
+    """포털 CSV 는 UTF-8(BOM) 또는 CP949. 앞부분만 보고 정한다 (잘린 멀티바이트 문자는 무시)"""
+    try:
+        sample.decode("utf-8-sig")
+        return "utf-8-sig"
+    except UnicodeDecodeError as e:
+        return "utf-8-sig" if e.start >= len(sample) - 3 else "cp949"
+
+
+def iter_rows(file_obj):
+    """업로드 파일에서 행(셀 값 리스트)을 하나씩 읽는다. xlsx 는 첫 시트를 read-only 로 스트리밍"""
+    file_obj.seek(0)
+    if file_obj.name.lower().endswith(".xlsx"):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(file_obj, read_only=True, data_only=True)
+        try:
+            for row in wb.worksheets[0].iter_rows(values_only=True):
+                yield list(row)
+        finally:
+            wb.close()
+        return
+    encoding = _csv_encoding(file_obj.read(64 * 1024))
+    file_obj.seek(0)
+    text = io.TextIOWrapper(file_obj, encoding=encoding, newline="")
+    try:
+        yield from csv.reader(text)
+    finally:
+        text.detach()   # 래퍼가 정리될 때 업로드 파일까지 닫지 않도록
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _column_key(name: str) -> str | None:
+    s = re.sub(r'\s+', '', name)
+    key = _match_header_key(s)
+    if key:
+        return key
+    if '학년도' in s or s in ('년도', '연도'): return '학년도'
+    if s in ('학년', '이수학년'): return '학년'
+    if '학기' in s: return '학기'
+    return None
+
+
+def _find_columns(header_row: list) -> dict[str, int]:
+    columns = {}
+    for idx, value in enumerate(header_row):
+        key = _column_key(_cell(value))
+        if key and key not in columns:
+            columns[key] = idx
+    return columns
+
+
+def _code(value) -> str | None:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"{int(value):06d}"   # 엑셀이 숫자로 저장해 앞자리 0 이 빠진 학수번호
+    s = _cell(value)
+    if _SHORT_CODE.match(s):
+        return s.zfill(6)            # CSV 로 다시 저장하며 앞자리 0 이 빠진 문자열 (analysis.services._norm_code 와 같이 6자리)
+    return _find_code_in_tok(s)
+
+
+def _grade(value) -> str:
+    s = _cell(value).upper().replace(" ", "")
+    if _GRADE_EXACT.match(s):
+        return s
+    return _extract_grade_from_tokens([s]) or ""
+
+
+def _retake(value) -> bool:
+    s = _cell(value).upper()
+    return s in RETAKE_MARKS or _extract_retake_from_tokens([s])
+
+
+def _digit(value) -> str | None:
+    m = re.search(r'\d', _cell(value))
+    return m.group(0) if m else None
+
+
+def parse_spreadsheet(file_obj, stats: dict | None = None) -> list[dict]:
+    """
+    엑셀/CSV 업로드 → 과목 행. 학수번호 열을 찾지 못하면 ValueError.
+    stats 를 넘기면 학수번호 칸에 값이 있지만 읽을 수 없어 건너뛴 행 번호(시트 기준, 1부터)를 skipped_rows 에 채운다.
+    """
+    rows = enumerate(iter_rows(file_obj), start=1)
+    columns = None
+    for _, (_, row) in zip(range(HEADER_SEARCH_ROWS), rows):
+        found = _find_columns(row)
+        if '학수번호' in found:
+            columns = found
+            break
+    if columns is None:
+        raise ValueError("학수번호 열을 찾을 수 없습니다.")
+
+    def col(row, key):
+        idx = columns.get(key)
+        return row[idx] if idx is not None and idx < len(row) else None
+
+    courses, skipped, first_year, section_semester = [], [], None, "기타"
+    for row_number, row in rows:
+        code = _code(col(row, '학수번호'))
+        if not code:
+            # 과목이 아닌 줄: "2021학년도 1학년 1학기" 같은 구분 줄이면 이후 행의 학기로 쓴다
+            term_match = _TERM_ANY.search(" ".join(_cell(v) for v in row))
+            if term_match:
+                section_semester = _parse_semester(term_match.group(0))
+            elif _cell(col(row, '학수번호')):
+                skipped.append(row_number)
+            continue
+
+        year, grade_year, term = _digit(col(row, '학년')), _cell(col(row, '학년도')), _digit(col(row, '학기'))
+        if grade_year[:4].isdigit() and first_year is None:
+            first_year = int(grade_year[:4])
+        if year and term:
+            semester = f"{year}-{term}"
+        elif grade_year[:4].isdigit() and term:
+            semester = f"{int(grade_year[:4]) - first_year + 1}-{term}"
+        else:
+            semester = section_semester
+
+        courses.append({
+            "code": code,
+            "grade": _grade(col(row, '성적')),
+            "retake": _retake(col(row, '재수강')),
+            "semester": semester,
+        })
+    if stats is not None:
+        stats["skipped_rows"] = skipped
+    return dedupe_courses(courses)
+
+
+def spreadsheet_triage(file_obj) -> dict:
+    """업로드 사전 점검 (triage.triage_image 와 같은 형식). 학수번호 열이 있는 헤더 행을 찾는지만 본다"""
+    try:
+        for _, row in zip(range(HEADER_SEARCH_ROWS), iter_rows(file_obj)):
+            if '학수번호' in _find_columns(row):
+                return {"ok": True, "error": None, "flags": [], "metrics": {}}
+    except Exception:
+        return {"ok": False, "error": "엑셀/CSV 파일을 읽을 수 없습니다.", "flags": [], "metrics": {}}
+    finally:
+        file_obj.seek(0)
+    return {"ok": False, "error": "학수번호 열을 찾을 수 없습니다.", "flags": [], "metrics": {}}
@@ -1,40 +1,161 @@
 # transcripts/tasks.py
 
-from celery import shared_task
-from .utils import parse_single_table_with_paddle
-from .models import Transcript
+from celery import chord, shared_task
+from django.utils import timezone
+from .conf import ocr_setting
+from .utils import page_tokens
+from .models import Transcript, TranscriptPage
+from .ocr_cache import cached_parse
+from .ocr_parsing import merge_pages
+from .profiling import profiled, stage
+from .spreadsheet import is_spreadsheet, parse_spreadsheet
+from . import worker  # noqa: F401  (워커 프로세스 초기화 시그널 등록)
 
-@shared_task
+# 워커가 태스크 도중 죽거나 재활용되면 메시지를 브로커로 되돌려 다른 워커가 이어받게 한다 (acks_late).
+# 끝난 페이지는 TranscriptPage.status=done 체크포인트로 건너뛰므로 다시 실행돼도 OCR 은 남은 페이지만 한다.
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
 def process_transcript(transcript_id: int):
+    """끝나지 않은 페이지마다 OCR 서브태스크를 병렬로 띄우고, 모두 끝나면 finalize_transcript 로 병합한다."""
     try:
         t = Transcript.objects.get(pk=transcript_id)
     except Transcript.DoesNotExist:
         return
 
-    # 상태 → 처리중
+    # 상태 → 처리중 (큐 대기 시간 = started_at - enqueued_at)
     t.status = Transcript.STATUS.processing
-    t.save(update_fields=["status"])
+    t.started_at = timezone.now()
+    t.save(update_fields=["status", "started_at"])
 
-    try:
-        all_rows: list[list[str]] = []
+    pages = t.pages.order_by("page_number")
+    page_ids = list(pages.exclude(status=TranscriptPage.STATUS.done).values_list("id", flat=True))
+    if not page_ids:
+        return finalize_transcript([], transcript_id)
+    if len(page_ids) < pages.count():
+        print(f"[OCR 태스크] transcript {transcript_id}: 완료된 페이지 제외, {len(page_ids)}페이지만 이어서 처리")
 
-        # 1) 페이지별로 표 파싱 → 셀 단위 문자열 수집
-        for page in t.pages.order_by("page_number"):
-            print(f"[OCR 태스크] 페이지 {page.page_number} 처리 시작: {page.file.name}")
-            rows = parse_single_table_with_paddle(page.file)
-            all_rows.extend(rows)
+    # 1) 페이지별 표 파싱을 개별 태스크로 분산 → 2) 전부 끝나면 DB 의 페이지 결과를 순서대로 병합
+    # 페이지 태스크가 예외로 끝나 chord 가 병합까지 가지 못하면 fail_transcript 가 성적표를 error 로 끝낸다
+    chord(process_transcript_page.s(page_id) for page_id in page_ids)(
+        finalize_transcript.s(transcript_id).on_error(fail_transcript.s(transcript_id))
+    )
+    return t.status
 
-        # 2) 최종적으로 flat list를 JSONField에 저장
-        t.parsed_data   = all_rows
-        t.status        = Transcript.STATUS.done
-        t.error_message = None
 
+@shared_task
+def fail_transcript(request, exc, traceback, transcript_id: int):
+    """chord 오류 콜백 (link_error). processing 으로 남은 성적표를 error 로 바꿔 다시 수정/재처리할 수 있게 한다"""
+    print(f"Transcript processing failed for id={transcript_id}: {exc!r}")
+    Transcript.objects.filter(pk=transcript_id, status=Transcript.STATUS.processing).update(
+        status=Transcript.STATUS.error, error_message=f"처리 중 오류: {exc}", finished_at=timezone.now(),
+    )
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def process_transcript_page(self, page_id: int) -> dict:
+    """
+    TranscriptPage 한 장을 OCR 파싱해 페이지에 저장(체크포인트)한다.
+    예외는 PAGE_MAX_RETRIES 번까지 재시도하고, 그래도 실패하면 페이지를 error 로 남겨 병합 단계에서 처리한다.
+    """
+    try:
+        page = TranscriptPage.objects.get(pk=page_id)
+    except TranscriptPage.DoesNotExist:
+        # 큐에 있는 동안 페이지가 삭제된 경우. 예외로 끝나면 chord 전체가 실패하므로 빈 결과를 돌려준다
+        print(f"[OCR 태스크] 페이지 id={page_id} 없음 → 건너뜀")
+        return {"page_number": None, "rows": [], "error": "page not found"}
+    if page.status == TranscriptPage.STATUS.done:
+        print(f"[OCR 태스크] 페이지 {page.page_number} 이미 완료 → 저장된 결과 사용")
+        return {"page_number": page.page_number, "rows": page.parsed_rows, "cache": "checkpoint"}
+
+    # 단계별 시간은 profiled 블록 안의 stage() 들이 stats 에 누적한다 (profiling 참고)
+    stats: dict = {}
+    cache = warning = None
+    # 파싱뿐 아니라 상태/통계 저장 실패도 여기서 잡아 페이지 error 로 남긴다 (chord 가 finalize 까지 가도록)
+    try:
+        print(f"[OCR 태스크] 페이지 {page.page_number} 처리 시작: {page.file.name}")
+        page.status = TranscriptPage.STATUS.processing
+        page.save(update_fields=["status"])
+        with profiled(stats):
+            if is_spreadsheet(page.file):
+                # 엑셀/CSV: 셀 값을 그대로 읽으므로 OCR·결과 캐시를 거치지 않는다
+                with stage("parse"), page.file.open("rb") as fh:
+                    rows = parse_spreadsheet(fh, stats)
+                stats["source"] = "spreadsheet"
+                if stats["skipped_rows"]:
+                    # 페이지는 완료로 두되, 빠진 행이 있다는 것을 페이지 메시지로 남긴다
+                    warning = f"학수번호를 읽을 수 없어 건너뛴 행: {', '.join(map(str, stats['skipped_rows']))}"
+            else:
+                rows, cache = cached_parse(page, page_tokens, stats)
+
+            with stage("db_write"):
+                page.status        = TranscriptPage.STATUS.done
+                page.parsed_rows   = rows
+                page.error_message = warning
+                page.save(update_fields=["status", "parsed_rows", "error_message"])
+        stats["cache"] = cache
+        page.profile = stats
+        page.save(update_fields=["profile"])
     except Exception as e:
-        print(f"Transcript processing failed for id={transcript_id}: {e}")
+        if not self.request.called_directly and self.request.retries < ocr_setting("PAGE_MAX_RETRIES"):
+            print(f"[OCR 태스크] 페이지 {page.page_number} 실패, 재시도 {self.request.retries + 1}회: {e}")
+            raise self.retry(exc=e, countdown=ocr_setting("PAGE_RETRY_DELAY"))
+        print(f"Transcript page processing failed for page_id={page_id}: {e}")
+        # 메모리의 page 는 일부만 갱신됐을 수 있으므로 필요한 칸만 직접 UPDATE
+        TranscriptPage.objects.filter(pk=page_id).update(
+            status=TranscriptPage.STATUS.error, error_message=str(e), profile=stats,
+        )
+        return {"page_number": page.page_number, "rows": [], "error": str(e)}
+
+    if cache and cache != "miss":
+        print(f"[OCR 태스크] 페이지 {page.page_number} 캐시 적중({cache}) → OCR 생략")
+    else:
+        print(f"[OCR 태스크] 페이지 {page.page_number} 통계: {stats}")
+    return {"page_number": page.page_number, "rows": rows, "cache": cache, "stats": stats}
+
+
+def import_transcript_now(transcript: Transcript) -> dict:
+    """큐를 거치지 않고 요청 안에서 바로 처리 (작은 엑셀/CSV 업로드 전용). 결과 형식은 워커 경로와 같다"""
+    transcript.status = Transcript.STATUS.processing
+    transcript.enqueued_at = transcript.started_at = timezone.now()
+    transcript.save(update_fields=["status", "enqueued_at", "started_at"])
+    page_results = [process_transcript_page(page_id)
+                    for page_id in transcript.pages.order_by("page_number").values_list("id", flat=True)]
+    result = finalize_transcript(page_results, transcript.id)
+    transcript.refresh_from_db()
+    return result
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def finalize_transcript(page_results: list[dict], transcript_id: int):
+    """페이지 체크포인트(TranscriptPage.parsed_rows)를 페이지 순서대로 병합. page_results 는 통계용"""
+    try:
+        t = Transcript.objects.get(pk=transcript_id)
+    except Transcript.DoesNotExist:
+        return
+
+    pages = list(t.pages.order_by("page_number"))
+    errors = [f"page {p.page_number}: {p.error_message or '처리되지 않음'}"
+              for p in pages if p.status != TranscriptPage.STATUS.done]
+
+    if errors:
+        print(f"Transcript processing failed for id={transcript_id}: {errors}")
         t.status        = Transcript.STATUS.error
-        t.error_message = str(e)
+        t.error_message = "\n".join(errors)
+    else:
+        # 페이지 순서대로 이어 붙인 flat list 를 JSONField 에 저장
+        t.parsed_data   = merge_pages([p.parsed_rows for p in pages])
+        t.status        = Transcript.STATUS.done
+        t.error_message = None
 
-    finally:
-        t.save(update_fields=["parsed_data", "status", "error_message"])
+    t.finished_at = timezone.now()
+    t.save(update_fields=["parsed_data", "status", "error_message", "finished_at"])
 
-    return t.status
\ No newline at end of file
+    # 캐시 적중률 측정용: 페이지별 캐시 결과를 태스크 결과에 남긴다 (checkpoint = 이전 실행에서 끝난 페이지)
+    processed_now = {r["page_number"] for r in page_results}
+    resumed = [p for p in pages if p.status == TranscriptPage.STATUS.done and p.page_number not in processed_now]
+    cache = {"exact": 0, "perceptual": 0, "miss": 0, "checkpoint": len(resumed)}
+    for r in page_results:
+        if r.get("cache") in cache:
+            cache[r["cache"]] += 1
+    rows_escalated = sum(r.get("stats", {}).get("rows_escalated", 0) for r in page_results)
+    return {"status": t.status, "pages": len(pages), "cache": cache, "rows_escalated": rows_escalated}
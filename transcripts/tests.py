@@ -1,3 +1,1432 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from . import cpu
+from .benchmark import HEADERS, synthetic_tokens
+from .code_index import LOOSE_DISTANCE, CodeIndex, code_candidates, code_distance
+from .layouts import LayoutStore
+from .models import LayoutTemplate, OcrResultCache, Transcript, TranscriptPage
+from .ocr_backends import FakeOcrBackend, write_token_manifest
+from .ocr_cache import cached_parse
+from .ocr_parsing import (
+    PINPOINT_HALF_H, _find_header, build_courses, dedupe_courses, find_columns, group_rows, merge_pages,
+)
+from .spreadsheet import parse_spreadsheet
+from .tasks import fail_transcript, finalize_transcript, process_transcript, process_transcript_page
+from .tokens import pack_tokens, unpack_tokens
+
+
+def token(txt: str, x: float, y: float, w: float = 40, h: float = 20, score: float = 0.99) -> dict:
+    """(x, y) 중심의 OCR 토큰"""
+    return {"txt": txt, "bbox": (x - w / 2, y - h / 2, x + w / 2, y + h / 2), "cx": x, "cy": y, "h": h, "score": score}
+
+
+def page_tokens(rows: list[tuple[str, str]], term: str = "2021학년도 1학년 1학기") -> dict[str, list[dict]]:
+    """학기 줄 + 헤더 + (학수번호, 성적) 행으로 된 한 페이지의 토큰 스트림"""
+    raw = [token(term, 200, 10, w=200), token("학수번호", 100, 50, w=80), token("과목명", 300, 50),
+           token("성적", 500, 50)]
+    for i, (code, grade) in enumerate(rows):
+        y = 100 + i * 40
+        raw += [token(code, 100, y, w=70), token("과목", 300, y), token(grade, 500, y, w=30)]
+    return {"raw": raw, "content": raw, "pinpoint": []}
+
+
+# --- 가짜 엔진으로 OCR 파이프라인 실행 (PaddleOCR 없이, ocr_backends.FakeOcrBackend) ---
+class CountingFakeBackend(FakeOcrBackend):
+    """엔진 메서드 호출을 기록하는 FakeOcrBackend: [(메서드, 박스 수)]"""
+    calls: list[tuple[str, int]] = []
+
+    def detect(self, image_input):
+        self.calls.append(("detect", 0))
+        return super().detect(image_input)
+
+    def run_ocr(self, image_input, preprocess_info=None, cls: bool = False):
+        self.calls.append(("run_ocr", 0))
+        return super().run_ocr(image_input, preprocess_info, cls)
+
+    def recognize(self, image_input, boxes, preprocess_info=None, cls: bool = False):
+        self.calls.append(("recognize", len(boxes)))
+        return super().recognize(image_input, boxes, preprocess_info, cls)
+
+
+class FakeOcrTestCase(TestCase):
+    """
+    CORPUS 의 페이지마다 (크기, 정답 행) 로 잡음 이미지와 manifest 를 만들고 CountingFakeBackend 로 OCR 한다.
+    이미지 내용은 지문 구분용일 뿐이고 토큰은 benchmark.synthetic_tokens 로 만들어진다.
+    """
+    CORPUS: list[tuple[tuple[int, int], list[dict]]] = []
+    OCR_SETTINGS: dict = {}
+
+    def setUp(self):
+        super().setUp()
+        import cv2
+        import numpy as np
+        from .custom_paddle_ocr_script import _engines
+
+        self.corpus_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.corpus_dir)
+        self.paths, pages = [], []
+        rng = np.random.default_rng(len(self.CORPUS))
+        for number, ((width, height), rows) in enumerate(self.CORPUS):
+            name = f"page{number}.png"
+            cv2.imwrite(os.path.join(self.corpus_dir, name), self.image(number, width, height, rng))
+            self.paths.append(os.path.join(self.corpus_dir, name))
+            pages.append({"file": name, "rows": rows})
+        write_token_manifest(self.corpus_dir, pages)
+        self.configure()
+        # 엔진 캐시 키에는 코퍼스 경로가 없으므로 테스트마다 새로 만든다
+        _engines.clear()
+        self.addCleanup(_engines.clear)
+        CountingFakeBackend.calls = []
+
+    def image(self, number: int, width: int, height: int, rng):
+        """코퍼스 페이지 이미지 (BGR). 기본은 잡음"""
+        import numpy as np
+
+        return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+    def configure(self, **values):
+        """OCR 설정을 OCR_SETTINGS + values 로 바꾼다 (테스트 안에서 다시 불러도 된다)"""
+        override = override_settings(TRANSCRIPT_OCR={
+            "BACKEND": "transcripts.tests.CountingFakeBackend", "FAKE_CORPUS_DIR": self.corpus_dir,
+            "FAKE_DET_MS": 0, "FAKE_REC_MS": 0, "CACHE_ENABLED": False, **self.OCR_SETTINGS, **values,
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def calls(self, method: str) -> list[int]:
+        return [boxes for name, boxes in CountingFakeBackend.calls if name == method]
+
+
+def course_rows(*codes: str, semester: str = "1-1") -> list[dict]:
+    return [{"code": code, "grade": "A0", "retake": False, "semester": semester} for code in codes]
+
+
+# --- 학수번호 핀포인트 배치 인식 (custom_paddle_ocr_script.ocr_page_tokens, PINPOINT_BATCH) ---
+class PinpointBatchTests(FakeOcrTestCase):
+    CORPUS = [((1280, 600), course_rows("012345", "012346", "012347"))]
+
+    def pinpoint(self) -> tuple[list[dict], dict]:
+        from .custom_paddle_ocr_script import ocr_page_tokens
+
+        stats: dict = {}
+        return ocr_page_tokens(self.paths[0], stats=stats)["pinpoint"], stats
+
+    def test_all_rois_in_one_recognizer_call(self):
+        # 색인이 없으면 모든 행(과목 3행 + 학점 합계 줄)이 핀포인트 대상
+        pinpoint, stats = self.pinpoint()
+        self.assertEqual(stats["pinpoint_rois"], 4)
+        self.assertEqual([it["txt"] for it in pinpoint][:3], ["012345", "012346", "012347"])
+        self.assertEqual(self.calls("recognize")[-1], 4)
+        self.assertEqual(self.calls("run_ocr"), [])
+
+    def test_rois_are_in_page_coordinates(self):
+        codes = [it for it in synthetic_tokens(self.CORPUS[0][1]) if len(it["txt"]) == 6 and it["txt"].isdigit()]
+        pinpoint, _ = self.pinpoint()
+        for it, code in zip(pinpoint, codes):
+            self.assertAlmostEqual(it["cy"], code["cy"])
+            self.assertEqual(it["h"], 2 * PINPOINT_HALF_H)
+
+    def test_unbatched_runs_full_ocr_per_roi(self):
+        self.configure(PINPOINT_BATCH=False)
+        _, stats = self.pinpoint()
+        self.assertEqual(len(self.calls("run_ocr")), stats["pinpoint_rois"])
+        self.assertNotIn(stats["pinpoint_rois"], self.calls("recognize"))
+
+
+# --- 페이지당 검출 한 번 (SINGLE_DETECTION) ---
+class SingleDetectionTests(FakeOcrTestCase):
+    CORPUS = [((1280, 700), course_rows("012345", "012346", "012347", "012348"))]
+
+    def courses(self) -> list[dict]:
+        from .custom_paddle_ocr_script import ocr_single_table_term_code_grade_retake
+
+        return ocr_single_table_term_code_grade_retake(self.paths[0])
+
+    def test_detects_once_and_recognizes_boxes(self):
+        courses = self.courses()
+        self.assertEqual([c["code"] for c in courses], ["012345", "012346", "012347", "012348"])
+        self.assertEqual(len(self.calls("detect")), 1)
+        self.assertEqual(self.calls("run_ocr"), [])
+
+    def test_legacy_pipeline_scans_page_twice(self):
+        self.configure(SINGLE_DETECTION=False)
+        courses = self.courses()
+        self.assertEqual(self.calls("detect"), [])
+        self.assertEqual(len(self.calls("run_ocr")), 2)   # 원본 스캔 + 전처리 스캔
+
+        # 두 파이프라인의 결과가 같다
+        self.configure(SINGLE_DETECTION=True)
+        self.assertEqual(self.courses(), courses)
+
+
+# --- 페이지 서브태스크 chord (transcripts/tasks.py) ---
+@override_settings(MEDIA_ROOT="/tmp/transcripts-test-media")
+class PageTaskFailureTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create(username="u1", student_id="C123456", full_name="홍길동")
+        self.transcript = Transcript.objects.create(user=user, status=Transcript.STATUS.processing)
+        self.page = TranscriptPage.objects.create(transcript=self.transcript, page_number=1,
+                                                  file=ContentFile("학수번호,성적\n012345,A0\n".encode(),
+                                                                   name="p1.csv"))
+
+    def test_missing_page_returns_error_result(self):
+        self.assertEqual(process_transcript_page(self.page.id + 100)["error"], "page not found")
+
+    def test_failure_outside_parsing_marks_page_error(self):
+        # 처리 시작 상태 저장부터 실패 (DB 잠금 등)
+        with mock.patch.object(TranscriptPage, "save", side_effect=DatabaseError("database is locked")):
+            result = process_transcript_page(self.page.id)
+        self.assertEqual(result, {"page_number": 1, "rows": [], "error": "database is locked"})
+        self.page.refresh_from_db()
+        self.assertEqual(self.page.status, TranscriptPage.STATUS.error)
+        self.assertEqual(self.page.error_message, "database is locked")
+
+    def test_chord_error_callback_fails_transcript(self):
+        with mock.patch("transcripts.tasks.chord") as fake_chord:
+            process_transcript(self.transcript.id)
+        body = fake_chord.return_value.call_args[0][0]
+        self.assertEqual([(s["task"], tuple(s["args"])) for s in body.options["link_error"]],
+                         [("transcripts.tasks.fail_transcript", (self.transcript.id,))])
+
+        # 헤더 태스크가 실패했을 때 Celery 가 부르는 방식 그대로 (request, exc, traceback) 로 오류 콜백을 호출
+        body.freeze()
+        try:
+            raise RuntimeError("worker lost")
+        except RuntimeError as e:
+            finalize_transcript.backend.chord_error_from_stack(body, e)
+        self.transcript.refresh_from_db()
+        self.assertEqual(self.transcript.status, Transcript.STATUS.error)
+        self.assertIn("worker lost", self.transcript.error_message)
+        self.assertIsNotNone(self.transcript.finished_at)
+
+    def test_chord_error_callback_leaves_finished_transcript(self):
+        Transcript.objects.filter(pk=self.transcript.pk).update(status=Transcript.STATUS.done)
+        fail_transcript(None, RuntimeError("late"), None, self.transcript.id)
+        self.transcript.refresh_from_db()
+        self.assertEqual(self.transcript.status, Transcript.STATUS.done)
+
+
+# --- 페이지 이미지 해시 캐시 (transcripts/ocr_cache.py) ---
+def screenshot(seed: int = 0, noise: int = 0, mark: bool = False, variant: int = 1) -> bytes:
+    """
+    표처럼 보이는 PNG. noise 는 재압축처럼 화소마다 ±noise (variant 마다 다른 잡음),
+    mark 는 글자 하나 크기의 검은 칸을 더한다
+    """
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    image = np.full((400, 640), 255, dtype=np.int16)
+    for y in range(20, 380, 30):
+        for x in rng.choice(np.arange(20, 600, 40), 6, replace=False):
+            image[y:y + 14, x:x + 30] = 40
+    if noise:
+        image += np.random.default_rng(seed + variant).integers(-noise, noise + 1, image.shape)
+    if mark:
+        image[200:216, 310:322] = 0
+    return cv2.imencode(".png", np.clip(image, 0, 255).astype(np.uint8))[1].tobytes()
+
+
+@override_settings(MEDIA_ROOT="/tmp/transcripts-test-media")
+class OcrCacheTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.users = [User.objects.create(username=f"u{i}", student_id=f"C12345{i}", full_name="홍길동")
+                      for i in range(2)]
+        self.ocr = mock.Mock(return_value=page_tokens([("012345", "A+")]))
+        self.index = CodeIndex(["012345"])
+        patcher = mock.patch("transcripts.ocr_cache.get_code_index", side_effect=lambda: self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def parse(self, data: bytes, user: int = 0) -> str:
+        transcript = Transcript.objects.create(user=self.users[user])
+        page = TranscriptPage.objects.create(transcript=transcript, page_number=1,
+                                             file=ContentFile(data, name="page.png"))
+        rows, cache = cached_parse(page, self.ocr)
+        self.assertEqual([r["code"] for r in rows], ["012345"])
+        return cache
+
+    def test_exact_hit_skips_ocr(self):
+        self.assertEqual(self.parse(screenshot()), "miss")
+        self.assertEqual(self.parse(screenshot(), user=1), "exact")
+        self.assertEqual(self.ocr.call_count, 1)
+
+    def test_perceptual_hit_for_recompressed_page(self):
+        self.parse(screenshot())
+        self.assertEqual(self.parse(screenshot(noise=3)), "perceptual")
+        self.assertEqual(self.ocr.call_count, 1)
+
+    def test_perceptual_match_stays_within_user(self):
+        # 같은 양식·같은 크기의 다른 학생 페이지는 비슷해도 다른 사람의 결과를 돌려주지 않는다
+        self.parse(screenshot())
+        self.assertEqual(self.parse(screenshot(noise=3), user=1), "miss")
+
+    def test_changed_glyph_is_rejected(self):
+        self.parse(screenshot())
+        self.assertEqual(self.parse(screenshot(mark=True)), "miss")
+
+    def test_thresholds(self):
+        # noise=8: 원본과의 dHash 거리 ≈ 10, 썸네일 최대 차이 ≈ 5 (miss 는 그 페이지를 새로 저장하므로 매번 다른 잡음)
+        self.parse(screenshot())
+        with override_settings(TRANSCRIPT_OCR={"CACHE_THUMB_MAX_DIFF": 2}):
+            self.assertEqual(self.parse(screenshot(noise=8, variant=1)), "miss")
+        with override_settings(TRANSCRIPT_OCR={"CACHE_PHASH_DISTANCE": 0}):
+            self.assertEqual(self.parse(screenshot(noise=8, variant=2)), "miss")
+        self.assertEqual(self.parse(screenshot(noise=8, variant=3)), "perceptual")
+
+    def test_catalog_change_invalidates_entries(self):
+        self.parse(screenshot())
+        self.index = CodeIndex(["012345", "012346"])
+        self.assertEqual(self.parse(screenshot()), "miss")
+        self.assertEqual(OcrResultCache.objects.count(), 2)
+
+
+# --- 학수번호 색인 (transcripts/code_index.py) ---
+class CodeIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = CodeIndex(["012345", "034567", "018345", "016345", "012345"])
+
+    def test_size_ignores_duplicates(self):
+        self.assertEqual(len(self.index), 4)
+
+    def test_distance(self):
+        self.assertEqual(code_distance("012345", "012345"), 0)
+        self.assertEqual(code_distance("012345", "012845"), 1)   # 3 ↔ 8 혼동 쌍
+        self.assertEqual(code_distance("012345", "012305"), 2)   # 그 외 치환
+        self.assertEqual(code_distance("012345", "12345"), 12)
+
+    def test_candidates_fix_letters_and_slide_over_long_runs(self):
+        self.assertEqual(code_candidates("O12345"), ["012345"])
+        self.assertEqual(code_candidates("0123456"), ["012345", "123456"])
+        self.assertEqual(code_candidates("12345"), [])
+
+    def test_exact_match(self):
+        self.assertEqual(self.index.snap("012345"), "012345")
+        self.assertEqual(self.index.snap("학수번호 034567 국어"), "034567")
+
+    def test_one_confusable_glyph(self):
+        self.assertEqual(self.index.snap("012845"), "012345")
+        self.assertEqual(self.index.snap("O34867"), "034567")   # O → 0, 8 ↔ 5
+
+    def test_tie_returns_none(self):
+        # 010345 는 018345(0↔8)와 016345(0↔6) 모두에서 거리 1
+        self.assertIsNone(self.index.snap("010345"))
+
+    def test_far_match_returns_none(self):
+        self.assertIsNone(self.index.snap("987654"))
+        # 혼동 쌍이 아닌 한 글자 차이는 기본 기준으로는 보정하지 않고, 느슨한 기준(핀포인트)에서만 보정
+        self.assertIsNone(self.index.snap("012305"))
+        self.assertEqual(self.index.snap("012305", LOOSE_DISTANCE), "012345")
+
+    def test_search_returns_nearest_first(self):
+        self.assertEqual(self.index.search("012345", 2), [(0, "012345"), (2, "016345"), (2, "018345")])
+
+    def test_empty_index(self):
+        self.assertIsNone(CodeIndex([]).snap("012345"))
+
+
+# --- 워커 CPU 예산 (transcripts/cpu.py) ---
+@override_settings(CELERY_WORKER_CONCURRENCY=None, TRANSCRIPT_OCR={})
+class CpuBudgetTests(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(cpu.set_worker_concurrency, None)
+        patcher = mock.patch("transcripts.cpu.os.cpu_count", return_value=8)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_threads_follow_worker_concurrency(self):
+        from .worker import _on_worker_init
+
+        # celery -c 2 로 뜬 워커: worker_init 의 sender(WorkController) 에서 동시성을 읽는다
+        _on_worker_init(sender=mock.Mock(concurrency=2))
+        self.assertEqual(cpu.cpu_threads(), 4)
+
+    def test_outside_worker_uses_settings(self):
+        self.assertEqual(cpu.cpu_threads(), 1)   # 동시성 미지정 → 코어 수만큼 자식
+        with self.settings(CELERY_WORKER_CONCURRENCY=4):
+            self.assertEqual(cpu.cpu_threads(), 2)
+
+    def test_explicit_threads(self):
+        cpu.set_worker_concurrency(2)
+        with self.settings(TRANSCRIPT_OCR={"CPU_THREADS": 3}):
+            self.assertEqual(cpu.cpu_threads(), 3)
+
+    def test_thread_env_keeps_operator_values(self):
+        with mock.patch.dict(os.environ, {"OMP_NUM_THREADS": "6"}):
+            os.environ.pop("MKL_NUM_THREADS", None)
+            cpu.set_thread_env(2)
+            self.assertEqual((os.environ["OMP_NUM_THREADS"], os.environ["MKL_NUM_THREADS"]), ("6", "2"))
+
+
+# --- 텍스트 높이 기반 확대 배율 (ADAPTIVE_SCALE) ---
+class AdaptiveScaleTests(FakeOcrTestCase):
+    # 같은 화면을 폭만 달리 캡처: 본문 글자 높이 ≈ 23px × (폭 / 1280)
+    CORPUS = [((1280, 600), course_rows("012345", "012346")), ((2560, 1200), course_rows("012345", "012346")),
+              ((640, 300), course_rows("012345", "012346"))]
+
+    def scales(self, page: int) -> tuple[float, float, float]:
+        from .custom_paddle_ocr_script import ocr_page_tokens
+
+        stats: dict = {}
+        ocr_page_tokens(self.paths[page], stats=stats)
+        return stats["median_text_h"], stats["content_scale"], stats["pinpoint_scale"]
+
+    def test_scale_reaches_target_height(self):
+        median_h, content, pinpoint = self.scales(0)
+        self.assertAlmostEqual(median_h * content, 40, delta=0.5)     # TARGET_TEXT_HEIGHT
+        self.assertAlmostEqual(median_h * pinpoint, 80, delta=0.5)    # PINPOINT_TEXT_HEIGHT
+
+    def test_large_text_is_not_upscaled(self):
+        _, content, pinpoint = self.scales(1)
+        self.assertEqual(content, 1.0)
+        self.assertLess(pinpoint, 2)
+
+    def test_small_text_is_capped(self):
+        _, content, pinpoint = self.scales(2)
+        self.assertGreater(content, 3)
+        self.assertEqual(pinpoint, 4.0)   # MAX_SCALE
+
+    def test_fixed_scales_when_disabled(self):
+        self.configure(ADAPTIVE_SCALE=False)
+        self.assertEqual(self.scales(1)[1:], (2.0, 4))
+
+
+# --- 표 재구성 (transcripts/ocr_parsing.py) ---
+class TableParsingTests(SimpleTestCase):
+    def codes(self, courses: list[dict]) -> list[tuple]:
+        return [(c["code"], c["grade"], c["retake"], c["semester"]) for c in courses]
+
+    def test_find_columns_splits_between_header_tokens(self):
+        raw = page_tokens([])["raw"]
+        columns = find_columns(raw, _find_header(raw))
+        self.assertEqual([c["key"] for c in columns], ["학수번호", "과목명", "성적"])
+        # 이웃한 헤더 사이의 중간이 경계, 양 끝 열은 페이지 끝까지
+        self.assertEqual([(c["x0"], c["x1"]) for c in columns],
+                         [(float("-inf"), 210.0), (210.0, 400.0), (400.0, float("inf"))])
+
+    def test_find_columns_without_header(self):
+        self.assertEqual(find_columns(page_tokens([])["raw"], None), [])
+
+    def test_group_rows_joins_jittered_tokens(self):
+        header = token("학수번호", 100, 50, w=80)
+        items = [token("A0", 500, 104), token("012345", 100, 98), token("국어", 300, 101),
+                 token("012346", 100, 140), token("B+", 500, 143), token("제목", 100, 10)]
+        rows = group_rows(items, header)
+        self.assertEqual([[it["txt"] for it in row] for row in rows], [["012345", "국어", "A0"], ["012346", "B+"]])
+
+    def test_build_courses(self):
+        tokens = page_tokens([("012345", "A+"), ("O12346", "B0"), ("012347", "")])
+        self.assertEqual(self.codes(build_courses(tokens)), [
+            ("012345", "A+", False, "1-1"), ("012346", "B0", False, "1-1"), ("012347", "", False, "1-1"),
+        ])
+
+    def test_build_courses_snaps_codes_with_index(self):
+        tokens = page_tokens([("012845", "A+")])
+        self.assertEqual(build_courses(tokens)[0]["code"], "012845")
+        self.assertEqual(build_courses(tokens, CodeIndex(["012345"]))[0]["code"], "012345")
+
+    def test_retake_column(self):
+        tokens = page_tokens([("012345", "A+"), ("012346", "C0")])
+        tokens["raw"].append(token("재수강", 650, 50, w=60))
+        tokens["raw"].append(token("재수강", 650, 140, w=60))
+        self.assertEqual([c["retake"] for c in build_courses(tokens)], [False, True])
+
+    def test_multi_semester_page(self):
+        # 스크롤 캡처: 한 페이지에 학기 줄이 두 번 나온다
+        tokens = page_tokens([("012345", "A+"), ("012346", "B0")])
+        tokens["raw"] += [token("2021학년도 1학년 2학기", 200, 190, w=200),
+                          token("012347", 100, 230, w=70), token("C+", 500, 230, w=30)]
+        self.assertEqual(self.codes(build_courses(tokens)), [
+            ("012345", "A+", False, "1-1"), ("012346", "B0", False, "1-1"), ("012347", "C+", False, "1-2"),
+        ])
+
+    def test_headerless_rows(self):
+        # 헤더 줄 없이 이어지는 다음 장: 행 전체 텍스트에서 코드/성적을 읽는다
+        raw = [token("2022학년도 2학년 1학기", 200, 10, w=200),
+               token("012345", 100, 60, w=70), token("국어", 300, 60), token("A0", 500, 60, w=30),
+               token("012346", 100, 100, w=70), token("수학", 300, 100), token("F", 500, 100, w=20)]
+        courses = build_courses({"raw": raw, "content": raw, "pinpoint": []})
+        self.assertEqual([(c["code"], c["semester"]) for c in courses], [("012345", "2-1"), ("012346", "2-1")])
+        self.assertEqual(courses[0]["grade"], "A0")
+
+    def test_pinpoint_code_used_when_row_has_none(self):
+        tokens = page_tokens([("?????", "A+")])
+        tokens["pinpoint"] = [token("012399", 100, 100, w=80, h=24)]
+        self.assertEqual(build_courses(tokens)[0]["code"], "012399")
+
+    def test_no_raw_tokens(self):
+        self.assertEqual(build_courses({"raw": [], "content": [], "pinpoint": []}), [])
+
+    def test_dedupe_keeps_row_with_grade(self):
+        courses = [
+            {"code": "012345", "grade": "", "retake": False, "semester": "1-1"},
+            {"code": "012345", "grade": "A0", "retake": False, "semester": "1-1"},
+            {"code": "012345", "grade": "B0", "retake": True, "semester": "2-1"},
+            {"code": "012345", "grade": "C0", "retake": False, "semester": "1-1"},
+        ]
+        self.assertEqual(self.codes(dedupe_courses(courses)),
+                         [("012345", "A0", False, "1-1"), ("012345", "B0", True, "2-1")])
+
+    def test_merge_pages_in_order(self):
+        rows = lambda *codes: [{"code": c, "grade": "A0", "retake": False, "semester": "1-1"} for c in codes]
+        self.assertEqual([c["code"] for c in merge_pages([rows("1", "2"), None, rows("2", "3")])], ["1", "2", "3"])
+
+
+# --- OCR 토큰 직렬화 (transcripts/tokens.py) ---
+class TokenPackingTests(SimpleTestCase):
+    def test_round_trip(self):
+        tokens = page_tokens([("012345", "A+")])
+        tokens["pinpoint"] = [token("012345", 100, 100, w=80, h=24, score=0.87654321)]
+        unpacked = unpack_tokens(pack_tokens(tokens))
+        self.assertEqual(set(unpacked), {"raw", "content", "pinpoint"})
+        for name, items in tokens.items():
+            self.assertEqual([it["txt"] for it in unpacked[name]], [it["txt"] for it in items])
+            for got, want in zip(unpacked[name], items):
+                self.assertEqual(got["bbox"], tuple(want["bbox"]))
+                for key in ("cx", "cy", "h"):
+                    self.assertAlmostEqual(got[key], want[key])
+                self.assertAlmostEqual(got["score"], want["score"], places=4)
+        # 다시 파싱한 결과도 같다
+        self.assertEqual(build_courses(unpacked), build_courses(tokens))
+
+    def test_empty_streams(self):
+        self.assertEqual(unpack_tokens(pack_tokens({"raw": [], "content": [], "pinpoint": []})),
+                         {"raw": [], "content": [], "pinpoint": []})
+
+    def test_accepts_memoryview(self):
+        # DB BinaryField 는 memoryview 로 돌려준다
+        blob = pack_tokens(page_tokens([("012345", "A+")]))
+        self.assertEqual(unpack_tokens(memoryview(blob)), unpack_tokens(blob))
+
+
+# --- 양식 템플릿 (transcripts/layouts.py) ---
+class LayoutTemplateTests(FakeOcrTestCase):
+    # 같은 양식의 두 성적표 (과목만 다르다)
+    CORPUS = [((1280, 600), course_rows("012345", "012346", "012347")),
+              ((1280, 600), course_rows("022345", "022346", "022347"))]
+
+    def image(self, number: int, width: int, height: int, rng):
+        """synthetic_tokens 의 글자 자리를 칠한 화면 (양식 지문은 열 배치로 정해진다)"""
+        import numpy as np
+
+        image = np.full((height, width, 3), 255, dtype=np.uint8)
+        for it in synthetic_tokens(self.CORPUS[number][1], width):
+            x0, y0, x1, y1 = (int(v) for v in it["bbox"])
+            image[y0:y1, x0:x1] = 30 + 40 * number
+        return image
+
+    def ocr(self, page: int) -> dict:
+        from .custom_paddle_ocr_script import ocr_page_tokens
+
+        stats: dict = {}
+        ocr_page_tokens(self.paths[page], stats=stats, layouts=LayoutStore(LayoutTemplate.objects.all()))
+        return stats
+
+    def test_learn_then_match(self):
+        self.assertEqual(self.ocr(0)["layout"], "learned")
+        template = LayoutTemplate.objects.get()
+        self.assertEqual([h["txt"] for h in template.layout["heads"]][:3], ["이수구분", "학수번호", "과목명"])
+
+        first_pass = self.calls("recognize")[0]
+        CountingFakeBackend.calls = []
+        self.assertEqual(self.ocr(1)["layout"], "template")
+        template.refresh_from_db()
+        self.assertEqual(template.hit_count, 1)
+        # 양식이 맞으면 1차 인식은 헤더 줄과 그 위(학기 줄)만
+        self.assertLess(self.calls("recognize")[0], first_pass)
+        self.assertEqual(self.calls("recognize")[0], 1 + len(HEADERS))
+
+    def test_match_distance(self):
+        store = LayoutStore([LayoutTemplate(id=1, fingerprint="f" * 16, layout={})])
+        self.assertEqual(store.match("f" * 16), (1, {}))
+        self.assertEqual(store.match("f" * 15 + "0"), (1, {}))    # 4bit 차이
+        self.assertIsNone(store.match("0" * 16))
+        with self.settings(TRANSCRIPT_OCR={"LAYOUT_MAX_DISTANCE": 2}):
+            self.assertIsNone(store.match("f" * 15 + "0"))
+
+
+# --- 업로드 사전 점검 (transcripts/triage.py) ---
+def chat_screenshot(lines: int = 12) -> bytes:
+    """왼쪽 정렬된 문장 줄 (단어 폭이 줄마다 달라 열이 생기지 않는 채팅/웹 화면)"""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    image = np.full((400, 640), 255, dtype=np.uint8)
+    for y in range(20, 20 + 30 * lines, 30):
+        x, end = 20, rng.integers(200, 620)
+        while x < end:
+            w = int(rng.integers(15, 70))
+            image[y:y + 14, x:x + w] = 40
+            x += w + 6
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+class TriageTests(TestCase):
+    def triage(self, data: bytes, layouts=None) -> dict:
+        from .triage import triage_image
+
+        return triage_image(data, layouts)
+
+    def test_accepts_table(self):
+        result = self.triage(screenshot())
+        self.assertTrue(result["ok"], result)
+        self.assertEqual(result["metrics"]["text_rows"], 12)
+        self.assertGreaterEqual(result["metrics"]["columns"], 5)
+
+    def test_rejects_undecodable_and_small(self):
+        import cv2
+        import numpy as np
+
+        self.assertFalse(self.triage(b"not an image")["ok"])
+        small = cv2.imencode(".png", np.full((100, 200), 255, dtype=np.uint8))[1].tobytes()
+        result = self.triage(small)
+        self.assertFalse(result["ok"])
+        self.assertIn("해상도", result["error"])
+
+    def test_rejects_blurry(self):
+        import cv2
+        import numpy as np
+
+        image = cv2.imdecode(np.frombuffer(screenshot(), dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        blurry = cv2.imencode(".png", cv2.GaussianBlur(image, (0, 0), 6))[1].tobytes()
+        result = self.triage(blurry)
+        self.assertFalse(result["ok"])
+        self.assertIn("흐려", result["error"])
+
+    def test_rejects_blank_and_non_table(self):
+        import cv2
+        import numpy as np
+
+        blank = cv2.imencode(".png", np.full((400, 640), 255, dtype=np.uint8))[1].tobytes()
+        self.assertFalse(self.triage(blank)["ok"])   # 빈 화면은 초점 검사에서 먼저 걸린다
+
+        # 줄 수는 충분하지만 열이 정렬되지 않은 화면
+        result = self.triage(chat_screenshot())
+        self.assertFalse(result["ok"])
+        self.assertIn("표를 찾을 수 없습니다", result["error"])
+        self.assertEqual(result["metrics"]["text_rows"], 12)
+        self.assertLess(result["metrics"]["columns"], 3)
+
+    def test_rejects_too_few_rows(self):
+        result = self.triage(chat_screenshot(lines=3))
+        self.assertFalse(result["ok"])
+
+    def test_flags_unknown_layout(self):
+        import cv2
+        import numpy as np
+        from .hashing import layout_fingerprint
+
+        image = cv2.imdecode(np.frombuffer(screenshot(), dtype=np.uint8), cv2.IMREAD_COLOR)
+        known = LayoutStore([LayoutTemplate(id=1, fingerprint=layout_fingerprint(image), layout={})])
+        self.assertEqual(self.triage(screenshot(), known)["flags"], [])
+        other = LayoutStore([LayoutTemplate(id=1, fingerprint="0" * 16, layout={})])
+        self.assertEqual(self.triage(screenshot(), other)["flags"], ["unknown_layout"])
+
+
+# --- 페이지 방향 (custom_paddle_ocr_script._orient_page, ORIENTATION_CHECK) ---
+class UpsideDownFakeBackend(CountingFakeBackend):
+    """각도 분류기가 모든 박스를 180° 로 판정하는 가짜 엔진. recognize 의 cls 인자를 기록한다"""
+    cls_flags: list[bool] = []
+
+    def upside_down_ratio(self, image_input, boxes, sample: int = 8) -> float:
+        return 1.0
+
+    def recognize(self, image_input, boxes, preprocess_info=None, cls: bool = False):
+        self.cls_flags.append(cls)
+        return super().recognize(image_input, boxes, preprocess_info, cls)
+
+
+class OrientationTests(FakeOcrTestCase):
+    CORPUS = [((1280, 600), course_rows("012345", "012346", "012347"))]
+
+    def setUp(self):
+        super().setUp()
+        UpsideDownFakeBackend.cls_flags = []
+
+    def courses(self, stats: dict) -> list[dict]:
+        from .custom_paddle_ocr_script import ocr_page_tokens
+
+        return build_courses(ocr_page_tokens(self.paths[0], stats=stats))
+
+    def test_upright_page_is_not_rotated(self):
+        stats: dict = {}
+        courses = self.courses(stats)
+        self.assertEqual([c["code"] for c in courses], ["012345", "012346", "012347"])
+        self.assertNotIn("rotation", stats)
+        self.assertEqual(len(self.calls("detect")), 1)
+
+    def test_upside_down_page_is_rotated_once(self):
+        from .custom_paddle_ocr_script import _engines
+
+        self.configure(BACKEND="transcripts.tests.UpsideDownFakeBackend")
+        _engines.clear()
+        stats: dict = {}
+        courses = self.courses(stats)
+        self.assertEqual(stats["rotation"], "180")
+        # 회전 후 한 번 더 검출하고, 회전된 페이지에서만 박스별 각도 분류
+        self.assertEqual(len(self.calls("detect")), 2)
+        self.assertTrue(UpsideDownFakeBackend.cls_flags)
+        self.assertTrue(all(UpsideDownFakeBackend.cls_flags))
+        self.assertEqual([c["code"] for c in courses], ["012345", "012346", "012347"])
+
+    def test_tall_boxes_rotate_quarter_turn(self):
+        import numpy as np
+        from .custom_paddle_ocr_script import _orient_page, _rect_quad, get_ocr
+
+        image = np.zeros((400, 200, 3), dtype=np.uint8)
+        tall = [_rect_quad((10, 10 + 60 * i, 30, 60 + 60 * i)) for i in range(5)]
+        rotated, boxes, name = _orient_page(get_ocr("accurate"), image, tall, redetect=False)
+        self.assertEqual((name, rotated.shape[:2], boxes), ("90ccw", (200, 400), None))
+
+    def test_check_disabled(self):
+        from .custom_paddle_ocr_script import _engines
+
+        self.configure(BACKEND="transcripts.tests.UpsideDownFakeBackend", ORIENTATION_CHECK=False)
+        _engines.clear()
+        stats: dict = {}
+        self.courses(stats)
+        self.assertNotIn("rotation", stats)
+        self.assertFalse(any(UpsideDownFakeBackend.cls_flags))
+
+
+# --- 세로로 긴 페이지 타일링 (TILING) ---
+class TilingTests(FakeOcrTestCase):
+    CORPUS = [((1280, 2600), course_rows(*[f"0{i:05d}" for i in range(60)]))]
+
+    def test_bands_overlap(self):
+        from .custom_paddle_ocr_script import _tile_bands
+
+        self.assertEqual(_tile_bands(2400), [(0, 2400)])
+        self.assertEqual(_tile_bands(2600), [(0, 1600), (1440, 2600)])
+        self.assertEqual(_tile_bands(4000), [(0, 1600), (1440, 3040), (2880, 4000)])
+        self.configure(TILING=False)
+        self.assertEqual(_tile_bands(4000), [(0, 4000)])
+
+    def test_bands_detected_in_sequence_and_deduped(self):
+        import cv2
+        from .custom_paddle_ocr_script import _box_rect, _detect_page, get_ocr
+
+        image = cv2.imread(self.paths[0])
+        stats: dict = {}
+        tiled = sorted(_box_rect(b) for b in _detect_page(get_ocr("accurate"), image, stats))
+        self.assertEqual(stats["tiles"], 2)
+        self.assertEqual(len(self.calls("detect")), 2)
+
+        self.configure(TILING=False)
+        whole = sorted(_box_rect(b) for b in _detect_page(get_ocr("accurate"), image))
+        self.assertEqual(tiled, whole)
+
+
+# --- PDF 텍스트 레이어 (transcripts/pdf.py) ---
+def transcript_pdf(rows: list[tuple[str, str]], text: bool = True) -> bytes:
+    """학기 줄 + 헤더 + (학수번호, 성적) 행을 텍스트로 쓴 한 쪽 PDF (text=False 면 텍스트 없는 스캔본처럼 빈 쪽)"""
+    import fitz
+
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    if text:
+        lines = [(("2021학년도 1학년 1학기", 72),), (("학수번호", 72), ("과목명", 200), ("성적", 330))]
+        lines += [((code, 72), ("과목", 200), (grade, 330)) for code, grade in rows]
+        for i, line in enumerate(lines):
+            for txt, x in line:
+                page.insert_text((x, 100 + 20 * i), txt, fontname="korea", fontsize=10)
+    return doc.tobytes()
+
+
+class PdfTextLayerTests(SimpleTestCase):
+    def path(self, data: bytes) -> str:
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_tokens_scaled_to_render_dpi(self):
+        import fitz
+        from .pdf import text_layer_tokens
+
+        path = self.path(transcript_pdf([("012345", "A+")]))
+        word = next(w for w in fitz.open(path)[0].get_text("words") if w[4] == "012345")
+        for dpi in (72, 200):
+            with self.settings(TRANSCRIPT_OCR={"PDF_RENDER_DPI": dpi}):
+                code = next(it for it in text_layer_tokens(path)["raw"] if it["txt"] == "012345")
+            scale = dpi / 72
+            for got, want in zip(code["bbox"], word[:4]):
+                self.assertAlmostEqual(got, want * scale, places=3)
+            self.assertAlmostEqual(code["h"], (word[3] - word[1]) * scale, places=3)
+
+    def test_tokens_match_rendered_image(self):
+        import cv2
+        from .pdf import render_page, text_layer_tokens
+
+        path = self.path(transcript_pdf([("012345", "A+")]))
+        image_path = render_page(path)
+        self.addCleanup(os.remove, image_path)
+        height, width = cv2.imread(image_path).shape[:2]
+        self.assertEqual((width, height), (round(595 * 200 / 72), round(842 * 200 / 72)))
+        tokens = text_layer_tokens(path)["raw"]
+        self.assertTrue(all(0 <= it["bbox"][0] and it["bbox"][2] <= width for it in tokens))
+
+    def test_words_merged_per_line_and_parsed(self):
+        from .pdf import text_layer_tokens
+
+        tokens = text_layer_tokens(self.path(transcript_pdf([("012345", "A+"), ("012346", "B0")])))
+        self.assertIn("2021학년도 1학년 1학기", [it["txt"] for it in tokens["raw"]])
+        courses = build_courses(tokens)
+        self.assertEqual([(c["code"], c["grade"]) for c in courses], [("012345", "A+"), ("012346", "B0")])
+
+    def test_scanned_page_has_no_tokens(self):
+        from .pdf import text_layer_tokens
+
+        self.assertIsNone(text_layer_tokens(self.path(transcript_pdf([], text=False))))
+
+
+# --- 엑셀/CSV 가져오기 (transcripts/spreadsheet.py) ---
+class SpreadsheetTests(SimpleTestCase):
+    def parse(self, text: str, name: str = "grades.csv", encoding: str = "utf-8-sig") -> list[dict]:
+        return parse_spreadsheet(SimpleUploadedFile(name, text.encode(encoding)))
+
+    def test_year_and_term_columns(self):
+        courses = self.parse("성적증명서\n"
+                             "학년,학기,학수번호,과목명,성적,재수강\n"
+                             "1,1,012345,국어,A+,\n"
+                             "1,2,012346,수학,B0,R\n")
+        self.assertEqual(courses, [
+            {"code": "012345", "grade": "A+", "retake": False, "semester": "1-1"},
+            {"code": "012346", "grade": "B0", "retake": True, "semester": "1-2"},
+        ])
+
+    def test_unpadded_codes_are_zero_padded(self):
+        # 엑셀에서 CSV 로 다시 저장하면 앞자리 0 이 빠진다
+        courses = self.parse("학년,학기,학수번호,과목명,성적\n"
+                             "1,1,12346,수학,B0\n"
+                             "1,2,1234,물리,A0\n")
+        self.assertEqual([c["code"] for c in courses], ["012346", "001234"])
+
+    def test_section_rows_set_semester(self):
+        courses = self.parse("학수번호,과목명,성적\n"
+                             "2021학년도 1학년 1학기,,\n"
+                             "012345,국어,A0\n"
+                             "2021학년도 1학년 2학기,,\n"
+                             "012399,물리,P\n", encoding="cp949")
+        self.assertEqual([(c["code"], c["semester"]) for c in courses], [("012345", "1-1"), ("012399", "1-2")])
+
+    def test_missing_code_column(self):
+        with self.assertRaises(ValueError):
+            self.parse("a,b\n1,2\n")
+
+    def test_unreadable_codes_are_reported(self):
+        stats: dict = {}
+        courses = parse_spreadsheet(SimpleUploadedFile("grades.csv", (
+            "성적증명서\n"
+            "학년,학기,학수번호,성적\n"
+            "1,1,012345,A0\n"
+            "1,1,??,B0\n"
+            "1,2,,\n"
+            "1,2,학수,C0\n").encode("utf-8")), stats)
+        self.assertEqual([c["code"] for c in courses], ["012345"])
+        self.assertEqual(stats["skipped_rows"], [4, 6])   # 시트 행 번호 (빈 칸 행은 과목이 아니므로 제외)
+
+
+# --- 저장된 토큰으로 다시 파싱 (reparse_transcripts) ---
+@override_settings(MEDIA_ROOT="/tmp/transcripts-test-media")
+class ReparseTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create(username="u1", student_id="C123456", full_name="홍길동")
+        self.transcript = Transcript.objects.create(user=user, status=Transcript.STATUS.error)
+        # 두 페이지가 같은 학기 화면을 겹쳐 찍어 012345 행이 두 번 나온다
+        for number, rows in ((1, [("012345", "A+"), ("012346", "B0")]), (2, [("012345", "A+"), ("012347", "C+")])):
+            TranscriptPage.objects.create(transcript=self.transcript, page_number=number,
+                                          file=ContentFile(b"x", name=f"p{number}.png"),
+                                          ocr_tokens=pack_tokens(page_tokens(rows)), parsed_rows=[],
+                                          status=TranscriptPage.STATUS.done)
+
+    def reparse(self, *args) -> str:
+        out = io.StringIO()
+        call_command("reparse_transcripts", *args, stdout=out)
+        return out.getvalue()
+
+    def test_reparse_matches_finalize(self):
+        self.reparse()
+        self.transcript.refresh_from_db()
+        reparsed = self.transcript.parsed_data
+        self.assertEqual([c["code"] for c in reparsed], ["012345", "012346", "012347"])
+
+        # 페이지 체크포인트도 갱신되었으므로 다시 병합해도(페이지 추가/삭제 시) 같은 결과
+        finalize_transcript([], self.transcript.id)
+        self.transcript.refresh_from_db()
+        self.assertEqual(self.transcript.parsed_data, reparsed)
+        self.assertEqual(len(self.transcript.pages.get(page_number=2).parsed_rows), 2)
+
+        # 바뀐 것이 없으면 다시 실행해도 변경 없음
+        self.assertIn("changed=0", self.reparse("--dry-run"))
+        self.assertIn("changed=0", self.reparse())
+        self.transcript.refresh_from_db()
+        self.assertEqual(self.transcript.status, Transcript.STATUS.done)
+
+    def test_busy_transcript_is_skipped(self):
+        # 워커가 처리 중인 성적표는 페이지도 성적표도 건드리지 않는다
+        Transcript.objects.filter(pk=self.transcript.pk).update(status=Transcript.STATUS.processing)
+        for args in ((), ("--dry-run",)):
+            self.assertIn("skipped_busy=1", self.reparse(*args))
+        self.transcript.refresh_from_db()
+        self.assertEqual(self.transcript.status, Transcript.STATUS.processing)
+        self.assertIsNone(self.transcript.parsed_data)
+        self.assertEqual([p.parsed_rows for p in self.transcript.pages.all()], [[], []])
+
+    def test_claim_lost_to_concurrent_edit(self):
+        # 목록을 읽은 뒤 수정 요청이 먼저 성적표를 잡은 경우
+        Transcript.objects.filter(pk=self.transcript.pk).update(status=Transcript.STATUS.done)
+        from transcripts.management.commands.reparse_transcripts import Command
+
+        with mock.patch.object(Command, "_claim", return_value=False):
+            self.assertIn("skipped_busy=1", self.reparse())
+        self.assertEqual([p.parsed_rows for p in self.transcript.pages.all()], [[], []])
+
+
+# --- 페이지 추가/교체/삭제 (views.TranscriptPagesView, TranscriptPageDetailView) ---
+def csv_page(*rows: str, name: str = "page.csv") -> SimpleUploadedFile:
+    return SimpleUploadedFile(name, ("학년,학기,학수번호,성적\n" + "\n".join(rows)).encode("utf-8"))
+
+
+@override_settings(MEDIA_ROOT="/tmp/transcripts-test-media", TRANSCRIPT_OCR={"CACHE_ENABLED": False})
+class PageEditTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(username="u1", student_id="C123456", full_name="홍길동")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # 작은 CSV 는 요청 안에서 바로 처리되어 done 이 된다
+        response = self.client.post(reverse("transcript-upload", args=[self.user.id]),
+                                    {"files": [csv_page("1,1,000001,A+")]}, format="multipart")
+        self.assertEqual(response.json()["status"], "done")
+
+    def append(self, *rows: str):
+        return self.client.post(reverse("transcript-pages", args=[self.user.id]),
+                                {"files": [csv_page(*rows)]}, format="multipart")
+
+    def status(self) -> str:
+        return self.client.get(reverse("transcript-status", args=[self.user.id])).json()["status"]
+
+    def test_skipped_rows_are_reported_on_page(self):
+        self.assertEqual(self.append("1,2,000002,B0", "1,2,??,C0").status_code, 201)
+        pages = self.client.get(reverse("transcript-pages", args=[self.user.id])).json()["pages"]
+        self.assertEqual([p["status"] for p in pages], ["done", "done"])
+        self.assertEqual(pages[0]["error"], None)
+        self.assertIn("건너뛴 행: 3", pages[1]["error"])
+
+    def test_queued_edit_blocks_other_edits_until_merged(self):
+        # 큐로 보내는 경로 (워커 실행은 막아 두고 상태 전이만 본다)
+        with override_settings(TRANSCRIPT_OCR={"CACHE_ENABLED": False, "SPREADSHEET_SYNC_MAX_BYTES": 0}), \
+                mock.patch("transcripts.views.process_transcript.delay") as delay:
+            self.assertEqual(self.append("1,2,000002,B0").status_code, 201)
+            self.assertEqual(self.status(), "pending")
+            # 이전 결과(done)를 돌려주지 않는다
+            self.assertEqual(self.client.get(reverse("transcript-parsed", args=[self.user.id])).status_code, 404)
+            # 두 번째 수정은 처리 실행을 하나 더 띄우지 않고 거절된다
+            self.assertEqual(self.append("1,2,000003,C0").status_code, 409)
+            detail = reverse("transcript-page-detail", args=[self.user.id, 1])
+            self.assertEqual(self.client.delete(detail).status_code, 409)
+        self.assertEqual(delay.call_count, 1)
+
+        transcript = Transcript.objects.get()
+        for page in transcript.pages.exclude(status=TranscriptPage.STATUS.done):
+            process_transcript_page(page.id)
+        finalize_transcript([], transcript.id)
+        self.assertEqual(self.status(), "done")
+        self.assertEqual(self.append("1,2,000003,C0").status_code, 201)
+        self.assertEqual([c["code"] for c in Transcript.objects.get().parsed_data], ["000001", "000002", "000003"])
+
+    def test_claim_is_atomic(self):
+        from .views import _claim
+
+        first, second = Transcript.objects.get(), Transcript.objects.get()
+        self.assertTrue(_claim(first))
+        self.assertFalse(_claim(second))   # 같은 시점에 done 을 읽은 다른 요청
+
+    def test_enqueue_failure_rolls_back_to_editable(self):
+        with override_settings(TRANSCRIPT_OCR={"CACHE_ENABLED": False, "SPREADSHEET_SYNC_MAX_BYTES": 0}), \
+                mock.patch("transcripts.views.process_transcript.delay", side_effect=ConnectionError("broker down")):
+            response = self.append("1,2,000002,B0")
+        self.assertEqual(response.json()["status"], "error")
+        self.assertIn("대기열", response.json()["error"])
+        self.assertEqual(self.status(), "error")
+        # pending 에 갇히지 않으므로 바로 다시 수정할 수 있다
+        self.assertEqual(self.append("1,2,000003,C0").status_code, 201)
+        self.assertEqual(self.status(), "done")
+
+
+# --- 멈춘 성적표 다시 큐에 넣기 (resume_transcripts) ---
+class ResumeTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(username="u1", student_id="C123456", full_name="홍길동")
+        patcher = mock.patch("transcripts.management.commands.resume_transcripts.process_transcript.delay")
+        self.delay = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def transcript(self, status: str, minutes_ago: int | None) -> Transcript:
+        from datetime import timedelta
+        from django.utils import timezone
+
+        t = Transcript.objects.create(user=self.user, status=status)
+        if minutes_ago is not None:
+            Transcript.objects.filter(pk=t.pk).update(enqueued_at=timezone.now() - timedelta(minutes=minutes_ago))
+        return t
+
+    def resume(self, *args) -> list[int]:
+        call_command("resume_transcripts", *args, stdout=io.StringIO())
+        return sorted(call.args[0] for call in self.delay.call_args_list)
+
+    def test_stale_pending_is_requeued(self):
+        failed = self.transcript(Transcript.STATUS.error, 5)
+        stale = self.transcript(Transcript.STATUS.pending, 60)
+        self.transcript(Transcript.STATUS.pending, 5)                    # 아직 대기열에 있을 수 있다
+        self.transcript(Transcript.STATUS.processing, 60)                # --processing 없이는 제외
+        self.assertEqual(self.resume(), [failed.id, stale.id])
+        stale.refresh_from_db()
+        self.assertGreaterEqual(stale.enqueued_at, stale.created_at)   # 다시 넣은 시각으로 갱신
+
+    def test_stale_threshold(self):
+        stale = self.transcript(Transcript.STATUS.pending, 60)
+        self.assertEqual(self.resume("--stale-minutes", "90"), [])
+        self.assertEqual(self.resume("--stale-minutes", "0"), [])
+        self.assertEqual(self.resume("--stale-minutes", "30"), [stale.id])
+
+
+# --- 파이프라인 프로파일 (transcripts/profiling.py) ---
+@override_settings(MEDIA_ROOT="/tmp/transcripts-test-media")
+class ProfilingTests(FakeOcrTestCase):
+    CORPUS = [((1280, 600), course_rows("012345", "012346", "012347"))]
+
+    def test_stage_outside_profiled_is_ignored(self):
+        from .profiling import stage
+
+        with stage("det"):
+            pass   # 예외 없이 통과만 한다
+
+    def test_nested_stage_counts_outer_only(self):
+        from .profiling import profiled, stage
+
+        timings: dict = {}
+        with profiled(timings):
+            with stage("pinpoint"):
+                with stage("rec"):
+                    pass
+            with stage("det"), stage("det"):
+                pass
+            with stage("det"):
+                pass
+        self.assertEqual(timings["pinpoint_calls"], 1)
+        self.assertNotIn("rec_ms", timings)
+        self.assertEqual(timings["det_calls"], 2)
+        self.assertIn("total_ms", timings)
+
+    def test_nested_profiled_restores_outer(self):
+        from .profiling import profiled, stage
+
+        outer, inner = {}, {}
+        with profiled(outer):
+            with profiled(inner):
+                with stage("rec"):
+                    pass
+            with stage("det"):
+                pass
+        self.assertEqual((inner["rec_calls"], "det_calls" in inner), (1, False))
+        self.assertEqual((outer["det_calls"], "rec_calls" in outer), (1, False))
+
+    def test_pinpoint_calls_count_rois(self):
+        from .custom_paddle_ocr_script import ocr_page_tokens
+        from .profiling import profiled
+
+        for batch in (True, False):
+            self.configure(PINPOINT_BATCH=batch)
+            stats: dict = {}
+            with profiled(stats):
+                ocr_page_tokens(self.paths[0], stats=stats)
+            self.assertEqual(stats["pinpoint_calls"], stats["pinpoint_rois"])
+
+    def test_report_reads_profile_columns_only(self):
+        from .profiling import profile_report, report_pages
+
+        user = get_user_model().objects.create(username="u1", student_id="C123456", full_name="홍길동")
+        for det_ms in (10.0, 30.0):
+            t = Transcript.objects.create(user=user)
+            TranscriptPage.objects.create(transcript=t, page_number=1, file=ContentFile(b"x", name="p.png"),
+                                          ocr_tokens=pack_tokens(page_tokens([("012345", "A+")])),
+                                          profile={"det_ms": det_ms, "source": "ocr", "cache": None})
+        transcripts = Transcript.objects.prefetch_related(report_pages())
+        with self.assertNumQueries(2):
+            report = profile_report(transcripts)
+            pages = [p for t in transcripts for p in t.pages.all()]
+        self.assertEqual(report["transcripts"], 2)
+        self.assertEqual(report["page"]["det_ms"], {"n": 2, "p50": 20.0, "p95": 29.0, "max": 30.0})
+        self.assertEqual(report["page_sources"], {"ocr": 2})
+        self.assertIn("ocr_tokens", pages[0].get_deferred_fields())
+
+
+# --- OCR 벤치마크 (transcripts/benchmark.py) ---
+class BenchmarkTests(FakeOcrTestCase):
+    CORPUS = [((1280, 600), course_rows("012345", "012346", "012347"))]
+
+    def test_synthetic_rows(self):
+        import random
+        from .benchmark import synthetic_rows
+
+        codes = [f"0{i:05d}" for i in range(20)]
+        rows = synthetic_rows(random.Random(1), codes, semesters=3)
+        self.assertEqual(rows, synthetic_rows(random.Random(1), codes, semesters=3))
+        by_semester: dict = {}
+        for row in rows:
+            by_semester.setdefault(row["semester"], []).append(row["code"])
+        self.assertEqual(list(by_semester), ["1-1", "1-2", "2-1"])
+        for semester_codes in by_semester.values():
+            self.assertTrue(4 <= len(semester_codes) <= 8)
+            self.assertEqual(len(set(semester_codes)), len(semester_codes))
+
+    def test_synthetic_tokens_parse_back_to_rows(self):
+        rows = course_rows("012345", "012346") + course_rows("012347", semester="1-2")
+        rows[1]["retake"], rows[2]["grade"] = True, "B+"
+        for width in (800, 1280, 1920):
+            tokens = synthetic_tokens(rows, width)
+            self.assertLessEqual(max(it["bbox"][2] for it in tokens), width)
+            self.assertEqual(build_courses({"raw": tokens, "content": tokens, "pinpoint": []}), rows)
+        # 폭에 비례해 좌표가 바뀐다
+        code = [it for it in synthetic_tokens(rows, 640) if it["txt"] == "012345"][0]
+        base = [it for it in synthetic_tokens(rows) if it["txt"] == "012345"][0]
+        self.assertAlmostEqual(code["cx"] * 2, base["cx"])
+
+    def test_score_rows(self):
+        from .benchmark import score_rows
+
+        truth = course_rows("012345", "012346") + course_rows("012345", semester="2-1")
+        predicted = [dict(truth[2]), {**truth[1], "grade": "B0"}, {**truth[0], "semester": "1-2"},
+                     {"code": "099999", "grade": "A0", "retake": False, "semester": "1-1"}]
+        counts = score_rows(predicted, truth)
+        # 012345 두 행은 학기가 같은 예측과 먼저 짝지어진다 (2-1 은 정확, 1-1 은 남은 1-2 예측과)
+        self.assertEqual(counts, {"truth_rows": 3, "pred_rows": 4, "exact_rows": 1,
+                                  "code_ok": 3, "grade_ok": 2, "retake_ok": 3, "semester_ok": 2})
+        self.assertEqual(score_rows([], truth)["code_ok"], 0)
+
+    def test_accuracy(self):
+        from .benchmark import accuracy, score_rows
+
+        truth = course_rows("012345", "012346")
+        counts = [score_rows(truth, truth), score_rows([{**truth[0], "grade": "F"}], truth)]
+        self.assertEqual(accuracy(counts), {"code_acc": 0.75, "grade_acc": 0.5, "retake_acc": 0.75,
+                                            "semester_acc": 0.75, "row_exact": 0.5, "code_precision": 1.0})
+        self.assertEqual(accuracy([]), {})
+        self.assertEqual(accuracy([score_rows([], [])]), {})
+
+    def test_pareto_front(self):
+        from .benchmark import pareto_front
+
+        points = [{"name": "a", "ms": 100, "acc": 0.90}, {"name": "b", "ms": 200, "acc": 0.95},
+                  {"name": "c", "ms": 250, "acc": 0.93}, {"name": "d", "ms": 100, "acc": 0.80},
+                  {"name": "e", "ms": 300, "acc": 0.99}]
+        self.assertEqual([p["name"] for p in pareto_front(points, "ms", "acc")], ["a", "b", "e"])
+        self.assertEqual(pareto_front([], "ms", "acc"), [])
+
+    def test_run_pages_scores_fake_corpus(self):
+        from .benchmark import accuracy, load_manifest, run_pages
+
+        results = run_pages(self.corpus_dir, load_manifest(self.corpus_dir)["pages"])
+        self.assertEqual(len(results), 1)
+        self.assertIn("total_ms", results[0]["timings"])
+        self.assertEqual(accuracy([r["score"] for r in results])["row_exact"], 1.0)
+
+
+# --- OCR 설정 조회 (transcripts/conf.py) ---
+class OcrSettingTests(SimpleTestCase):
+    def env(self, **values):
+        patcher = mock.patch.dict(os.environ, {f"TRANSCRIPT_OCR_{k}": v for k, v in values.items()})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_env_values_are_coerced_to_default_type(self):
+        from .conf import ocr_setting
+
+        self.env(PINPOINT_BATCH="off", CACHE_PHASH_DISTANCE="12", CASCADE_SCORE_THRESHOLD="0.5",
+                 CACHE_ENABLED="Yes", FAKE_CORPUS_DIR="/data/corpus")
+        self.assertIs(ocr_setting("PINPOINT_BATCH"), False)
+        self.assertIs(ocr_setting("CACHE_ENABLED"), True)
+        self.assertEqual(ocr_setting("CACHE_PHASH_DISTANCE"), 12)
+        self.assertIsInstance(ocr_setting("CACHE_PHASH_DISTANCE"), int)
+        self.assertEqual(ocr_setting("CASCADE_SCORE_THRESHOLD"), 0.5)
+        self.assertEqual(ocr_setting("FAKE_CORPUS_DIR"), "/data/corpus")
+
+    def test_lookup_order(self):
+        from .conf import DEFAULTS, ocr_overrides, ocr_setting
+
+        self.assertEqual(ocr_setting("LAYOUT_MAX_DISTANCE"), DEFAULTS["LAYOUT_MAX_DISTANCE"])
+        with self.settings(TRANSCRIPT_OCR={"LAYOUT_MAX_DISTANCE": 5}):
+            self.assertEqual(ocr_setting("LAYOUT_MAX_DISTANCE"), 5)
+            self.env(LAYOUT_MAX_DISTANCE="7")
+            self.assertEqual(ocr_setting("LAYOUT_MAX_DISTANCE"), 7)
+            with ocr_overrides(LAYOUT_MAX_DISTANCE=9):
+                self.assertEqual(ocr_setting("LAYOUT_MAX_DISTANCE"), 9)
+            self.assertEqual(ocr_setting("LAYOUT_MAX_DISTANCE"), 7)
+
+    def test_overrides_nest_and_restore(self):
+        from .conf import _overrides, ocr_overrides, ocr_setting
+
+        with ocr_overrides(MIN_SCORE=0.3, CASCADE=True):
+            with ocr_overrides(MIN_SCORE=0.4):
+                self.assertEqual((ocr_setting("MIN_SCORE"), ocr_setting("CASCADE")), (0.4, True))
+            self.assertEqual(ocr_setting("MIN_SCORE"), 0.3)
+            with self.assertRaises(RuntimeError), ocr_overrides(CASCADE=False):
+                raise RuntimeError
+            self.assertIs(ocr_setting("CASCADE"), True)
+        self.assertEqual(_overrides, {})
+
+    def test_unknown_override_is_rejected(self):
+        from .conf import _overrides, ocr_overrides
+
+        with self.assertRaises(KeyError), ocr_overrides(MIN_SCORE=0.3, NOT_A_SETTING=1):
+            pass
+        self.assertEqual(_overrides, {})
+
+    def test_engine_key_follows_overrides(self):
+        from .conf import ocr_overrides
+        from .custom_paddle_ocr_script import _engine_key
+
+        base = _engine_key("accurate")
+        with ocr_overrides(DROP_SCORE=0.5):
+            self.assertNotEqual(_engine_key("accurate"), base)
+        with ocr_overrides(CONTENT_SHARPEN=False):   # 엔진 파라미터가 아니면 엔진을 다시 만들지 않는다
+            self.assertEqual(_engine_key("accurate"), base)
+        self.assertEqual(_engine_key("accurate"), base)
+
+
+# --- 가짜 엔진 재생 (ocr_backends.FakeOcrBackend) ---
+class FakeReplayTests(FakeOcrTestCase):
+    CORPUS = [((1280, 600), course_rows("012345", "012346", "012347")),
+              ((1920, 700), course_rows("022345", "022346") + course_rows("022347", semester="1-2")),
+              ((800, 500), course_rows("032345", semester="2-1"))]
+
+    def test_pages_parse_to_manifest_rows(self):
+        from .custom_paddle_ocr_script import ocr_page_tokens
+
+        for path, (_, rows) in zip(self.paths, self.CORPUS):
+            tokens = ocr_page_tokens(path)
+            self.assertEqual(build_courses(tokens), rows)
+            # 학수번호는 핀포인트 인식에서도 같은 값으로 읽힌다
+            self.assertLessEqual({r["code"] for r in rows}, {it["txt"] for it in tokens["pinpoint"]})
+
+    def test_unknown_page_replays_a_corpus_page_scaled(self):
+        import cv2
+        from .custom_paddle_ocr_script import get_ocr, ocr_page_tokens
+
+        image = cv2.imread(self.paths[0])
+        resized = cv2.resize(image, (640, 300))
+        path = os.path.join(self.corpus_dir, "upload.png")
+        cv2.imwrite(path, resized)
+        rows = build_courses(ocr_page_tokens(path))
+        self.assertIn(rows, [r for _, r in self.CORPUS])
+        tokens = get_ocr().run_ocr(resized)
+        self.assertLessEqual(max(it["bbox"][2] for it in tokens), 640)
+        # ROI crop 처럼 페이지보다 작은 배열은 읽을 것이 없다
+        self.assertEqual(get_ocr().run_ocr(image[:100, :200].copy()), [])
+
+    def test_band_view_maps_to_band_coordinates(self):
+        import cv2
+        from .custom_paddle_ocr_script import get_ocr
+
+        image = cv2.imread(self.paths[0])
+        page = get_ocr().run_ocr(image)
+        band = get_ocr().run_ocr(image[200:400])
+        self.assertEqual(sorted(it["txt"] for it in band), sorted(it["txt"] for it in page if 200 <= it["cy"] < 400))
+        for it in band:
+            self.assertTrue(0 <= it["cy"] < 200)
+
+    def test_exported_tokens_and_min_score(self):
+        import cv2
+        import numpy as np
+        from .custom_paddle_ocr_script import get_ocr
+
+        corpus_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, corpus_dir)
+        cv2.imwrite(os.path.join(corpus_dir, "export.png"),
+                    np.random.default_rng(7).integers(0, 256, (600, 1280, 3), dtype=np.uint8))
+        tokens = page_tokens([("012345", "A+"), ("012346", "B0")])
+        tokens["content"] = [dict(it) for it in tokens["raw"]]
+        tokens["content"][-1]["score"] = 0.05          # 마지막 성적 토큰은 인식 점수가 낮다
+        write_token_manifest(corpus_dir, [{"file": "export.png", "rows": [], "tokens": tokens}])
+        self.configure(FAKE_CORPUS_DIR=corpus_dir)
+
+        image = cv2.imread(os.path.join(corpus_dir, "export.png"))
+        ocr = get_ocr()
+        self.assertEqual(len(ocr.detect(image)), len(tokens["raw"]))     # 검출은 점수와 무관
+        texts = [it["txt"] for it in ocr.run_ocr(image)]
+        self.assertEqual(len(texts), len(tokens["raw"]) - 1)
+        self.assertNotIn("B0", texts)
+        self.configure(FAKE_CORPUS_DIR=corpus_dir, MIN_SCORE=0.01)
+        self.assertIn("B0", [it["txt"] for it in get_ocr().run_ocr(image)])
+
+
+# --- 노드 공유 OCR 추론 서버 (transcripts/ocr_server.py) ---
+class OcrServerTests(FakeOcrTestCase):
+    CORPUS = [((1280, 600), course_rows("012345", "012346", "012347"))]
+
+    def setUp(self):
+        super().setUp()
+        import threading
+        from .ocr_server import OcrServer
+
+        # 서버를 같은 프로세스에서 띄우므로 블록 등록은 클라이언트 것 하나뿐이다 (서버가 빼면 클라이언트 unlink 와 겹친다)
+        from multiprocessing import shared_memory
+        patcher = mock.patch("transcripts.ocr_server._attach",
+                             side_effect=lambda name: shared_memory.SharedMemory(name=name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.socket_path = os.path.join(self.corpus_dir, "ocr.sock")
+        self.configure(BACKEND="transcripts.ocr_server.RemoteOcrBackend", SERVER_SOCKET=self.socket_path,
+                       SERVER_BACKEND="transcripts.tests.CountingFakeBackend")
+        self.server = OcrServer(self.socket_path)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.shutdown)
+
+    def remote(self):
+        from .ocr_server import RemoteOcrBackend
+
+        client = RemoteOcrBackend()
+        self.addCleanup(client._close_socket)
+        self.addCleanup(client._release_image)
+        return client
+
+    def test_round_trip_matches_local_engine(self):
+        import cv2
+
+        image = cv2.imread(self.paths[0])
+        local, remote = CountingFakeBackend(), self.remote()
+        boxes = remote.detect(image)
+        self.assertEqual([b.tolist() for b in boxes], [b.tolist() for b in local.detect(image)])
+        self.assertEqual(remote.recognize(image, boxes[:5]), local.recognize(image, boxes[:5]))
+        self.assertEqual(remote.run_ocr(image), local.run_ocr(image))
+        self.assertEqual(remote.upside_down_ratio(image, boxes), 0.0)
+
+    def test_page_image_is_shared_once(self):
+        import cv2
+
+        image = cv2.imread(self.paths[0])
+        client = self.remote()
+        client.detect(image)
+        block = client._shm.name
+        client.recognize(image, client.detect(image)[:2])
+        self.assertEqual(client._shm.name, block)          # 같은 페이지는 블록을 다시 만들지 않는다
+        client.detect(image.copy())
+        self.assertNotEqual(client._shm.name, block)
+
+    def test_pipeline_through_server(self):
+        from .custom_paddle_ocr_script import ocr_page_tokens
+        from .ocr_server import server_request
+
+        self.assertEqual(build_courses(ocr_page_tokens(self.paths[0])), self.CORPUS[0][1])
+        stats = server_request({"op": "stats"}, self.socket_path)
+        self.assertEqual(stats["pid"], os.getpid())
+        self.assertFalse(stats["profiles"]["accurate"]["batched"])
+        self.assertGreater(stats["profiles"]["accurate"]["calls"], 0)
+
+    def test_server_errors_are_raised(self):
+        from .ocr_server import server_request
+
+        with self.assertRaisesRegex(RuntimeError, "알 수 없는 요청"):
+            server_request({"op": "bogus", "profile": "accurate"}, self.socket_path)
+
+    def test_client_reconnects_after_server_restart(self):
+        import cv2
+        import threading
+        from .ocr_server import OcrServer
+
+        image = cv2.imread(self.paths[0])
+        client = self.remote()
+        client.detect(image)
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = OcrServer(self.socket_path)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.shutdown)
+        self.assertEqual(len(client.detect(image)), len(CountingFakeBackend().detect(image)))
+
+
+# --- 워커 자식 재활용 예측 (transcripts/worker.py) ---
+class WorkerRecycleTests(SimpleTestCase):
+    def setUp(self):
+        from . import worker
+
+        self.worker = worker
+        patches = [mock.patch.dict(worker._state, child=True, tasks=0, rss_before={}),
+                   mock.patch.object(worker, "rss_kb", return_value=100 * 1024),
+                   mock.patch.object(worker.metrics, "observe_task_rss")]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        recycle = mock.patch.object(worker.metrics, "count_recycle")
+        self.count_recycle = recycle.start()
+        self.addCleanup(recycle.stop)
+
+    def task(self, name: str = "transcripts.tasks.process_transcript_page", max_tasks=None, max_kb=None):
+        task = mock.Mock()
+        task.name = name
+        task.app.conf.worker_max_tasks_per_child = max_tasks
+        task.app.conf.worker_max_memory_per_child = max_kb
+        return task
+
+    def run_task(self, task, task_id: str = "t1"):
+        self.worker._on_task_prerun(task_id=task_id, task=task)
+        self.worker._on_task_postrun(task_id=task_id, task=task)
+
+    def reasons(self) -> list[str]:
+        return [call.args[0] for call in self.count_recycle.call_args_list]
+
+    def test_recycle_after_max_tasks(self):
+        # billiard 는 태스크 종류와 관계없이 센다
+        tasks = [self.task(max_tasks=3), self.task("transcripts.tasks.finalize_transcript", max_tasks=3),
+                 self.task(max_tasks=3)]
+        for task in tasks[:2]:
+            self.run_task(task)
+        self.assertEqual(self.reasons(), [])
+        self.run_task(tasks[2])
+        self.assertEqual(self.reasons(), ["tasks"])
+
+    def test_recycle_over_memory_limit(self):
+        self.run_task(self.task(max_kb=200 * 1024))
+        self.assertEqual(self.reasons(), [])
+        self.worker.rss_kb.return_value = 300 * 1024
+        self.run_task(self.task(max_kb=200 * 1024))
+        self.assertEqual(self.reasons(), ["memory"])
+        # 둘 다 넘으면 태스크 수로 기록
+        self.run_task(self.task(max_tasks=3, max_kb=200 * 1024))
+        self.assertEqual(self.reasons(), ["memory", "tasks"])
+
+    def test_watched_task_rss_is_observed(self):
+        self.run_task(self.task())
+        self.worker.metrics.observe_task_rss.assert_called_once_with(
+            "transcripts.tasks.process_transcript_page", 100.0, 100.0)
+        self.run_task(self.task("transcripts.tasks.finalize_transcript"))
+        self.assertEqual(self.worker.metrics.observe_task_rss.call_count, 1)
+        self.assertEqual(self.worker._state["rss_before"], {})
+
+    def test_main_process_is_ignored(self):
+        self.worker._state["child"] = False
+        self.run_task(self.task(max_tasks=1, max_kb=1))
+        self.assertEqual((self.reasons(), self.worker._state["tasks"]), ([], 0))
@@ -0,0 +1,36 @@
+# transcripts/tokens.py
+# OCR 토큰 스트림 직렬화.
+# 스트림별로 열(column) 단위로 모은 JSON 을 zlib 으로 압축해 TranscriptPage.ocr_tokens 에 저장한다.
+#   {"v": 1, "streams": {"raw": {"txt": [...], "score": [...], "bbox": [x0, y0, x1, y1, x0, ...]}, ...}}
+# cx / cy / h 는 bbox 에서 다시 계산되므로 저장하지 않는다.
+import json
+import zlib
+
+TOKENS_FORMAT_VERSION = 1
+
+
+def pack_tokens(tokens: dict[str, list[dict]]) -> bytes:
+    streams = {}
+    for name, items in tokens.items():
+        streams[name] = {
+            "txt":   [it["txt"] for it in items],
+            "score": [round(float(it["score"]), 4) for it in items],
+            "bbox":  [float(v) for it in items for v in it["bbox"]],
+        }
+    payload = {"v": TOKENS_FORMAT_VERSION, "streams": streams}
+    return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def unpack_tokens(blob: bytes) -> dict[str, list[dict]]:
+    payload = json.loads(zlib.decompress(bytes(blob)).decode("utf-8"))
+    tokens = {}
+    for name, col in payload["streams"].items():
+        items = []
+        bboxes = col["bbox"]
+        for i, (txt, score) in enumerate(zip(col["txt"], col["score"])):
+            bbox = tuple(bboxes[i * 4:i * 4 + 4])
+            items.append({"txt": txt, "bbox": bbox,
+                          "cx": (bbox[0] + bbox[2]) / 2.0, "cy": (bbox[1] + bbox[3]) / 2.0,
+                          "h": bbox[3] - bbox[1], "score": score})
+        tokens[name] = items
+    return tokens
@@ -0,0 +1,108 @@
+# transcripts/triage.py
+# 업로드 시점(웹 프로세스)의 이미지 사전 점검.
+# OCR 없이 cv2 로 몇 ms 안에 끝나는 검사만 수행해, 읽을 수 없는 페이지는 큐에 넣기 전에 바로 거절한다.
+#   - 해상도: 너무 작은 이미지
+#   - 초점: 폭을 맞춘 뒤 Laplacian 분산 (스크린샷 ≈ 1000 이상, 흐린 사진 ≈ 수십 이하)
+#   - 표 구조: 가로 잉크 투영으로 센 텍스트 줄 수 (성적표 한 장 ≈ 9줄 이상) 와,
+#     그 줄들에 걸쳐 세로로 정렬된 열의 수 (이수구분/학수번호/과목명/학점/성적 ≈ 5열 이상, 채팅/웹 화면 ≈ 1~2열)
+#   - 양식: 학습된 LayoutTemplate 지문과 일치하는지 (불일치는 거절하지 않고 플래그만)
+from .conf import ocr_setting
+from .hashing import layout_fingerprint
+from .pdf import is_pdf, pdf_triage
+from .spreadsheet import is_spreadsheet, spreadsheet_triage
+
+# 초점/줄 수는 해상도에 따라 달라지므로 이 폭으로 맞춘 뒤 잰다
+PROBE_WIDTH = 1000
+# 텍스트 줄로 셀 잉크 줄(run)의 높이 범위 (PROBE_WIDTH 기준 px)
+TEXT_ROW_MIN_H, TEXT_ROW_MAX_H = 4, 50
+# 열로 셀 x 구간: 텍스트 줄의 이 비율 이상에 잉크가 있고, 이 폭 이상 비어 있으면 다른 열 (PROBE_WIDTH 기준 px)
+COLUMN_ROW_SHARE = 0.2
+COLUMN_MIN_GAP = 8
+
+
+def _runs(mask) -> list[tuple[int, int]]:
+    """1차원 bool 배열에서 True 가 이어지는 [start, end) 구간들"""
+    runs, start = [], None
+    for i, v in enumerate(list(mask) + [False]):
+        if v and start is None:
+            start = i
+        elif not v and start is not None:
+            runs.append((start, i))
+            start = None
+    return runs
+
+
+def _text_rows(ink) -> list[tuple[int, int]]:
+    """가로 투영에서 잉크가 있는 연속 구간 중 글자 높이 범위에 드는 것 ([y0, y1) 목록)"""
+    return [(y0, y1) for y0, y1 in _runs(ink.mean(axis=1) > 0.01) if TEXT_ROW_MIN_H <= y1 - y0 <= TEXT_ROW_MAX_H]
+
+
+def _count_columns(ink, rows: list[tuple[int, int]]) -> int:
+    """
+    텍스트 줄들에 걸쳐 세로로 정렬된 열의 수.
+    x 마다 잉크가 있는 줄의 비율을 세로 투영으로 보고, COLUMN_ROW_SHARE 이상인 구간을 COLUMN_MIN_GAP 미만의 틈은
+    이어 붙여 센다. 표는 열 사이의 빈 세로 띠가 모든 줄에서 같은 자리에 있어 여러 열로 갈라지고, 왼쪽 정렬된
+    문장(채팅/웹 화면)은 줄마다 단어 틈의 위치가 달라 한 덩어리로 남는다.
+    """
+    if not rows:
+        return 0
+    share = sum(ink[y0:y1].any(axis=0) for y0, y1 in rows) / len(rows)
+    columns, last_end = 0, None
+    for x0, x1 in _runs(share >= COLUMN_ROW_SHARE):
+        if last_end is None or x0 - last_end >= COLUMN_MIN_GAP:
+            columns += 1
+        last_end = x1
+    return columns
+
+
+def triage_image(data: bytes, layouts=None) -> dict:
+    """
+    {"ok": bool, "error": 거절 사유 | None, "flags": [...], "metrics": {...}}
+    layouts(layouts.LayoutStore)를 넘기면 학습된 양식과 지문을 비교한다.
+    """
+    import cv2
+    import numpy as np
+
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return {"ok": False, "error": "이미지 파일을 열 수 없습니다.", "flags": [], "metrics": {}}
+
+    height, width = image.shape[:2]
+    metrics = {"width": width, "height": height}
+    if width < ocr_setting("TRIAGE_MIN_WIDTH") or height < ocr_setting("TRIAGE_MIN_HEIGHT"):
+        return {"ok": False, "flags": [], "metrics": metrics,
+                "error": f"해상도가 너무 낮습니다 ({width}x{height}). 성적표 화면을 더 크게 캡처해 주세요."}
+
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    probe = cv2.resize(gray, (PROBE_WIDTH, max(int(height * PROBE_WIDTH / width), 1)), interpolation=cv2.INTER_AREA)
+    metrics["sharpness"] = round(float(cv2.Laplacian(probe, cv2.CV_64F).var()), 1)
+    if metrics["sharpness"] < ocr_setting("TRIAGE_MIN_SHARPNESS"):
+        return {"ok": False, "flags": [], "metrics": metrics,
+                "error": "이미지가 흐려 글자를 읽을 수 없습니다. 초점이 맞은 이미지나 스크린샷을 올려 주세요."}
+
+    _, ink = cv2.threshold(probe, 0, 1, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    rows = _text_rows(ink)
+    metrics["text_rows"] = len(rows)
+    metrics["columns"] = _count_columns(ink, rows)
+    if metrics["text_rows"] < ocr_setting("TRIAGE_MIN_TEXT_ROWS") or metrics["columns"] < ocr_setting("TRIAGE_MIN_COLUMNS"):
+        return {"ok": False, "flags": [], "metrics": metrics,
+                "error": "성적표 표를 찾을 수 없습니다. 학수번호/성적이 보이는 성적표 화면을 올려 주세요."}
+
+    flags = []
+    if layouts is not None and layouts.size:
+        fingerprint = layout_fingerprint(image)
+        if layouts.match(fingerprint) is None:
+            flags.append("unknown_layout")   # 처음 보는 양식: 처리는 하되 결과 확인이 필요할 수 있다
+    return {"ok": True, "error": None, "flags": flags, "metrics": metrics}
+
+
+def triage_upload(file_obj, layouts=None) -> dict:
+    """업로드 파일(UploadedFile)을 읽어 triage_image() 를 수행하고 파일 위치를 되돌린다 (PDF/엑셀은 각 모듈의 triage)"""
+    if is_spreadsheet(file_obj):
+        return spreadsheet_triage(file_obj)
+    if is_pdf(file_obj):
+        return pdf_triage(file_obj)
+    file_obj.seek(0)
+    data = file_obj.read()
+    file_obj.seek(0)
+    return triage_image(data, layouts)
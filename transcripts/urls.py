@@ -2,7 +2,11 @@ from django.urls import path
 from .views import (
     TranscriptUploadView,
     TranscriptStatusView,
-    TranscriptParsedView
+    TranscriptParsedView,
+    TranscriptPagesView,
+    TranscriptPageDetailView,
+    TranscriptProfileReportView,
+    TranscriptProfileDetailView,
 )
 
 urlpatterns = [
@@ -12,4 +16,12 @@ urlpatterns = [
     path('status/<int:user_id>/', TranscriptStatusView.as_view(), name='transcript-status'),
     # 3) GET    /api/transcripts/parsed/{user_id}/ -> 파싱 결과 조회
     path('parsed/<int:user_id>/', TranscriptParsedView.as_view(), name='transcript-parsed'),
+    # 4) GET/POST /api/transcripts/{user_id}/pages/ -> 최신 성적표 페이지 목록 / 페이지 추가
+    path('<int:user_id>/pages/', TranscriptPagesView.as_view(), name='transcript-pages'),
+    # 5) PUT/DELETE /api/transcripts/{user_id}/pages/{page_number}/ -> 페이지 교체 / 삭제
+    path('<int:user_id>/pages/<int:page_number>/', TranscriptPageDetailView.as_view(), name='transcript-page-detail'),
+    # 6) GET    /api/transcripts/profile/?days=7 -> (staff) 처리 시간 p50/p95 집계
+    path('profile/', TranscriptProfileReportView.as_view(), name='transcript-profile-report'),
+    # 7) GET    /api/transcripts/profile/{transcript_id}/ -> (staff) 성적표 한 건의 페이지별 단계 시간
+    path('profile/<int:transcript_id>/', TranscriptProfileDetailView.as_view(), name='transcript-profile-detail'),
 ]
@@ -1,15 +1,52 @@
 # utils.py
-from .custom_paddle_ocr_script import ocr_single_table_term_code_grade_retake
+import os
 import tempfile
 
-def parse_single_table_with_paddle(image_input) -> list[list[str]]:
+from .code_index import get_code_index
+from .layouts import get_layout_store
+from .pdf import is_pdf_path, render_page, text_layer_tokens
+from .profiling import stage
+
+def _image_path(image_input) -> str:
     if isinstance(image_input, str):
-        path = image_input
-    elif hasattr(image_input, "path"):             # FileField/TemporaryUploadedFile
-        path = image_input.path
-    else:                                          # InMemoryUploadedFile 등
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-            image_input.seek(0)
-            tmp.write(image_input.read())
-            path = tmp.name
-    return ocr_single_table_term_code_grade_retake(path)
+        return image_input
+    if hasattr(image_input, "path"):               # FileField/TemporaryUploadedFile
+        return image_input.path
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:   # InMemoryUploadedFile 등
+        image_input.seek(0)
+        tmp.write(image_input.read())
+        return tmp.name
+
+# OCR 모듈(cv2, paddle)은 워커에서 실제로 파싱할 때만 불러온다.
+# tasks.py → utils.py 경로로 웹 프로세스가 import 해도 무거운 의존성이 올라오지 않도록 한다.
+def parse_single_table_with_paddle(image_input) -> list[list[str]]:
+    from .custom_paddle_ocr_script import ocr_single_table_term_code_grade_retake
+    return ocr_single_table_term_code_grade_retake(_image_path(image_input), get_code_index())
+
+def page_tokens(page_file, stats: dict | None = None) -> dict[str, list[dict]]:
+    """
+    페이지 파일 → 토큰 스트림. 텍스트 레이어가 있는 PDF 는 OCR 없이 단어 좌표를 쓰고,
+    스캔본 PDF 쪽은 이미지로 렌더링해, 이미지 파일은 그대로 OCR 한다.
+    """
+    stats = {} if stats is None else stats
+    path = _image_path(page_file)
+    if not is_pdf_path(path):
+        stats["source"] = "image"
+        return ocr_tokens_with_paddle(path, stats)
+    with stage("decode"):
+        tokens = text_layer_tokens(path)
+    if tokens is not None:
+        stats["source"] = "pdf_text"
+        return tokens
+    stats["source"] = "pdf_raster"
+    with stage("render"):
+        rendered = render_page(path)
+    try:
+        return ocr_tokens_with_paddle(rendered, stats)
+    finally:
+        os.unlink(rendered)
+
+def ocr_tokens_with_paddle(image_input, stats: dict | None = None) -> dict[str, list[dict]]:
+    """파싱 전 단계의 OCR 토큰 스트림 (ocr_parsing.build_courses 로 과목 행을 만든다)"""
+    from .custom_paddle_ocr_script import ocr_page_tokens
+    return ocr_page_tokens(_image_path(image_input), get_code_index(), stats, get_layout_store())
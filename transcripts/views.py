@@ -3,18 +3,25 @@ from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework import status, permissions
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.http import HttpResponse
+from django.utils import timezone
 import re
+from datetime import timedelta
 
-from .custom_paddle_ocr_script import rows_to_text
-from .models import Transcript
+from .ocr_parsing import rows_to_text
+from .profiling import profile_report, report_pages, transcript_timings
+from .models import Transcript, TranscriptPage
 from .serializers import (
     TranscriptUploadSerializer,
+    TranscriptPageFilesSerializer,
     TranscriptStatusSerializer,
     TranscriptParsedSerializer
 )
-from .tasks import process_transcript
+from .conf import ocr_setting
+from .spreadsheet import is_spreadsheet
+from .tasks import import_transcript_now, process_transcript
 
 
 def _rows_to_tsv(rows: list[list[str]]) -> str:
@@ -59,6 +66,44 @@ def transform_parsed_records(data):
     return data
 
 
+def start_processing(transcript: Transcript) -> dict:
+    """업로드/페이지 추가·교체 후 처리 시작. 끝나지 않은 페이지만 처리된다 (tasks.process_transcript)"""
+    pending = list(transcript.pages.exclude(status=TranscriptPage.STATUS.done))
+    # 작은 엑셀/CSV 는 OCR 이 필요 없으므로 요청 안에서 바로 파싱해 결과까지 확정한다 (남은 페이지가 없으면 병합만)
+    if (all(is_spreadsheet(p.file) for p in pending)
+            and sum(p.file.size for p in pending) <= ocr_setting("SPREADSHEET_SYNC_MAX_BYTES")):
+        import_transcript_now(transcript)
+        body = {"message": "업로드 완료", "status": transcript.status.lower()}
+        if transcript.error_message:
+            body["error"] = transcript.error_message
+        return body
+
+    # 워커가 시작하기 전에도 상태 조회가 이전 결과(done)를 돌려주지 않고, 다른 수정 요청은 409 를 받도록 대기로 바꾼다
+    transcript.status        = Transcript.STATUS.pending
+    transcript.error_message = None
+    transcript.enqueued_at   = timezone.now()
+    transcript.save(update_fields=["status", "error_message", "enqueued_at"])
+    try:
+        process_transcript.delay(transcript.id)
+    except Exception as e:
+        # 브로커에 넣지 못하면 대기 상태로 남아 수정도 재시도도 막히므로, 다시 수정/재처리할 수 있는 error 로 되돌린다
+        # (올린 페이지는 저장되어 있으므로 resume_transcripts 로 다시 큐에 넣을 수 있다)
+        print(f"[업로드] 성적표 {transcript.id} 큐 등록 실패: {e}")
+        transcript.status        = Transcript.STATUS.error
+        transcript.error_message = "처리 대기열에 넣지 못했습니다. 잠시 후 다시 시도해 주세요."
+        transcript.save(update_fields=["status", "error_message"])
+        return {"message": "업로드 완료", "status": transcript.status.lower(), "error": transcript.error_message}
+    body = {"message": "업로드 완료", "status": "processing"}
+    # 사전 점검은 통과했지만 확인이 필요한 페이지 (예: 처음 보는 양식)
+    warnings = {
+        page.page_number: page.triage["flags"]
+        for page in pending if page.triage and page.triage["flags"]
+    }
+    if warnings:
+        body["warnings"] = warnings
+    return body
+
+
 class TranscriptUploadView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
@@ -80,11 +125,7 @@ class TranscriptUploadView(APIView):
         )
         if serializer.is_valid():
             transcript = serializer.save()
-            process_transcript.delay(transcript.id)
-            return Response(
-                {"message": "업로드 완료", "status": "processing"},
-                status=status.HTTP_201_CREATED
-            )
+            return Response(start_processing(transcript), status=status.HTTP_201_CREATED)
         return Response(
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
@@ -162,3 +203,148 @@ class TranscriptParsedView(APIView):
         # 과거 포맷: [{'term':..., ...}, ...] → 'semester'로 변환해서 JSON 반환
         data = transform_parsed_records(data)
         return Response(data, status=status.HTTP_200_OK)
+
+
+# ─────────────────────────────────────────────────────────────
+# 최신 성적표의 페이지 단위 수정: 바뀐 페이지만 OCR 하고 parsed_data 는 페이지 결과를 다시 병합
+# ─────────────────────────────────────────────────────────────
+# 수정할 수 있는 상태 (대기/처리 중인 성적표는 병합 결과가 엇갈리지 않도록 막는다)
+_EDITABLE = (Transcript.STATUS.done, Transcript.STATUS.error)
+
+
+def _busy_response() -> Response:
+    return Response({"error": "성적표를 처리 중입니다. 완료된 뒤 다시 시도해 주세요."},
+                    status=status.HTTP_409_CONFLICT)
+
+
+def _editable_transcript(request, user_id):
+    """(transcript, 오류 Response) — 대기/처리 중인 성적표는 수정을 막는다 (조회는 허용)"""
+    if request.user.id != user_id:
+        return None, Response({"error": "인증이 필요합니다."}, status=status.HTTP_401_UNAUTHORIZED)
+    transcript = Transcript.objects.filter(user_id=user_id).order_by('-created_at').first()
+    if not transcript:
+        return None, Response({"error": "해당 성적표가 존재하지 않습니다."}, status=status.HTTP_404_NOT_FOUND)
+    if transcript.status not in _EDITABLE and request.method != "GET":
+        return None, _busy_response()
+    return transcript, None
+
+
+def _claim(transcript: Transcript) -> bool:
+    """
+    수정 권한을 원자적으로 얻는다: 끝난 성적표만 대기 상태로 바꾼다 (조건부 UPDATE).
+    동시에 들어온 두 수정 요청 중 하나만 True 를 받으므로 처리 실행(chord)이 하나만 시작된다.
+    transaction.atomic 안에서 호출해 이후 수정이 실패하면 상태도 되돌린다.
+    """
+    claimed = (Transcript.objects.filter(pk=transcript.pk, status__in=_EDITABLE)
+                                 .update(status=Transcript.STATUS.pending, error_message=None))
+    if claimed:
+        transcript.status, transcript.error_message = Transcript.STATUS.pending, None
+    return bool(claimed)
+
+
+class TranscriptPagesView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def get(self, request, user_id):
+        transcript, error = _editable_transcript(request, user_id)
+        if error:
+            return error
+        pages = [
+            {"page_number": p.page_number, "status": p.status, "rows": len(p.parsed_rows or []),
+             "error": p.error_message}
+            for p in transcript.pages.order_by('page_number')
+        ]
+        return Response({"status": transcript.status.lower(), "pages": pages}, status=status.HTTP_200_OK)
+
+    def post(self, request, user_id):
+        """페이지 추가 (빠뜨린 학기 화면 등). 기존 페이지 뒤 번호로 붙는다"""
+        transcript, error = _editable_transcript(request, user_id)
+        if error:
+            return error
+        serializer = TranscriptPageFilesSerializer(data={"files": request.data.getlist('files')})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            if not _claim(transcript):
+                return _busy_response()
+            serializer.append(transcript)
+        return Response(start_processing(transcript),
+                        status=status.HTTP_201_CREATED)
+
+
+class TranscriptPageDetailView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def put(self, request, user_id, page_number):
+        """페이지 한 장 교체. 이 페이지만 다시 OCR 한다"""
+        transcript, error = _editable_transcript(request, user_id)
+        if error:
+            return error
+        page = get_object_or_404(TranscriptPage, transcript=transcript, page_number=page_number)
+        serializer = TranscriptPageFilesSerializer(data={"files": request.data.getlist('files')},
+                                                   context={"single_page": True})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            if not _claim(transcript):
+                return _busy_response()
+            serializer.replace(page)
+        return Response(start_processing(transcript),
+                        status=status.HTTP_200_OK)
+
+    def delete(self, request, user_id, page_number):
+        """페이지 삭제. 뒤 페이지 번호를 당기고 남은 페이지 결과를 다시 병합한다 (OCR 없음)"""
+        transcript, error = _editable_transcript(request, user_id)
+        if error:
+            return error
+        page = get_object_or_404(TranscriptPage, transcript=transcript, page_number=page_number)
+        with transaction.atomic():
+            if not _claim(transcript):
+                return _busy_response()
+            page.delete()
+            for p in transcript.pages.filter(page_number__gt=page_number).order_by('page_number'):
+                p.page_number -= 1
+                p.save(update_fields=["page_number"])
+        page.file.delete(save=False)
+        # 남은 페이지가 모두 끝난 상태면 요청 안에서 병합만 하고, 이전에 실패한 페이지가 있으면 그 페이지만 다시 처리
+        body = start_processing(transcript)
+        body["message"] = "삭제 완료"
+        return Response(body, status=status.HTTP_200_OK)
+
+
+# ─────────────────────────────────────────────────────────────
+# 파이프라인 프로파일 (staff 전용): 워커 대수 산정/병목 확인용
+# ─────────────────────────────────────────────────────────────
+class TranscriptProfileReportView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """최근 ?days=N 일(기본 7) 동안 처리가 끝난 성적표의 큐 대기/처리 시간과 페이지 단계별 p50·p95"""
+        try:
+            days = int(request.query_params.get('days', 7))
+        except ValueError:
+            return Response({"error": "days 는 정수여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+        transcripts = (
+            Transcript.objects
+                      .filter(finished_at__gte=timezone.now() - timedelta(days=days))
+                      .prefetch_related(report_pages())
+        )
+        return Response({"days": days, **profile_report(transcripts)}, status=status.HTTP_200_OK)
+
+
+class TranscriptProfileDetailView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, transcript_id):
+        transcript = get_object_or_404(Transcript, pk=transcript_id)
+        pages = [
+            {"page_number": p.page_number, "status": p.status, "profile": p.profile}
+            for p in transcript.pages.only('id', 'page_number', 'status', 'profile').order_by('page_number')
+        ]
+        return Response(
+            {"id": transcript.id, "status": transcript.status.lower(), **transcript_timings(transcript),
+             "pages": pages},
+            status=status.HTTP_200_OK
+        )
@@ -0,0 +1,123 @@
+# transcripts/worker.py
+# Celery 워커 프로세스 수명주기 훅. tasks.py 에서 import 되어 워커에서만 실제로 동작한다.
+#  - worker_init (메인 프로세스): 실제 동시성(-c) 기록(자식의 CPU 예산용), /metrics 서버 (conf METRICS_PORT, transcripts/metrics.py)
+#  - worker_process_init (prefork 자식): CPU 고정과 스레드 환경변수(OCR 모듈 import 전), 엔진 웜업(더미 추론),
+#    웜업으로 만든 엔진 기준 추론 경로 점검
+#  - task_prerun / task_postrun (자식): OCR 태스크 전후 RSS 기록.
+#    자식 교체 자체는 billiard 가 한다 (settings.CELERY_WORKER_MAX_TASKS_PER_CHILD 건 처리 후,
+#    또는 태스크를 마친 시점의 RSS 가 CELERY_WORKER_MAX_MEMORY_PER_CHILD KB 초과 시 현재 태스크를 끝내고 종료).
+#    여기서는 billiard 와 같은 값(billiard.compat.mem_rss)으로 교체 여부를 미리 판단해 로그/지표로 남긴다.
+#  - worker_process_shutdown (자식): 멀티프로세스 지표 정리
+import time
+
+from celery.signals import task_postrun, task_prerun, worker_init, worker_process_init, worker_process_shutdown
+
+from . import cpu, metrics
+from .conf import DEFAULTS, ocr_setting
+
+# RSS 를 기록할 OCR 태스크 (process_transcript 는 페이지 태스크를 나눠 보내고, 실제 OCR 은 페이지 태스크에서 한다)
+WATCHED_TASKS = {"transcripts.tasks.process_transcript", "transcripts.tasks.process_transcript_page"}
+
+# 이 자식 프로세스의 상태 (prefork 자식에서만 child=True)
+_state = {"child": False, "tasks": 0, "rss_before": {}}
+
+
+def rss_kb() -> int:
+    """billiard 가 max_memory_per_child 와 비교하는 값 (psutil 이 있으면 현재 RSS, 없으면 resource 의 최대 RSS)"""
+    from billiard.compat import mem_rss
+    return mem_rss()
+
+
+def rss_mb() -> float:
+    return round(rss_kb() / 1024, 1)
+
+
+@worker_init.connect
+def _on_worker_init(sender=None, **kwargs):
+    # worker_process_init 은 sender 가 없으므로 fork 전에 메인 프로세스에서 기록해 둔다
+    cpu.set_worker_concurrency(getattr(sender, "concurrency", None))
+    if metrics.start_metrics_server(ocr_setting("METRICS_PORT")):
+        print(f"[OCR 워커] /metrics 포트 {ocr_setting('METRICS_PORT')}")
+
+
+@worker_process_init.connect
+def _on_worker_process_init(**kwargs):
+    from billiard.process import current_process
+
+    _state.update(child=True, tasks=0, rss_before={})
+    pid = current_process().pid
+    if ocr_setting("CPU_AFFINITY"):
+        cpus = cpu.pin_worker_cpus(getattr(current_process(), "index", 0) or 0)
+        print(f"[OCR 워커] pid={pid} CPU 고정: {cpus}")
+    # OpenMP/MKL 스레드 수는 paddle/cv2/numpy 가 처음 로드될 때 정해지므로 OCR 모듈 import 전에 맞춘다
+    cpu.set_thread_env(cpu.cpu_threads())
+
+    # OCR 모듈(cv2, paddle)은 워커 프로세스 안에서만 불러온다
+    from . import custom_paddle_ocr_script as ocr_script
+
+    default_backend = ocr_setting("BACKEND") == DEFAULTS["BACKEND"]
+    if not default_backend:
+        # 추론 서버 클라이언트/가짜 엔진은 이 프로세스에 모델을 올리지 않으므로 paddle 을 import 하지 않는다
+        print(f"[OCR 워커] pid={pid} 엔진: {ocr_setting('BACKEND')}")
+
+    warmed = False
+    if ocr_setting("WORKER_WARMUP"):
+        # 웜업 실패(추론 서버 미기동 등)로 자식이 죽지 않도록 하고, 첫 태스크에서 다시 엔진을 만든다
+        started = time.perf_counter()
+        try:
+            warm = ocr_script.warm_up()
+        except Exception as e:
+            print(f"[OCR 워커] pid={pid} 웜업 실패: {e}")
+        else:
+            warmed = True
+            elapsed = time.perf_counter() - started
+            metrics.observe_warmup(ocr_setting("BACKEND"), elapsed)
+            print(f"[OCR 워커] pid={pid} 웜업 {elapsed:.2f}s (로드 {warm['engine_load_s']}s, "
+                  f"더미 추론 {warm['dummy_inference_s']}s) rss={rss_mb()}MB")
+
+    if default_backend:
+        # 가속 경로는 실제로 만든 엔진의 예측기에서 읽는다 (엔진이 없으면 요청 설정만 출력)
+        report = ocr_script.cpu_inference_report(ocr_script.get_ocr() if warmed else None)
+        if report["active"]:
+            print(f"[OCR 워커] 추론 경로: {', '.join(report['active'])} (paddle={report.get('paddle')})")
+        else:
+            print(f"[OCR 워커] 추론 경로(요청, 엔진 미생성): {report['requested']} (paddle={report.get('paddle')})")
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(pid=None, **kwargs):
+    metrics.mark_process_dead(pid)
+
+
+@task_prerun.connect
+def _on_task_prerun(task_id=None, task=None, **kwargs):
+    if _state["child"] and task.name in WATCHED_TASKS:
+        _state["rss_before"][task_id] = rss_mb()
+
+
+@task_postrun.connect
+def _on_task_postrun(task_id=None, task=None, **kwargs):
+    if not _state["child"]:
+        return
+    from billiard.process import current_process
+
+    # billiard 는 종류와 관계없이 자식이 처리한 태스크 수로 교체하므로 모든 태스크를 센다
+    _state["tasks"] += 1
+    used_kb = rss_kb()
+    after = round(used_kb / 1024, 1)
+    if task.name in WATCHED_TASKS:
+        before = _state["rss_before"].pop(task_id, None)
+        metrics.observe_task_rss(task.name, before, after)
+        print(f"[OCR 워커] {task.name.rsplit('.', 1)[-1]} rss {before}MB → {after}MB")
+
+    max_tasks = task.app.conf.worker_max_tasks_per_child
+    max_kb = task.app.conf.worker_max_memory_per_child
+    if max_tasks and _state["tasks"] >= max_tasks:
+        reason = "tasks"
+    elif max_kb and used_kb > max_kb:
+        reason = "memory"
+    else:
+        return
+    metrics.count_recycle(reason)
+    print(f"[OCR 워커] pid={current_process().pid} 재활용 ({reason}): "
+          f"{_state['tasks']}건 처리, rss={after}MB → 현재 태스크 후 새 자식으로 교체")